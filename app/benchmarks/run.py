@@ -0,0 +1,404 @@
+"""Benchmark harness: data loading, backtests, strategy CRUD and the HTTP API.
+
+Each scale generates a synthetic chain file (see ``benchmarks.synthetic``)
+in a scratch data directory and runs in a fresh worker process pointed at
+it through OPTIONBOT_DATA_DIR, so the numbers are not skewed by whatever
+the previous scale left in memory. The HTTP benchmarks run against a
+uvicorn server started on the same directory.
+
+    python -m benchmarks.run                         # small and medium
+    python -m benchmarks.run --scales large --repeat 5
+    python -m benchmarks.run --compare benchmarks/results/OLD.json
+
+Results are written as JSON (``benchmarks/results/<timestamp>.json`` by
+default): for every scale and operation the sample count, throughput,
+mean/p50/p99 latency in milliseconds and the process's peak RSS.
+``--compare`` prints the p50 ratio of every operation against an earlier
+results file.
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import numpy as np
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# symbols x days x strikes x expirations
+SCALES = {
+    'small': {'symbols': 1, 'days': 60, 'strikes': 20, 'expirations': 2},
+    'medium': {'symbols': 2, 'days': 250, 'strikes': 40, 'expirations': 3},
+    'large': {'symbols': 4, 'days': 750, 'strikes': 60, 'expirations': 4},
+}
+DEFAULT_SCALES = ['small', 'medium']
+
+LEGS = {'longPut': -0.05, 'shortPut': -0.15, 'shortCall': 0.15, 'longCall': 0.05}
+INITIAL_CAPITAL = 100000.0
+# Strategies created per CRUD round
+CRUD_STRATEGIES = 200
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def process_peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak RSS of another process (Linux only)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def summarize(samples: List[float], items: int = 1, rss_mb: Optional[float] = None) -> dict:
+    """Statistics for per-call durations in seconds.
+
+    ``items`` is the work done per call (days, quotes, trades) and gives
+    ``itemsPerSecond``; ``throughput`` counts calls.
+    """
+    times = np.asarray(samples, dtype='float64')
+    total = float(times.sum())
+    stats = {
+        'count': len(times),
+        'throughput': len(times) / total if total > 0 else None,
+        'meanMs': float(times.mean() * 1000),
+        'p50Ms': float(np.percentile(times, 50) * 1000),
+        'p99Ms': float(np.percentile(times, 99) * 1000),
+        'peakRssMb': round(rss_mb if rss_mb is not None else peak_rss_mb(), 1),
+    }
+    if items != 1:
+        stats['itemsPerSecond'] = items * len(times) / total if total > 0 else None
+    return stats
+
+
+def measure(fn: Callable[[], object], repeat: int, warmup: int = 1, items: int = 1) -> dict:
+    """Time ``repeat`` calls of ``fn`` after ``warmup`` untimed ones."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, items)
+
+
+def measure_each(fns: List[Callable[[], object]]) -> dict:
+    """Time one call of each function (operations that cannot be repeated, like deletes)."""
+    samples = []
+    for fn in fns:
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+# ---------------------------------------------------------------------------
+# Worker: everything that runs inside the application process
+# ---------------------------------------------------------------------------
+
+def run_worker(scale: dict, repeat: int) -> dict:
+    """Benchmarks for one scale; OPTIONBOT_DATA_DIR must already point at a scratch directory."""
+    from benchmarks.synthetic import generate_chains
+    from services import chain_store, strategy_service
+    from schemas import CreateStrategyRequest, UpdateStrategyRequest
+
+    results = {}
+    started = time.perf_counter()
+    records = generate_chains(**scale)
+    with open(strategy_service.HISTORICAL_DATA_FILE, 'w') as f:
+        json.dump(records, f)
+    symbols = sorted({r['symbol'] for r in records})
+    start_date, end_date = records[0]['date'], records[len(records) // len(symbols) - 1]['date']
+    days = len(records) // len(symbols)
+    quotes = sum(len(r['options']) for r in records)
+    del records
+    info = {
+        'quotes': quotes,
+        'sourceBytes': os.path.getsize(strategy_service.HISTORICAL_DATA_FILE),
+        'generateSeconds': round(time.perf_counter() - started, 3),
+    }
+
+    results['chain_store.import_json'] = measure(
+        lambda: chain_store.import_json(strategy_service.HISTORICAL_DATA_FILE),
+        repeat=1, warmup=0, items=quotes
+    )
+    # The first load of each partition also solves greeks into the sidecar
+    strategy_service.get_historical_chain(symbols[0], start_date, end_date)
+
+    month_end = np.datetime_as_string(np.datetime64(start_date) + 30)
+    results['get_historical_data.full'] = measure(
+        lambda: strategy_service.get_historical_data(symbols[0], start_date, end_date),
+        repeat, items=days
+    )
+    results['get_historical_data.month'] = measure(
+        lambda: strategy_service.get_historical_data(symbols[0], start_date, month_end),
+        repeat
+    )
+    results['get_historical_chain.full'] = measure(
+        lambda: strategy_service.get_historical_chain(symbols[0], start_date, end_date),
+        repeat, items=days
+    )
+
+    # Backtests on data that is already loaded, then including the load
+    created = [
+        strategy_service.create_strategy(CreateStrategyRequest(
+            symbol=symbol, strategy='Iron Condor', expiration='0DTE', legs=LEGS, quantity=1
+        ))
+        for symbol in symbols
+    ]
+    strategy = strategy_service.get_strategy_instance(created[0]['id'])
+    frame = strategy_service.get_historical_chain(symbols[0], start_date, end_date)
+    trades = {}
+
+    def backtest():
+        result = strategy.backtest(start_date, end_date, INITIAL_CAPITAL, frame)
+        trades['count'] = len(result['trades'])
+
+    results['IronCondor.backtest'] = measure(backtest, repeat, items=days)
+    results['compute_backtest'] = measure(
+        lambda: strategy_service.compute_backtest(strategy, start_date, end_date, INITIAL_CAPITAL),
+        repeat, items=days
+    )
+    info['trades'] = trades['count']
+
+    # Strategy CRUD
+    request = CreateStrategyRequest(symbol=symbols[0], strategy='Iron Condor', expiration='0DTE', legs=LEGS, quantity=1)
+    ids = []
+    results['create_strategy'] = measure_each([
+        lambda: ids.append(strategy_service.create_strategy(request)['id'])
+    ] * CRUD_STRATEGIES)
+    results['get_all_strategies'] = measure(strategy_service.get_all_strategies, repeat * 10)
+    results['get_strategy_by_id'] = measure_each([
+        (lambda i=i: strategy_service.get_strategy_by_id(i)) for i in ids
+    ])
+    update = UpdateStrategyRequest(quantity=2)
+    results['update_strategy'] = measure_each([
+        (lambda i=i: strategy_service.update_strategy(i, update)) for i in ids
+    ])
+    results['delete_strategy'] = measure_each([
+        (lambda i=i: strategy_service.delete_strategy(i)) for i in ids
+    ])
+    strategy_service.strategies.close()
+
+    info['strategyIds'] = [s['id'] for s in created]
+    info['startDate'], info['endDate'] = start_date, end_date
+    return {'info': info, 'results': results}
+
+
+# ---------------------------------------------------------------------------
+# HTTP benchmarks against a uvicorn server
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(env: dict) -> tuple:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIR, env=env
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError('uvicorn exited during startup')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            return server, port
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('uvicorn did not start')
+
+
+def run_http(env: dict, info: dict, repeat: int) -> dict:
+    """Time the main endpoints over one keep-alive connection."""
+    server, port = _start_server(env)
+    try:
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+
+        def call(method: str, path: str, body: Optional[dict] = None, headers: Optional[dict] = None) -> tuple:
+            headers = dict(headers or {})
+            data = None
+            if body is not None:
+                data = json.dumps(body).encode()
+                headers['Content-Type'] = 'application/json'
+            conn.request(method, path, body=data, headers=headers)
+            response = conn.getresponse()
+            payload = response.read()
+            if response.status >= 400:
+                raise RuntimeError(f'{method} {path}: {response.status} {payload[:200]!r}')
+            return response, payload
+
+        strategy_id = info['strategyIds'][0]
+        backtest = {'startDate': info['startDate'], 'endDate': info['endDate'], 'initialCapital': INITIAL_CAPITAL}
+        gz = {'Accept-Encoding': 'gzip'}
+        results = {}
+        results['GET /strategies'] = measure(lambda: call('GET', '/strategies'), repeat * 10)
+        etag = call('GET', '/strategies')[0].getheader('ETag')
+        results['GET /strategies (304)'] = measure(
+            lambda: call('GET', '/strategies', headers={'If-None-Match': etag}), repeat * 10
+        )
+        results['GET /strategies/{id}'] = measure(lambda: call('GET', f'/strategies/{strategy_id}'), repeat * 10)
+
+        backtest_ids = []
+
+        def run_backtest(query: str = ''):
+            payload = call('POST', f'/backtest/{strategy_id}{query}', backtest, gz)[1]
+            backtest_ids.append(json.loads(gzip.decompress(payload) if payload[:2] == b'\x1f\x8b' else payload)['backtestId'])
+
+        results['POST /backtest/{id}'] = measure(run_backtest, repeat, items=info['trades'])
+        results['POST /backtest/{id}?summary=true'] = measure(lambda: run_backtest('?summary=true'), repeat)
+        backtest_id = backtest_ids[-1]
+        results['GET /backtest/results/{id}'] = measure(
+            lambda: call('GET', f'/backtest/results/{backtest_id}'), repeat * 5, items=info['trades']
+        )
+        results['GET /backtest/results/{id} (gzip)'] = measure(
+            lambda: call('GET', f'/backtest/results/{backtest_id}', headers=gz), repeat * 5, items=info['trades']
+        )
+        results['GET /backtest/results/{id}/trades'] = measure(
+            lambda: call('GET', f'/backtest/results/{backtest_id}/trades?limit=100&sortBy=pnl&order=desc'), repeat * 10
+        )
+        conn.close()
+        rss = process_peak_rss_mb(server.pid)
+        for stats in results.values():
+            stats['peakRssMb'] = round(rss, 1) if rss is not None else None
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+def _git_version() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], cwd=APP_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scale(name: str, repeat: int, http: bool) -> dict:
+    """Run one scale in a worker process on a scratch data directory."""
+    data_dir = tempfile.mkdtemp(prefix=f'optionbot-bench-{name}-')
+    env = {
+        **os.environ,
+        'OPTIONBOT_DATA_DIR': data_dir,
+        'OPTIONBOT_STORAGE': 'json',
+        # Repeated backtests should run, not come out of the result cache
+        'OPTIONBOT_RESULT_CACHE_MB': '0',
+        'PYTHONPATH': os.pathsep.join(filter(None, [APP_DIR, os.environ.get('PYTHONPATH')])),
+    }
+    try:
+        worker = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.run', '--worker', name, '--repeat', str(repeat)],
+            cwd=APP_DIR, env=env, capture_output=True, text=True
+        )
+        if worker.returncode != 0:
+            raise RuntimeError(f'{name} worker failed:\n{worker.stderr}')
+        scale = json.loads(worker.stdout.strip().splitlines()[-1])
+        if http:
+            scale['results'].update(run_http(env, scale['info'], repeat))
+        scale['info'].pop('strategyIds')
+        return {'parameters': SCALES[name], **scale}
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def print_scale(name: str, scale: dict) -> None:
+    parameters = ' x '.join(f"{value} {key}" for key, value in scale['parameters'].items())
+    print(f"\n{name}: {parameters} ({scale['info']['quotes']} quotes, {scale['info']['trades']} trades)")
+    print(f"  {'operation':<44}{'count':>6}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'rss MB':>9}")
+    for operation, stats in scale['results'].items():
+        throughput = f"{stats['throughput']:.1f}" if stats['throughput'] else '-'
+        rss = f"{stats['peakRssMb']:.0f}" if stats['peakRssMb'] is not None else '-'
+        print(f"  {operation:<44}{stats['count']:>6}{throughput:>10}"
+              f"{stats['p50Ms']:>10.2f}{stats['p99Ms']:>10.2f}{rss:>9}")
+
+
+def compare(old: dict, new: dict) -> None:
+    """Print new/old p50 latency for every operation both runs measured."""
+    print(f"\np50 ratio, {new.get('version')} vs {old.get('version')} (< 1 is faster)")
+    for name, scale in new['scales'].items():
+        before = old.get('scales', {}).get(name)
+        if before is None:
+            continue
+        print(f"  {name}")
+        for operation, stats in scale['results'].items():
+            previous = before['results'].get(operation)
+            if previous and previous['p50Ms'] > 0:
+                print(f"    {operation:<44}{stats['p50Ms'] / previous['p50Ms']:>8.2f}")
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=DEFAULT_SCALES)
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per operation (more for cheap ones)')
+    parser.add_argument('--no-http', action='store_true', help='skip the HTTP endpoint benchmarks')
+    parser.add_argument('--output', help='results file (default benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', metavar='OLD.json', help='earlier results file to compare against')
+    parser.add_argument('--worker', choices=list(SCALES), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_worker(SCALES[args.worker], args.repeat)))
+        return 0
+
+    report = {
+        'createdAt': datetime.utcnow().isoformat(),
+        'version': _git_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'scales': {},
+    }
+    for name in args.scales:
+        report['scales'][name] = run_scale(name, args.repeat, not args.no_http)
+        print_scale(name, report['scales'][name])
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.utcnow().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,147 @@
+"""Synthetic option chains in historical_data.json layout.
+
+Underlying prices follow a geometric random walk and option mids are
+Black-Scholes prices on a volatility smile, so the chains behave like real
+ones in the backtest engine (implied volatilities solve back cleanly and
+delta-based strike selection finds every leg). The first expiration of
+each day is the day itself, for 0DTE strategies.
+
+    python -m benchmarks.synthetic OUT.json --symbols 2 --days 250 --strikes 40 --expirations 3
+"""
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+from typing import List, Optional
+
+import numpy as np
+
+from models.greeks import black_scholes_price, years_to_expiry
+
+SYMBOLS = ['SPY', 'QQQ', 'IWM', 'DIA', 'XLF', 'XLE', 'GLD', 'TLT']
+START_DATE = '2023-01-02'
+# Yearly volatility of the underlying, and at-the-money implied volatility
+REALIZED_VOL = 0.16
+BASE_IV = 0.15
+
+
+def symbol_names(count: int) -> List[str]:
+    """``count`` ticker names, made up once SYMBOLS runs out."""
+    return [SYMBOLS[i] if i < len(SYMBOLS) else f'SYM{i}' for i in range(count)]
+
+
+def trading_days(start: str, count: int) -> List[date]:
+    """The first ``count`` weekdays from ``start`` on."""
+    day = date.fromisoformat(start)
+    days = []
+    while len(days) < count:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def smile(strikes: np.ndarray, spot: float, years: np.ndarray) -> np.ndarray:
+    """Implied volatility with put skew, flattening for longer expirations."""
+    moneyness = np.log(strikes / spot) / np.sqrt(np.maximum(years, 1 / 365))
+    return BASE_IV * (1 - 0.8 * moneyness + 3.0 * moneyness ** 2).clip(0.6, 3.0)
+
+
+def generate_symbol(
+    symbol: str,
+    days: List[date],
+    strikes: int,
+    expirations: int,
+    rng: np.random.Generator,
+    spot: float
+) -> List[dict]:
+    """Day records for one symbol."""
+    steps = rng.normal(-0.5 * REALIZED_VOL ** 2 / 252, REALIZED_VOL / np.sqrt(252), len(days))
+    spots = spot * np.exp(np.cumsum(steps))
+    # Strikes step by about 0.25% of the starting price, on whole dollars
+    step = max(1.0, round(spot * 0.0025))
+    records = []
+    for i, day in enumerate(days):
+        underlying = round(float(spots[i]), 2)
+        center = round(underlying / step) * step
+        strike_row = center + step * (np.arange(strikes) - strikes // 2)
+        expiry_days = [day + timedelta(days=7 * k) for k in range(expirations)]
+
+        strike = np.tile(strike_row, 2 * expirations)
+        is_call = np.repeat(np.tile([False, True], expirations), strikes)
+        expiry = np.repeat(np.array(expiry_days, dtype='datetime64[D]'), 2 * strikes)
+        years = years_to_expiry(np.full(len(strike), np.datetime64(day, 'D')), expiry)
+        iv = smile(strike, underlying, years)
+        mid = black_scholes_price(underlying, strike, years, iv, is_call)
+        half = np.maximum(0.01, 0.01 * mid).round(2)
+        bid = np.maximum(mid - half, 0.0).round(2)
+        ask = (mid + half).round(2)
+        volume = rng.integers(0, 5000, len(strike))
+        open_interest = rng.integers(0, 20000, len(strike))
+
+        expiry_text = [d.isoformat() for d in expiry_days]
+        options = [
+            {
+                "strike": float(strike[j]),
+                "expiration": expiry_text[j // (2 * strikes)],
+                "optionType": "call" if is_call[j] else "put",
+                "bid": float(bid[j]),
+                "ask": float(ask[j]),
+                "mid": round(float(bid[j] + ask[j]) / 2, 3),
+                "volume": int(volume[j]),
+                "openInterest": int(open_interest[j]),
+                "impliedVolatility": round(float(iv[j]), 4)
+            }
+            for j in range(len(strike))
+        ]
+        records.append({
+            "date": day.isoformat(),
+            "symbol": symbol,
+            "underlyingPrice": underlying,
+            "options": options
+        })
+    return records
+
+
+def generate_chains(
+    symbols: int = 1,
+    days: int = 250,
+    strikes: int = 40,
+    expirations: int = 3,
+    seed: int = 0,
+    start: str = START_DATE,
+    names: Optional[List[str]] = None
+) -> List[dict]:
+    """Day records for ``symbols`` symbols x ``days`` trading days, each
+    with ``strikes`` strikes x ``expirations`` expirations of puts and calls.
+    """
+    rng = np.random.default_rng(seed)
+    calendar = trading_days(start, days)
+    records = []
+    for symbol in names or symbol_names(symbols):
+        spot = float(rng.uniform(100, 500))
+        records.extend(generate_symbol(symbol, calendar, strikes, expirations, rng, spot))
+    return records
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.synthetic', description=__doc__.splitlines()[0])
+    parser.add_argument('output', help='file to write (historical_data.json layout)')
+    parser.add_argument('--symbols', type=int, default=1)
+    parser.add_argument('--days', type=int, default=250)
+    parser.add_argument('--strikes', type=int, default=40)
+    parser.add_argument('--expirations', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--start', default=START_DATE)
+    args = parser.parse_args(argv)
+
+    records = generate_chains(args.symbols, args.days, args.strikes, args.expirations, args.seed, args.start)
+    with open(args.output, 'w') as f:
+        json.dump(records, f)
+    quotes = sum(len(r['options']) for r in records)
+    print(f"{len(records)} day records, {quotes} quotes written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,12 +1,27 @@
-from fastapi import FastAPI, HTTPException, status
+import json
+from typing import Optional
+
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from schemas import (
     CreateStrategyRequest,
     UpdateStrategyRequest,
-    BacktestRequest
+    BacktestRequest,
+    BatchBacktestRequest,
+    ExtendBacktestRequest,
+    MonteCarloRequest,
+    PortfolioBacktestRequest,
+    SweepRequest,
+    WalkForwardRequest
+)
+from services import (
+    strategy_service, optimization_service, job_service, batch_service, portfolio_service, walk_forward_service,
+    market_data_service, metrics
 )
-from services import strategy_service
+from services.json_response import json_response
 
 app = FastAPI()
 
@@ -20,15 +35,29 @@ app.add_middleware(
 )
 
 
+@app.on_event("shutdown")
+def shutdown():
+    job_service.shutdown()
+    strategy_service.strategies.close()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Stage timings and file I/O counters in Prometheus text format."""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # Strategy Endpoints
 @app.get("/strategies")
-async def get_all_strategies():
-    """Get all strategies."""
-    return strategy_service.get_all_strategies()
+@metrics.timed("GET /strategies")
+async def get_all_strategies(request: Request, profile: bool = False):
+    """Get all strategies (304 Not Modified while the list is unchanged)."""
+    return json_response(request, strategy_service.get_all_strategies(), profile=profile)
 
 
 @app.get("/strategies/{strategy_id}")
-async def get_strategy(strategy_id: str):
+@metrics.timed("GET /strategies/{strategy_id}")
+async def get_strategy(strategy_id: str, request: Request, profile: bool = False):
     """Get a strategy by ID."""
     strategy = strategy_service.get_strategy_by_id(strategy_id)
     
@@ -38,43 +67,177 @@ async def get_strategy(strategy_id: str):
             detail=f"Strategy with id {strategy_id} not found"
         )
     
-    return strategy
+    return json_response(request, strategy, profile=profile)
 
 
 @app.post("/strategies", status_code=status.HTTP_201_CREATED)
-async def create_strategy(request: CreateStrategyRequest):
+@metrics.timed("POST /strategies")
+async def create_strategy(request: CreateStrategyRequest, http_request: Request, profile: bool = False):
     """Create a new strategy."""
-    return strategy_service.create_strategy(request)
+    strategy = strategy_service.create_strategy(request)
+    return json_response(http_request, strategy, status.HTTP_201_CREATED, profile=profile)
 
 
 @app.put("/strategies/{strategy_id}")
-async def update_strategy(strategy_id: str, request: UpdateStrategyRequest):
+@metrics.timed("PUT /strategies/{strategy_id}")
+async def update_strategy(
+    strategy_id: str,
+    request: UpdateStrategyRequest,
+    http_request: Request,
+    profile: bool = False
+):
     """Update an existing strategy."""
-    return strategy_service.update_strategy(strategy_id, request)
+    strategy = strategy_service.update_strategy(strategy_id, request)
+    return json_response(http_request, strategy, profile=profile)
 
 
 @app.delete("/strategies/{strategy_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_strategy(strategy_id: str):
+@metrics.timed("DELETE /strategies/{strategy_id}")
+async def delete_strategy(strategy_id: str, profile: bool = False):
     """Delete a strategy."""
     strategy_service.delete_strategy(strategy_id)
-    return None
+    timing = metrics.current_profile() if profile else None
+    headers = {"Server-Timing": timing.server_timing()} if timing is not None else None
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
 
 
 # Backtest Endpoints
+@app.post("/backtest/sweep")
+@metrics.timed("POST /backtest/sweep")
+def run_sweep(request: SweepRequest, http_request: Request, profile: bool = False):
+    """Backtest a grid of Iron Condor leg deltas and return a ranked summary."""
+    return json_response(http_request, optimization_service.run_sweep(request), profile=profile)
+
+
+@app.post("/backtest/batch")
+@metrics.timed("POST /backtest/batch")
+def run_batch(request: BatchBacktestRequest, http_request: Request, profile: bool = False):
+    """Backtest many saved strategies (a list of ids or "all") with one data load per symbol."""
+    return json_response(http_request, batch_service.run_batch(request), profile=profile)
+
+
+@app.post("/backtest/portfolio")
+@metrics.timed("POST /backtest/portfolio")
+def run_portfolio(request: PortfolioBacktestRequest, http_request: Request, profile: bool = False):
+    """Backtest several strategies against one shared account and margin pool."""
+    return json_response(http_request, portfolio_service.run_portfolio(request), profile=profile)
+
+
+@app.post("/backtest/walkforward")
+@metrics.timed("POST /backtest/walkforward")
+def run_walk_forward(request: WalkForwardRequest, http_request: Request, profile: bool = False):
+    """Choose Iron Condor leg deltas on rolling in-sample windows and stitch their out-of-sample results."""
+    return json_response(http_request, walk_forward_service.run_walk_forward(request), profile=profile)
+
+
 @app.post("/backtest/{strategy_id}")
-async def run_backtest(strategy_id: str, request: BacktestRequest):
-    """Run a backtest for a strategy."""
-    return strategy_service.run_backtest(
+@metrics.timed("POST /backtest/{strategy_id}")
+async def run_backtest(
+    strategy_id: str,
+    request: BacktestRequest,
+    http_request: Request,
+    summary: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    profile: bool = False
+):
+    """Run a backtest for a strategy and wait for the result.
+    
+    ``summary=true`` leaves out the trades; ``offset`` and ``limit`` return
+    a page of them. ``profile=1`` adds a per-stage timing breakdown.
+    """
+    result = await job_service.run(
+        strategy_id=strategy_id,
+        start_date=request.startDate,
+        end_date=request.endDate,
+        initial_capital=request.initialCapital,
+        entry_time=request.entryTime,
+        exit_time=request.exitTime
+    )
+    payload = strategy_service.backtest_payload(result, summary, offset, limit)
+    return json_response(http_request, payload, profile=profile)
+
+
+@app.get("/backtest/{strategy_id}/stream")
+def stream_backtest(
+    strategy_id: str,
+    startDate: str,
+    endDate: str,
+    initialCapital: float,
+    entryTime: Optional[str] = None,
+    exitTime: Optional[str] = None
+):
+    """Stream a backtest as Server-Sent Events.
+    
+    Sends a "day" event per trading day with its trades, running capital
+    and progress, then a "summary" event with the final metrics.
+    """
+    events = strategy_service.stream_backtest(
+        strategy_id=strategy_id,
+        start_date=startDate,
+        end_date=endDate,
+        initial_capital=initialCapital,
+        entry_time=entryTime,
+        exit_time=exitTime
+    )
+    return StreamingResponse(
+        (f"event: {event}\ndata: {json.dumps(payload)}\n\n" for event, payload in events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@app.post("/backtest/jobs/{strategy_id}", status_code=status.HTTP_202_ACCEPTED)
+@metrics.timed("POST /backtest/jobs/{strategy_id}")
+async def submit_backtest(strategy_id: str, request: BacktestRequest):
+    """Queue a backtest; poll /backtest/results/{backtestId} for its status."""
+    return await run_in_threadpool(
+        job_service.submit,
         strategy_id=strategy_id,
         start_date=request.startDate,
         end_date=request.endDate,
-        initial_capital=request.initialCapital
+        initial_capital=request.initialCapital,
+        entry_time=request.entryTime,
+        exit_time=request.exitTime
     )
 
 
+@app.get("/backtest/jobs")
+async def get_backtest_jobs():
+    """List queued, running and recently finished backtest jobs."""
+    return job_service.list_jobs()
+
+
+@app.delete("/backtest/jobs/{backtest_id}")
+async def cancel_backtest(backtest_id: str):
+    """Cancel a queued or running backtest job."""
+    return job_service.cancel(backtest_id)
+
+
 @app.get("/backtest/results/{backtest_id}")
-async def get_backtest_results(backtest_id: str):
-    """Get backtest results by ID."""
+@metrics.timed("GET /backtest/results/{backtest_id}")
+async def get_backtest_results(
+    backtest_id: str,
+    request: Request,
+    summary: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    profile: bool = False
+):
+    """Get backtest results by ID.
+    
+    While the backtest is still queued or running, returns its job status
+    and progress with 202 Accepted. ``summary=true`` leaves out the trades;
+    ``offset`` and ``limit`` return a page of them.
+    """
+    job = job_service.get_job(backtest_id)
+    if job and job['status'] != job_service.COMPLETED:
+        pending = job['status'] in (job_service.QUEUED, job_service.RUNNING)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED if pending else status.HTTP_200_OK,
+            content=job
+        )
+    
     backtest = strategy_service.get_backtest_by_id(backtest_id)
     
     if not backtest:
@@ -83,7 +246,120 @@ async def get_backtest_results(backtest_id: str):
             detail=f"Backtest with id {backtest_id} not found"
         )
     
-    return backtest
+    payload = strategy_service.backtest_payload(backtest, summary, offset, limit)
+    return json_response(request, payload, profile=profile)
+
+
+@app.get("/backtest/results/{backtest_id}/trades")
+@metrics.timed("GET /backtest/results/{backtest_id}/trades")
+async def get_backtest_trades(
+    backtest_id: str,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    optionType: Optional[str] = None,
+    action: Optional[str] = None,
+    sortBy: str = 'seq',
+    order: str = 'asc',
+    profile: bool = False
+):
+    """Get a page of a stored backtest's trades, filtered and sorted on the server.
+    
+    Pass the returned ``nextCursor`` as ``cursor`` for the next page. While
+    the backtest is still queued or running, returns its job status with
+    202 Accepted.
+    """
+    job = job_service.get_job(backtest_id)
+    if job and job['status'] in (job_service.QUEUED, job_service.RUNNING):
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job)
+    
+    return json_response(request, strategy_service.get_backtest_trades(
+        backtest_id,
+        cursor=cursor,
+        limit=limit,
+        start_date=startDate,
+        end_date=endDate,
+        option_type=optionType,
+        action=action,
+        sort_by=sortBy,
+        order=order
+    ), profile=profile)
+
+
+@app.post("/backtest/results/{backtest_id}/montecarlo")
+@metrics.timed("POST /backtest/results/{backtest_id}/montecarlo")
+def monte_carlo(backtest_id: str, request: MonteCarloRequest, http_request: Request, profile: bool = False):
+    """Bootstrap a stored backtest's daily P&L and return the distributions of its metrics.
+    
+    While the backtest is still queued or running, returns its job status
+    with 202 Accepted.
+    """
+    job = job_service.get_job(backtest_id)
+    if job and job['status'] in (job_service.QUEUED, job_service.RUNNING):
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job)
+    
+    return json_response(http_request, strategy_service.monte_carlo(
+        backtest_id,
+        paths=request.paths,
+        block_size=request.blockSize,
+        confidence=request.confidence,
+        bins=request.bins,
+        seed=request.seed
+    ), profile=profile)
+
+
+@app.post("/backtest/results/{backtest_id}/extend")
+@metrics.timed("POST /backtest/results/{backtest_id}/extend")
+def extend_backtest(
+    backtest_id: str,
+    request: ExtendBacktestRequest,
+    http_request: Request,
+    summary: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    profile: bool = False
+):
+    """Extend a stored 0DTE backtest to a later end date, simulating only the new days."""
+    result = strategy_service.extend_backtest(backtest_id, request.endDate)
+    payload = strategy_service.backtest_payload(result, summary, offset, limit)
+    return json_response(http_request, payload, profile=profile)
+
+
+# Market Data Endpoints
+@app.get("/market-data/historical/{symbol}")
+@metrics.timed("GET /market-data/historical/{symbol}")
+def get_price_history(
+    symbol: str,
+    request: Request,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    fields: Optional[str] = None,
+    points: Optional[int] = None,
+    method: str = 'lttb',
+    profile: bool = False
+):
+    """Underlying prices within a date range, optionally downsampled to ``points`` (lttb or ohlc)."""
+    history = market_data_service.get_price_history(symbol, startDate, endDate, fields, points, method)
+    return json_response(request, history, profile=profile)
+
+
+@app.get("/market-data/options/{symbol}")
+@metrics.timed("GET /market-data/options/{symbol}")
+def get_option_chain(
+    symbol: str,
+    request: Request,
+    date: Optional[str] = None,
+    time: Optional[str] = None,
+    expiration: Optional[str] = None,
+    optionType: Optional[str] = None,
+    fields: Optional[str] = None,
+    profile: bool = False
+):
+    """Option quotes of one snapshot (by default the latest stored one)."""
+    chain = market_data_service.get_option_chain(symbol, date, time, expiration, optionType, fields)
+    return json_response(request, chain, profile=profile)
 
 
 @app.get("/")
@@ -0,0 +1,498 @@
+"""Vectorized backtest engine over columnar option chains.
+
+Instead of walking the backtest day by day, every leg of every entry day is
+resolved in one array pass: candidate quotes are grouped into segments (one
+per day, option type and, for entries, expiration), sorted by delta (entries)
+or strike (exits), and each day's target is located with a single
+``searchsorted`` over the concatenated segments.
+
+Daily chains (one snapshot per date) go through ``run_0dte``, which exits on
+the next trading day. Intraday chains go through ``run_intraday``, which
+enters and exits at given times of the same day.
+"""
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .greeks import chain_greeks
+from .option_chain import ChainFrame, MINUTES_PER_DAY, OPTION_TYPE_CODES, format_minute
+
+
+# Exit quotes are matched to the entry strike within this distance
+EXIT_STRIKE_TOLERANCE = 2.0
+# Exit price used when no quote can be found at all
+DEFAULT_EXIT_PRICE = 0.05
+CONTRACT_MULTIPLIER = 100
+# Rise above the highest strike at which an uncovered short call's loss is
+# measured for margin (its loss is otherwise unbounded)
+NAKED_CALL_MOVE = 0.2
+
+
+class LegSpec:
+    """One option leg of a multi-leg position."""
+
+    def __init__(
+        self,
+        name: str,
+        option_type: str,
+        action: str,
+        fallback_price: float,
+        fallback_strike_factor: float
+    ):
+        self.name = name
+        self.option_type = option_type
+        self.action = action  # 'buy' | 'sell'
+        self.fallback_price = fallback_price
+        self.fallback_strike_factor = fallback_strike_factor
+
+    @property
+    def sign(self) -> int:
+        """Cash-flow sign of the opening trade (+1 for credit, -1 for debit)."""
+        return -1 if self.action == 'buy' else 1
+
+
+class StrikeGrid:
+    """Candidate quotes sorted by (segment, strike) for batched nearest lookups.
+
+    ``segments`` and ``strikes`` describe candidate rows in chain order; the
+    row number breaks ties, like a first-match linear scan. Any other sortable
+    quote value (e.g. delta) can stand in for the strike. A grid depends
+    only on the chain, so it can be reused for any number of queries.
+    """
+
+    def __init__(self, segments: np.ndarray, strikes: np.ndarray):
+        rows = np.arange(len(segments))
+        order = np.lexsort((rows, strikes, segments))
+        seg, strike, row = segments[order], strikes[order], rows[order]
+
+        # Keep the first quote (in chain order) of each (segment, strike)
+        first = np.ones(len(seg), dtype=bool)
+        first[1:] = (seg[1:] != seg[:-1]) | (strike[1:] != strike[:-1])
+        self.segments, self.strikes, self.rows = seg[first], strike[first], row[first]
+
+        # Composite key orders rows by segment, then strike, in one sorted array
+        if len(self.strikes):
+            self.lo, self.hi = float(self.strikes.min()), float(self.strikes.max())
+        else:
+            self.lo = self.hi = 0.0
+        self.span = (self.hi - self.lo) + 1.0
+        self.keys = self.segments * self.span + (self.strikes - self.lo)
+
+    def nearest(
+        self,
+        query_segments: np.ndarray,
+        query_strikes: np.ndarray,
+        tolerance: Optional[float] = None
+    ) -> np.ndarray:
+        """Find, for each query, the row of the nearest strike in its segment.
+
+        Returns row numbers, or -1 where the segment is empty or nothing is
+        within ``tolerance``.
+        """
+        result = np.full(len(query_segments), -1, dtype='int64')
+        n = len(self.keys)
+        if n == 0 or len(query_segments) == 0:
+            return result
+
+        clamped = np.clip(query_strikes, self.lo, self.hi)
+        pos = np.searchsorted(self.keys, query_segments * self.span + (clamped - self.lo), side='left')
+        left = np.clip(pos - 1, 0, n - 1)
+        right = np.clip(pos, 0, n - 1)
+
+        left_ok = (pos > 0) & (self.segments[left] == query_segments)
+        right_ok = (pos < n) & (self.segments[right] == query_segments)
+        left_diff = np.abs(self.strikes[left] - query_strikes)
+        right_diff = np.abs(self.strikes[right] - query_strikes)
+        left_row, right_row = self.rows[left], self.rows[right]
+        if tolerance is not None:
+            left_ok &= left_diff <= tolerance
+            right_ok &= right_diff <= tolerance
+
+        take_left = left_ok & (~right_ok | (left_diff < right_diff) |
+                               ((left_diff == right_diff) & (left_row < right_row)))
+        take_right = right_ok & ~take_left
+        result[take_left] = left_row[take_left]
+        result[take_right] = right_row[take_right]
+        return result
+
+
+class LegResults:
+    """Per-day, per-leg outcome of a vectorized run.
+
+    All 2-D arrays are shaped (entry days, legs). ``entry_days`` and
+    ``exit_days`` index ``dates`` (and ``times``, for intraday runs).
+    """
+
+    def __init__(
+        self,
+        dates: List[str],
+        entry_days: np.ndarray,
+        exit_days: np.ndarray,
+        legs: List[LegSpec],
+        entry_strike: np.ndarray,
+        entry_price: np.ndarray,
+        exit_price: np.ndarray,
+        quantity: int,
+        times: Optional[List[str]] = None
+    ):
+        self.dates = dates
+        self.times = times
+        self.entry_days = entry_days
+        self.exit_days = exit_days
+        self.legs = legs
+        self.entry_strike = entry_strike
+        self.entry_price = entry_price
+        self.exit_price = exit_price
+        self.quantity = quantity
+
+        signs = np.array([leg.sign for leg in legs], dtype='float64')
+        # Same operation order as the per-trade loop: price * quantity * 100
+        self.entry_pnl = (signs * entry_price) * quantity * CONTRACT_MULTIPLIER
+        self.exit_pnl = (-signs * exit_price) * quantity * CONTRACT_MULTIPLIER
+
+    @classmethod
+    def concat(cls, parts: List['LegResults']) -> 'LegResults':
+        """Join results of consecutive chunks of the same run."""
+        if len(parts) == 1:
+            return parts[0]
+        first = parts[0]
+
+        # Chunks of one frame share its dates; chunks of separate frames
+        # (intraday runs) bring their own, so their indices are rebased
+        dates, times = first.dates, first.times
+        entry_days = [p.entry_days for p in parts]
+        exit_days = [p.exit_days for p in parts]
+        if any(p.dates is not first.dates for p in parts):
+            dates, times = [], [] if first.times is not None else None
+            for i, p in enumerate(parts):
+                entry_days[i] = entry_days[i] + len(dates)
+                exit_days[i] = exit_days[i] + len(dates)
+                dates.extend(p.dates)
+                if times is not None:
+                    times.extend(p.times)
+
+        return cls(
+            dates=dates,
+            entry_days=np.concatenate(entry_days),
+            exit_days=np.concatenate(exit_days),
+            legs=first.legs,
+            entry_strike=np.concatenate([p.entry_strike for p in parts]),
+            entry_price=np.concatenate([p.entry_price for p in parts]),
+            exit_price=np.concatenate([p.exit_price for p in parts]),
+            quantity=first.quantity,
+            times=times
+        )
+
+    def cash_flows(self) -> np.ndarray:
+        """Capital changes in booking order: each day's net entry, then its exits."""
+        net_entry = np.zeros(len(self.entry_days))
+        for j in range(len(self.legs)):
+            net_entry = net_entry + self.entry_pnl[:, j]
+        return np.column_stack([net_entry, self.exit_pnl]).ravel()
+
+    def equity(self, initial_capital: float) -> np.ndarray:
+        """Capital after each entry day's round trip (entry and exit booked)."""
+        # np.cumsum accumulates sequentially, matching a running Python total
+        flows = np.concatenate([[initial_capital], self.cash_flows()])
+        return np.cumsum(flows)[len(self.legs) + 1::len(self.legs) + 1]
+
+    def round_trips(self) -> np.ndarray:
+        """``cash_flows`` with one row per entry day: net entry, then each leg's exit."""
+        return self.cash_flows().reshape(len(self.entry_days), len(self.legs) + 1)
+
+    def margin(self) -> np.ndarray:
+        """Margin of each entry day's position: its largest loss at expiration.
+
+        The loss is the legs' intrinsic value at the worst underlying price
+        (zero, a strike, or NAKED_CALL_MOVE above the highest strike) net of
+        the entry credit, as brokers reserve for defined-risk spreads.
+        """
+        days = len(self.entry_days)
+        if days == 0 or not self.legs:
+            return np.zeros(days)
+        strikes = self.entry_strike
+        prices = np.column_stack([
+            np.zeros(days), strikes, strikes.max(axis=1) * (1 + NAKED_CALL_MOVE)
+        ])[:, :, None]
+        is_call = np.array([leg.option_type == 'call' for leg in self.legs])
+        signs = np.array([leg.sign for leg in self.legs], dtype='float64')
+        intrinsic = np.where(is_call, prices - strikes[:, None, :], strikes[:, None, :] - prices).clip(0)
+        # Short legs (sign +1) owe their intrinsic value, long legs receive it
+        owed = (intrinsic * signs).sum(axis=2).max(axis=1) * self.quantity * CONTRACT_MULTIPLIER
+        return np.maximum(owed - self.entry_pnl.sum(axis=1), 0.0)
+
+    def entry_dates(self) -> List[str]:
+        """Date of each entry day, aligned with ``equity``."""
+        return [self.dates[day] for day in self.entry_days.tolist()]
+
+    def final_capital(self, initial_capital: float) -> float:
+        if len(self.entry_days) == 0:
+            return initial_capital
+        return float(self.equity(initial_capital)[-1])
+
+    def _stamp(self, day: int) -> dict:
+        if self.times is None:
+            return {"date": self.dates[day]}
+        return {"date": self.dates[day], "time": self.times[day]}
+
+    def iter_day_trades(self, symbol: str, expiration: str) -> Iterator[Tuple[str, List[dict]]]:
+        """Yield (entry date, trade dicts) per entry day: entry legs, then exit legs.
+
+        Trades of intraday runs also carry the ``time`` they were made.
+        """
+        entry_strike = self.entry_strike.tolist()
+        entry_price = self.entry_price.tolist()
+        exit_price = self.exit_price.tolist()
+        entry_pnl = self.entry_pnl.tolist()
+        exit_pnl = self.exit_pnl.tolist()
+
+        for i, (entry_day, exit_day) in enumerate(zip(self.entry_days.tolist(), self.exit_days.tolist())):
+            entry_stamp, exit_stamp = self._stamp(entry_day), self._stamp(exit_day)
+            trades = []
+            options = []
+            for j, leg in enumerate(self.legs):
+                option = {
+                    "symbol": symbol,
+                    "strike": entry_strike[i][j],
+                    "expiration": expiration,
+                    "optionType": leg.option_type,
+                    "premium": entry_price[i][j],
+                    "quantity": self.quantity
+                }
+                options.append(option)
+                trades.append({
+                    **entry_stamp,
+                    "action": leg.action,
+                    "option": option,
+                    "price": entry_price[i][j],
+                    "pnl": entry_pnl[i][j]
+                })
+            for j, leg in enumerate(self.legs):
+                trades.append({
+                    **exit_stamp,
+                    "action": "sell" if leg.action == "buy" else "buy",
+                    "option": options[j].copy(),
+                    "price": exit_price[i][j],
+                    "pnl": exit_pnl[i][j]
+                })
+            yield entry_stamp["date"], trades
+
+
+def _take(column: np.ndarray, candidates: np.ndarray, found: np.ndarray) -> np.ndarray:
+    """Gather ``column`` at candidate rows found by StrikeGrid (NaN for misses)."""
+    values = np.full(len(found), np.nan)
+    hit = found >= 0
+    values[hit] = column[candidates[found[hit]]]
+    return values
+
+
+def _strike_grid(frame: ChainFrame, day_of_row: np.ndarray, option_type: int, same_day: bool = False) -> tuple:
+    """Return (candidate rows, StrikeGrid) for one option type, cached on the frame.
+
+    With ``same_day`` only quotes expiring on their snapshot's date are candidates.
+    """
+    key = ('strike_grid', option_type, same_day)
+    if key not in frame.cache:
+        quotes = frame.quotes
+        mask = quotes['optionType'] == option_type
+        if same_day:
+            mask &= quotes['expiration'] == frame.dates[day_of_row]
+        candidates = np.flatnonzero(mask)
+        frame.cache[key] = (candidates, StrikeGrid(day_of_row[candidates], quotes['strike'][candidates]))
+    return frame.cache[key]
+
+
+def _delta_grid(frame: ChainFrame, day_of_row: np.ndarray, option_type: int) -> tuple:
+    """Return (candidate rows, grid over delta) of same-day-expiring quotes, cached on the frame."""
+    key = ('delta_grid', option_type)
+    if key not in frame.cache:
+        quotes = frame.quotes
+        deltas = chain_greeks(frame)['delta']
+        candidates = np.flatnonzero(
+            (quotes['optionType'] == option_type) &
+            (quotes['expiration'] == frame.dates[day_of_row]) &
+            ~np.isnan(deltas)
+        )
+        frame.cache[key] = (candidates, StrikeGrid(day_of_row[candidates], deltas[candidates]))
+    return frame.cache[key]
+
+
+def _fallback_exit_price(
+    frame: ChainFrame,
+    day_of_row: np.ndarray,
+    option_type: int,
+    strike: float
+) -> float:
+    """Price from the latest day quoting a strike within tolerance.
+
+    Mirrors the reference loop: walk days from the latest, take the first
+    matching quote in chain order, and move on if it has no mid price.
+    """
+    quotes = frame.quotes
+    rows = np.flatnonzero(
+        (quotes['optionType'] == option_type) &
+        (np.abs(quotes['strike'] - strike) <= EXIT_STRIKE_TOLERANCE)
+    )
+    if len(rows):
+        # Rows are in day order; the first row of each day is the first match
+        days = day_of_row[rows]
+        first = np.ones(len(rows), dtype=bool)
+        first[1:] = days[1:] != days[:-1]
+        mids = quotes['mid'][rows[first]]
+        priced = np.flatnonzero(~np.isnan(mids))
+        if len(priced):
+            return float(mids[priced[-1]])
+    return DEFAULT_EXIT_PRICE
+
+
+def run_0dte(
+    frame: ChainFrame,
+    legs: List[LegSpec],
+    target_deltas: np.ndarray,
+    quantity: int,
+    day_range: Optional[Tuple[int, int]] = None
+) -> LegResults:
+    """Enter every leg on every day and exit on the next trading day.
+
+    ``target_deltas`` is shaped (days, legs) and holds the delta each leg
+    aims for. Entries take the same-day-expiring quote whose Black-Scholes
+    delta (from its implied volatility) is nearest; exits use the nearest
+    strike of any expiration on the next day (the same day for the last).
+    Days with no underlying price are skipped as entries.
+
+    ``day_range`` restricts entries to days ``lo:hi`` so a long run can be
+    processed in chunks; exits may still look at any day of the frame.
+    """
+    quotes = frame.quotes
+    num_days = len(frame)
+    dates = frame.date_strings()
+    day_of_row = frame.day_of_row()
+
+    lo, hi = day_range if day_range is not None else (0, num_days)
+    entry_days = np.flatnonzero(frame.underlying[lo:hi] != 0) + lo
+    exit_days = np.minimum(entry_days + 1, num_days - 1)
+    targets = target_deltas[entry_days]
+    underlying = frame.underlying[entry_days]
+
+    num_legs = len(legs)
+    entry_strike = np.empty((len(entry_days), num_legs))
+    entry_price = np.empty((len(entry_days), num_legs))
+    exit_price = np.empty((len(entry_days), num_legs))
+
+    for j, leg in enumerate(legs):
+        type_code = OPTION_TYPE_CODES[leg.option_type]
+
+        # Entry: same-day-expiring quote with the delta nearest the target
+        candidates, grid = _delta_grid(frame, day_of_row, type_code)
+        found = grid.nearest(entry_days, targets[:, j])
+        price = _take(quotes['mid'], candidates, found)
+        missing = np.isnan(price)
+        entry_price[:, j] = np.where(missing, leg.fallback_price, price)
+        entry_strike[:, j] = np.where(missing, underlying * leg.fallback_strike_factor,
+                                      _take(quotes['strike'], candidates, found))
+
+        # Exit: nearest strike of any expiration on the exit day
+        candidates, grid = _strike_grid(frame, day_of_row, type_code)
+        found = grid.nearest(exit_days, entry_strike[:, j], tolerance=EXIT_STRIKE_TOLERANCE)
+        price = _take(quotes['mid'], candidates, found)
+        for i in np.flatnonzero(np.isnan(price)):
+            price[i] = _fallback_exit_price(frame, day_of_row, type_code, entry_strike[i, j])
+        exit_price[:, j] = price
+
+    return LegResults(
+        dates=dates,
+        entry_days=entry_days,
+        exit_days=exit_days,
+        legs=legs,
+        entry_strike=entry_strike,
+        entry_price=entry_price,
+        exit_price=exit_price,
+        quantity=quantity
+    )
+
+
+def run_intraday(
+    frame: ChainFrame,
+    legs: List[LegSpec],
+    target_deltas: np.ndarray,
+    quantity: int,
+    entry_minute: int,
+    exit_minute: int
+) -> LegResults:
+    """Enter every leg at ``entry_minute`` and exit at ``exit_minute`` the same day.
+
+    ``frame`` holds timestamped intraday snapshots and ``target_deltas`` is
+    shaped (snapshots, legs). Each date enters at its first snapshot at or
+    after the entry time and exits at its first snapshot at or after the
+    exit time (its last snapshot if none is that late). Entries take the
+    same-day-expiring quote whose delta is nearest the target; exits take
+    the nearest same-day-expiring strike at the exit snapshot, or the
+    option's intrinsic value there when it is not quoted. Dates with no
+    snapshot at or after the entry time, or no underlying price at entry,
+    are skipped.
+
+    The result only refers to the entry and exit snapshots, so it stays
+    valid (and small) after ``frame`` is released.
+    """
+    quotes = frame.quotes
+    day_of_row = frame.day_of_row()
+    starts = frame.day_starts()
+    ends = np.append(starts[1:], len(frame))
+
+    # Snapshots are ordered by (date, time), so one sorted key locates the
+    # entry and exit snapshot of every date
+    date_index = np.repeat(np.arange(len(starts)), ends - starts)
+    keys = date_index * MINUTES_PER_DAY + frame.times
+    base = np.arange(len(starts)) * MINUTES_PER_DAY
+    entry_at = np.searchsorted(keys, base + entry_minute, side='left')
+    exit_at = np.minimum(np.searchsorted(keys, base + exit_minute, side='left'), ends - 1)
+    traded = entry_at < ends
+    entry_at, exit_at = entry_at[traded], exit_at[traded]
+    traded = frame.underlying[entry_at] != 0
+    entry_snapshots, exit_snapshots = entry_at[traded], exit_at[traded]
+
+    targets = target_deltas[entry_snapshots]
+    underlying = frame.underlying[entry_snapshots]
+    exit_underlying = frame.underlying[exit_snapshots]
+    exit_underlying = np.where(exit_underlying != 0, exit_underlying, underlying)
+
+    num_legs = len(legs)
+    entry_strike = np.empty((len(entry_snapshots), num_legs))
+    entry_price = np.empty((len(entry_snapshots), num_legs))
+    exit_price = np.empty((len(entry_snapshots), num_legs))
+
+    for j, leg in enumerate(legs):
+        type_code = OPTION_TYPE_CODES[leg.option_type]
+
+        # Entry: same-day-expiring quote with the delta nearest the target
+        candidates, grid = _delta_grid(frame, day_of_row, type_code)
+        found = grid.nearest(entry_snapshots, targets[:, j])
+        price = _take(quotes['mid'], candidates, found)
+        missing = np.isnan(price)
+        entry_price[:, j] = np.where(missing, leg.fallback_price, price)
+        entry_strike[:, j] = np.where(missing, underlying * leg.fallback_strike_factor,
+                                      _take(quotes['strike'], candidates, found))
+
+        # Exit: the same contract at the exit snapshot, else intrinsic value
+        candidates, grid = _strike_grid(frame, day_of_row, type_code, same_day=True)
+        found = grid.nearest(exit_snapshots, entry_strike[:, j], tolerance=EXIT_STRIKE_TOLERANCE)
+        price = _take(quotes['mid'], candidates, found)
+        if leg.option_type == 'call':
+            intrinsic = np.maximum(exit_underlying - entry_strike[:, j], 0.0)
+        else:
+            intrinsic = np.maximum(entry_strike[:, j] - exit_underlying, 0.0)
+        exit_price[:, j] = np.where(np.isnan(price), intrinsic, price)
+
+    snapshots = np.concatenate([entry_snapshots, exit_snapshots])
+    count = len(entry_snapshots)
+    return LegResults(
+        dates=np.datetime_as_string(frame.dates[snapshots], unit='D').tolist(),
+        entry_days=np.arange(count),
+        exit_days=np.arange(count, 2 * count),
+        legs=legs,
+        entry_strike=entry_strike,
+        entry_price=entry_price,
+        exit_price=exit_price,
+        quantity=quantity,
+        times=[format_minute(m) for m in frame.times[snapshots].tolist()]
+    )
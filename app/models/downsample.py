@@ -0,0 +1,65 @@
+"""Downsampling of long price series for charts.
+
+``lttb`` picks the points that best keep a line's visual shape
+(Largest-Triangle-Three-Buckets); ``ohlc`` summarizes runs of consecutive
+points by their open, high, low and close. Both return a few thousand
+points whatever the length of the series.
+"""
+from typing import Dict
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Indices of the ``points`` points of (x, y) kept by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. The others are split into
+    ``points - 2`` buckets of equal count, and from each bucket the point
+    forming the largest triangle with the previously kept point and the
+    average of the next bucket is kept.
+    """
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    # Bucket i holds points edges[i]:edges[i + 1]
+    edges = (np.arange(points - 1) * ((n - 2) / (points - 2))).astype('int64') + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    # Average of every bucket, followed by the last point for the final bucket
+    next_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / counts, x[-1])[1:]
+    next_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / counts, y[-1])[1:]
+
+    kept = np.empty(points, dtype='int64')
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[previous], y[previous]
+        # Twice the triangle areas; the factor doesn't change the argmax
+        areas = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        previous = lo + int(np.argmax(areas))
+        kept[i + 1] = previous
+    return kept
+
+
+def ohlc(values: np.ndarray, points: int) -> Dict[str, np.ndarray]:
+    """Open, high, low and close of at most ``points`` runs of equally many values.
+
+    ``start`` and ``count`` give each run's first index and length.
+    """
+    values = np.asarray(values, dtype='float64')
+    n = len(values)
+    size = max(1, -(-n // max(points, 1)))
+    starts = np.arange(0, n, size)
+    ends = np.append(starts[1:], n)
+    return {
+        "start": starts,
+        "count": ends - starts,
+        "open": values[starts],
+        "high": np.maximum.reduceat(values, starts) if n else values,
+        "low": np.minimum.reduceat(values, starts) if n else values,
+        "close": values[ends - 1]
+    }
@@ -0,0 +1,317 @@
+"""Vectorized Black-Scholes pricing, implied volatility and greeks.
+
+Every function works elementwise on numpy arrays, so a whole option chain
+(or many days of chains) is priced in one pass.
+
+``chain_greeks`` is how strategies get greeks for a frame. Frames loaded
+from the chain store carry greeks precomputed at import time (a sidecar of
+``.npy`` columns next to each partition), so nothing is solved during a
+backtest. For other frames it solves implied volatility from each quote's
+``mid`` and keeps the result per (symbol, date, time, expiration) chain,
+tagged with a digest of the chain's quotes, in an LRU cache bounded by
+OPTIONBOT_GREEKS_CACHE_MB.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+
+from .option_chain import ChainFrame, OPTION_TYPE_CODES
+
+
+RISK_FREE_RATE = 0.04
+# Daily snapshots carry a date but no time, so options expiring that day are
+# priced as if half a session (3.25 of 6.5 hours) were left
+MIN_YEARS_TO_EXPIRY = 3.25 / 24 / 365
+# Intraday snapshots are timed; options expire at the close. The floor
+# keeps quotes taken at (or after) the close finite.
+EXPIRY_MINUTE = 16 * 60
+MIN_MINUTES_TO_EXPIRY = 1.0
+MINUTES_PER_YEAR = 365 * 24 * 60
+MIN_VOLATILITY = 1e-4
+MAX_VOLATILITY = 5.0
+IV_TOLERANCE = 1e-8
+IV_MAX_ITERATIONS = 50
+
+# Quote columns that determine a chain's greeks (besides the underlying price)
+DIGEST_COLUMNS = ('strike', 'optionType', 'mid', 'impliedVolatility')
+
+# Memory budget of the in-process greeks cache
+CACHE_BYTES = int(float(os.environ.get("OPTIONBOT_GREEKS_CACHE_MB", "256")) * 1024 * 1024)
+
+GREEK_COLUMNS = ('iv', 'delta', 'gamma', 'theta', 'vega')
+# Greeks are stored (and cached) in single precision; every consumer sees
+# the same rounded values whether they were precomputed or solved on demand
+GREEKS_DTYPE = 'float32'
+
+_SQRT_2 = np.sqrt(2.0)
+_SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    # Chebyshev fit from Numerical Recipes; fractional error below 1.2e-7
+    # everywhere, so far-out-of-the-money tails keep their precision
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277))))))))
+    result = t * np.exp(poly)
+    return np.where(x >= 0, result, 2.0 - result)
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal cumulative distribution."""
+    return 0.5 * _erfc(-np.asarray(x, dtype='float64') / _SQRT_2)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal density."""
+    x = np.asarray(x, dtype='float64')
+    return np.exp(-0.5 * x * x) / _SQRT_2PI
+
+
+def years_to_expiry(
+    dates: np.ndarray,
+    expirations: np.ndarray,
+    minutes: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Year fractions from quote dates to expirations (datetime64[D] arrays).
+
+    With ``minutes`` (quote time of day, for intraday snapshots) the
+    fraction runs to EXPIRY_MINUTE on the expiration date; without it,
+    same-day expirations get MIN_YEARS_TO_EXPIRY. Missing expirations are NaN.
+    """
+    days = (expirations - dates).astype('float64')
+    days[np.isnat(expirations)] = np.nan
+    if minutes is None:
+        return np.maximum(days / 365.0, MIN_YEARS_TO_EXPIRY)
+    left = days * (24 * 60) + (EXPIRY_MINUTE - np.asarray(minutes, dtype='float64'))
+    return np.maximum(left, MIN_MINUTES_TO_EXPIRY) / MINUTES_PER_YEAR
+
+
+def _d1_d2(spot, strike, years, volatility, rate):
+    vol_sqrt_t = volatility * np.sqrt(years)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * volatility * volatility) * years) / vol_sqrt_t
+    return d1, d1 - vol_sqrt_t
+
+
+def black_scholes_price(spot, strike, years, volatility, is_call, rate: float = RISK_FREE_RATE) -> np.ndarray:
+    """European option price."""
+    d1, d2 = _d1_d2(spot, strike, years, volatility, rate)
+    discount = strike * np.exp(-rate * years)
+    call = spot * norm_cdf(d1) - discount * norm_cdf(d2)
+    put = discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def implied_volatility(price, spot, strike, years, is_call, rate: float = RISK_FREE_RATE) -> np.ndarray:
+    """Solve Black-Scholes implied volatility for every quote at once.
+
+    Safeguarded Newton: each step is kept inside a shrinking bracket and
+    falls back to bisection when it would leave it. In-the-money quotes are
+    converted to their out-of-the-money counterpart by put-call parity
+    first, since the time value left on top of intrinsic value is what is
+    well conditioned. Prices outside the no-arbitrage bounds (or with
+    missing inputs) give NaN.
+    """
+    price, spot, strike, years = np.broadcast_arrays(*(
+        np.asarray(a, dtype='float64') for a in (price, spot, strike, years)
+    ))
+    is_call = np.broadcast_to(is_call, price.shape)
+
+    discount = strike * np.exp(-rate * years)
+    with np.errstate(invalid='ignore'):
+        # Parity: call - put = spot - discounted strike
+        forward_gap = spot - discount
+        in_the_money = np.where(is_call, forward_gap > 0, forward_gap < 0)
+        price = np.where(in_the_money, price - np.abs(forward_gap), price)
+        is_call = is_call ^ in_the_money
+        upper = np.where(is_call, spot, discount)
+        valid = (price > 0) & (price < upper) & (spot > 0) & (strike > 0) & (years > 0)
+
+    iv = np.full(price.shape, np.nan)
+    if not valid.any():
+        return iv
+
+    p, s, k, t, call = price[valid], spot[valid], strike[valid], years[valid], is_call[valid]
+    lo = np.full(p.shape, MIN_VOLATILITY)
+    hi = np.full(p.shape, MAX_VOLATILITY)
+    # Brenner-Subrahmanyam starting point
+    sigma = np.clip(np.sqrt(2.0 * np.pi / t) * p / s, MIN_VOLATILITY, MAX_VOLATILITY)
+
+    # Converged quotes are frozen, so each result is independent of which
+    # other quotes were solved in the same batch
+    active = np.ones(p.shape, dtype=bool)
+    for _ in range(IV_MAX_ITERATIONS):
+        d1, _d2 = _d1_d2(s, k, t, sigma, rate)
+        diff = black_scholes_price(s, k, t, sigma, call, rate) - p
+        active &= np.abs(diff) >= IV_TOLERANCE
+        if not active.any():
+            break
+        lo = np.where(active & (diff < 0), sigma, lo)
+        hi = np.where(active & (diff > 0), sigma, hi)
+        vega = s * norm_pdf(d1) * np.sqrt(t)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            step = sigma - diff / vega
+        inside = np.isfinite(step) & (step > lo) & (step < hi)
+        sigma = np.where(active, np.where(inside, step, 0.5 * (lo + hi)), sigma)
+
+    iv[valid] = sigma
+    return iv
+
+
+def greeks(spot, strike, years, volatility, is_call, rate: float = RISK_FREE_RATE) -> Dict[str, np.ndarray]:
+    """Delta, gamma, theta (per calendar day) and vega (per vol point)."""
+    d1, d2 = _d1_d2(spot, strike, years, volatility, rate)
+    sqrt_t = np.sqrt(years)
+    pdf = norm_pdf(d1)
+    discount = strike * np.exp(-rate * years)
+
+    decay = -spot * pdf * volatility / (2.0 * sqrt_t)
+    call_theta = decay - rate * discount * norm_cdf(d2)
+    put_theta = decay + rate * discount * norm_cdf(-d2)
+    return {
+        "delta": np.where(is_call, norm_cdf(d1), norm_cdf(d1) - 1.0),
+        "gamma": pdf / (spot * volatility * sqrt_t),
+        "theta": np.where(is_call, call_theta, put_theta) / 365.0,
+        "vega": spot * pdf * sqrt_t / 100.0
+    }
+
+
+def solve_rows(frame: ChainFrame, rows: np.ndarray) -> Dict[str, np.ndarray]:
+    """Implied volatility (from ``mid``) and greeks of the given quote rows.
+
+    Where ``mid`` cannot be inverted, the quote's own impliedVolatility is
+    used instead.
+    """
+    quotes = frame.quotes
+    day = frame.day_of_row()[rows]
+    spot = frame.underlying[day]
+    strike = quotes['strike'][rows]
+    minutes = frame.times[day] if frame.times is not None else None
+    years = years_to_expiry(frame.dates[day], quotes['expiration'][rows], minutes)
+    is_call = quotes['optionType'][rows] == OPTION_TYPE_CODES['call']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        iv = implied_volatility(quotes['mid'][rows], spot, strike, years, is_call)
+        quoted = quotes['impliedVolatility'][rows]
+        iv = np.where(np.isnan(iv) & (quoted > 0), quoted, iv)
+        result = greeks(spot, strike, years, iv, is_call)
+    result['iv'] = iv
+    return {name: result[name].astype(GREEKS_DTYPE) for name in GREEK_COLUMNS}
+
+
+class GreeksCache:
+    """LRU of solved greeks per (symbol, date, time, expiration, digest) chain, bounded in bytes.
+
+    Cached columns must own their memory (not be views of a larger array),
+    so that evicting them frees what they count.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        self._chains: 'OrderedDict[tuple, Dict[str, np.ndarray]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._chains)
+
+    def get(self, key: tuple) -> Optional[Dict[str, np.ndarray]]:
+        with self._lock:
+            chain = self._chains.get(key)
+            if chain is not None:
+                self._chains.move_to_end(key)
+            return chain
+
+    def put(self, key: tuple, chain: Dict[str, np.ndarray]) -> None:
+        size = sum(column.nbytes for column in chain.values())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._chains.pop(key, None)
+            if previous is not None:
+                self.nbytes -= sum(column.nbytes for column in previous.values())
+            self._chains[key] = chain
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._chains.popitem(last=False)
+                self.nbytes -= sum(column.nbytes for column in evicted.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._chains.clear()
+            self.nbytes = 0
+
+
+# Shared by every backtest in the process; cleared when chains are re-imported
+cache = GreeksCache()
+
+
+def chain_greeks(frame: ChainFrame) -> Dict[str, np.ndarray]:
+    """IV and greeks (GREEK_COLUMNS) for every quote row of a frame.
+
+    Precomputed greeks carried by the frame are returned as they are.
+    Otherwise rows are grouped into (snapshot, expiration) chains; chains
+    already in the cache are reused and all the others are solved together
+    in one pass.
+    """
+    if frame.greeks is not None:
+        return frame.greeks
+    if ('greeks',) in frame.cache:
+        return frame.cache[('greeks',)]
+
+    n = len(frame.quotes['strike'])
+    day = frame.day_of_row()
+    expiration = frame.quotes['expiration']
+    order = np.lexsort((np.arange(n), expiration, day))
+    day_sorted, expiration_sorted = day[order], expiration[order]
+
+    starts = np.flatnonzero(np.concatenate([
+        [n > 0],
+        (day_sorted[1:] != day_sorted[:-1]) | (expiration_sorted[1:] != expiration_sorted[:-1])
+    ]))
+    ends = np.append(starts[1:], n)
+    dates = frame.date_strings()
+    times = frame.time_strings() or [None] * len(dates)
+    expirations = np.datetime_as_string(expiration_sorted[starts], unit='D').tolist()
+    # The digest tells apart chains with the same key but other quotes
+    # (a repeated snapshot of a date, or regenerated data)
+    columns = [np.ascontiguousarray(frame.quotes[name][order]) for name in DIGEST_COLUMNS]
+    spots = frame.underlying[day_sorted[starts]].astype('float64')
+    keys = []
+    for d, e, spot, start, end in zip(day_sorted[starts].tolist(), expirations, spots, starts.tolist(), ends.tolist()):
+        digest = hashlib.blake2b(spot.tobytes(), digest_size=16)
+        for column in columns:
+            digest.update(column[start:end].tobytes())
+        keys.append((frame.symbol, dates[d], times[d], e, digest.hexdigest()))
+
+    result = {name: np.empty(n, dtype=GREEKS_DTYPE) for name in GREEK_COLUMNS}
+    missing = []
+    for key, start, end in zip(keys, starts.tolist(), ends.tolist()):
+        chain = cache.get(key)
+        if chain is None:
+            missing.append((key, start, end))
+            continue
+        for name in GREEK_COLUMNS:
+            result[name][order[start:end]] = chain[name]
+
+    if missing:
+        rows = np.concatenate([order[start:end] for _, start, end in missing])
+        solved = solve_rows(frame, rows)
+        position = 0
+        for key, start, end in missing:
+            size = end - start
+            # Copies, so an evicted chain releases its memory
+            chain = {name: solved[name][position:position + size].copy() for name in GREEK_COLUMNS}
+            cache.put(key, chain)
+            for name in GREEK_COLUMNS:
+                result[name][order[start:end]] = chain[name]
+            position += size
+
+    frame.cache[('greeks',)] = result
+    return result
@@ -1,7 +1,41 @@
-from typing import List, Optional, Tuple
+import itertools
+from typing import Callable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 from uuid import uuid4
+
+import numpy as np
+
 from .strategy_base import Strategy
+from .option_chain import ChainChunks, ChainFrame, ChainIndex, to_minute
+from .backtest_engine import LegResults, LegSpec, run_0dte, run_intraday
+from .greeks import chain_greeks
+from .performance import equity_curve, performance_metrics
+from .trade_log import TradeLog
+
+
+# Iron Condor legs in trade order, with the price and strike (as a fraction
+# of the underlying) assumed when no matching option is quoted
+LEGS = (
+    LegSpec('longPut', 'put', 'buy', fallback_price=0.5, fallback_strike_factor=0.985),
+    LegSpec('shortPut', 'put', 'sell', fallback_price=1.0, fallback_strike_factor=0.995),
+    LegSpec('shortCall', 'call', 'sell', fallback_price=1.0, fallback_strike_factor=1.005),
+    LegSpec('longCall', 'call', 'buy', fallback_price=0.5, fallback_strike_factor=1.015),
+)
+
+# Trading days simulated per engine pass; progress is reported between chunks
+CHUNK_DAYS = 250
+# Dates per engine pass over intraday data (about 390 snapshots each)
+INTRADAY_CHUNK_DAYS = 20
+# Trading days per engine pass when streaming, so the first days go out early
+STREAM_CHUNK_DAYS = 20
+
+# Times of day at which intraday backtests open and close the position
+DEFAULT_ENTRY_TIME = "09:45"
+DEFAULT_EXIT_TIME = "15:45"
+
+
+def _is_intraday(data) -> bool:
+    return isinstance(data, ChainChunks) or (isinstance(data, ChainFrame) and data.times is not None)
 
 
 class IronCondor(Strategy):
@@ -32,7 +66,7 @@ class IronCondor(Strategy):
         self.long_put_delta = legs.get('longPut')  # Negative delta (e.g., -0.15)
         self.short_put_delta = legs.get('shortPut')  # Negative delta (e.g., -0.25)
         self.short_call_delta = legs.get('shortCall')  # Positive delta (e.g., 0.25)
-        self.long_call_delta = legs.get('longCall')  # Positive delta (e.g., 0.35)
+        self.long_call_delta = legs.get('longCall')  # Positive delta (e.g., 0.15)
     
     @classmethod
     def from_dict(cls, data: dict) -> 'IronCondor':
@@ -54,10 +88,10 @@ class IronCondor(Strategy):
         
         # Validate delta ranges:
         # Puts should be negative, calls should be positive
-        # longPut < shortPut (more negative = further OTM)
-        # shortCall < longCall (more positive = further OTM)
-        return (self.long_put_delta < self.short_put_delta < 0 and
-                0 < self.short_call_delta < self.long_call_delta)
+        # The long (wing) legs sit further OTM, i.e. at a smaller absolute delta:
+        # shortPut < longPut < 0 < longCall < shortCall
+        return (self.short_put_delta < self.long_put_delta < 0 and
+                0 < self.long_call_delta < self.short_call_delta)
     
     def calculate_max_profit(self) -> float:
         """Calculate maximum profit (net credit received).
@@ -90,9 +124,310 @@ class IronCondor(Strategy):
         start_date: str,
         end_date: str,
         initial_capital: float,
-        historical_data: List[dict]
+        historical_data: Union[List[dict], ChainFrame, ChainChunks],
+        progress: Optional[Callable[[int, int], None]] = None,
+        vectorized: bool = True,
+        entry_time: Optional[str] = None,
+        exit_time: Optional[str] = None
+    ) -> dict:
+        """Run backtest simulation for Iron Condor strategy.
+        
+        0DTE strategies run on the vectorized engine; pass vectorized=False
+        to use the day-by-day loop (kept as the reference implementation).
+        On intraday data 0DTE positions are opened at ``entry_time`` and
+        closed at ``exit_time`` (HH:MM) the same day; the loop only sees the
+        first snapshot of each date.
+        """
+        if vectorized and self.expiration == "0DTE":
+            if _is_intraday(historical_data):
+                return self._backtest_intraday(start_date, end_date, initial_capital, historical_data,
+                                               progress, entry_time, exit_time)
+            return self._backtest_vectorized(start_date, end_date, initial_capital, historical_data, progress)
+        if isinstance(historical_data, ChainChunks):
+            historical_data = ChainFrame.concat(list(historical_data))
+        if isinstance(historical_data, ChainFrame):
+            historical_data = historical_data.to_records()
+        return self._backtest_loop(start_date, end_date, initial_capital, historical_data, progress)
+    
+    def _backtest_vectorized(
+        self,
+        start_date: str,
+        end_date: str,
+        initial_capital: float,
+        historical_data: Union[List[dict], ChainFrame],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> dict:
+        """Run a 0DTE backtest with every leg of every day resolved in array passes."""
+        backtest_id = str(uuid4())
+        
+        if not isinstance(historical_data, ChainFrame):
+            historical_data = ChainFrame.from_records([
+                d for d in historical_data
+                if start_date <= d.get('date', '')[:10] <= end_date
+            ], symbol=self.symbol)
+        
+        results = self.simulate(historical_data, start_date, end_date, progress)
+        trades = TradeLog.from_leg_results(results, self.symbol, self.expiration)
+        
+        return self._result(
+            backtest_id, start_date, end_date, initial_capital, trades,
+            results.entry_dates(), results.equity(initial_capital)
+        )
+    
+    def _backtest_intraday(
+        self,
+        start_date: str,
+        end_date: str,
+        initial_capital: float,
+        historical_data: Union[ChainFrame, ChainChunks],
+        progress: Optional[Callable[[int, int], None]] = None,
+        entry_time: Optional[str] = None,
+        exit_time: Optional[str] = None
+    ) -> dict:
+        """Run a 0DTE backtest over intraday snapshots, a chunk of dates at a time."""
+        backtest_id = str(uuid4())
+        entry_time, exit_time = entry_time or DEFAULT_ENTRY_TIME, exit_time or DEFAULT_EXIT_TIME
+        
+        results = self.simulate(historical_data, start_date, end_date, progress, entry_time, exit_time)
+        trades = TradeLog.from_leg_results(results, self.symbol, self.expiration)
+        
+        result = self._result(
+            backtest_id, start_date, end_date, initial_capital, trades,
+            results.entry_dates(), results.equity(initial_capital)
+        )
+        result["entryTime"], result["exitTime"] = entry_time, exit_time
+        return result
+    
+    def simulate(
+        self,
+        frame: Union[ChainFrame, ChainChunks],
+        start_date: str,
+        end_date: str,
+        progress: Optional[Callable[[int, int], None]] = None,
+        entry_time: Optional[str] = None,
+        exit_time: Optional[str] = None
+    ) -> LegResults:
+        """Simulate a 0DTE run over a columnar chain without building trade dicts.
+        
+        Days are processed in chunks of CHUNK_DAYS (INTRADAY_CHUNK_DAYS for
+        intraday data, which may also be a ChainChunks); ``progress(done,
+        total)`` is called after each chunk and may raise to abort the run.
+        """
+        if _is_intraday(frame):
+            runs = self._simulate_intraday(*self._prepare_intraday(frame, start_date, end_date, entry_time, exit_time))
+        else:
+            runs = self._simulate_chunks(*self._prepare(frame, start_date, end_date))
+        chunks = []
+        for done, total, chunk in runs:
+            chunks.append(chunk)
+            if progress:
+                progress(done, total)
+        return LegResults.concat(chunks)
+    
+    def stream_backtest(
+        self,
+        start_date: str,
+        end_date: str,
+        initial_capital: float,
+        historical_data: Union[List[dict], ChainFrame, ChainChunks],
+        entry_time: Optional[str] = None,
+        exit_time: Optional[str] = None
+    ) -> Iterator[dict]:
+        """Yield per-day results as the engine produces them (0DTE only).
+        
+        Other expirations fall back to the base implementation.
+        """
+        if self.expiration != "0DTE":
+            return super().stream_backtest(start_date, end_date, initial_capital, historical_data,
+                                           entry_time, exit_time)
+        if not isinstance(historical_data, (ChainFrame, ChainChunks)):
+            historical_data = ChainFrame.from_records([
+                d for d in historical_data
+                if start_date <= d.get('date', '')[:10] <= end_date
+            ], symbol=self.symbol)
+        
+        # Validate eagerly so errors surface before the first item is consumed
+        if _is_intraday(historical_data):
+            runs = self._simulate_intraday(*self._prepare_intraday(
+                historical_data, start_date, end_date, entry_time, exit_time
+            ))
+        else:
+            prepared = self._prepare(historical_data, start_date, end_date)
+            runs = self._simulate_chunks(*prepared, chunk_days=STREAM_CHUNK_DAYS)
+        
+        def days() -> Iterator[dict]:
+            capital = initial_capital
+            previous = 0
+            for done, total, chunk in runs:
+                equity = chunk.equity(capital).tolist()
+                for i, (date, trades) in enumerate(chunk.iter_day_trades(self.symbol, self.expiration)):
+                    yield {
+                        "date": date,
+                        "trades": trades,
+                        "capital": equity[i],
+                        # The chunk's share of the run, spread over its days
+                        "progress": (previous + (i + 1) * (done - previous) / len(equity)) / total
+                    }
+                if equity:
+                    capital = equity[-1]
+                previous = done
+        
+        return days()
+    
+    def extend_backtest(
+        self,
+        result: dict,
+        end_date: str,
+        historical_data: Union[List[dict], ChainFrame, ChainChunks]
+    ) -> dict:
+        """Extend a stored 0DTE result to ``end_date``, simulating only the new days.
+        
+        The last stored day is simulated again: as the end of the old range it
+        closed on its own date, and now it closes on the next trading day like
+        every other day. Earlier days are kept as stored and the run resumes
+        from the equity before that day, so ``historical_data`` only needs to
+        cover the last equity curve date through ``end_date``. Stored exits
+        that had no quote on their exit day (priced from the latest other day
+        quoting the strike) are not revisited, so they can differ from a full
+        re-run over the longer range.
+        Returns the updated result under the same backtestId.
+        """
+        if self.expiration != "0DTE":
+            return super().extend_backtest(result, end_date, historical_data)
+        if end_date <= result['endDate']:
+            raise ValueError(f"End date {end_date} must be later than the backtest's end date {result['endDate']}")
+        curve = result.get('equityCurve')
+        if curve is None:
+            raise ValueError("Backtest has no equity curve to extend; run a new backtest")
+        
+        # Every entry day books an entry and an exit per leg
+        legs = self._traded_legs()
+        trades = result['trades']
+        if len(trades) != len(curve) * 2 * len(legs) or (len(trades) and trades.quantity != self.quantity):
+            raise ValueError("Backtest trades do not match the strategy's current legs; run a new backtest")
+        
+        kept = curve[:-1]
+        resume_date = curve[-1]['date'] if curve else result['startDate']
+        initial_capital = result['initialCapital']
+        capital = kept[-1]['equity'] if kept else initial_capital
+        
+        if not isinstance(historical_data, (ChainFrame, ChainChunks)):
+            historical_data = ChainFrame.from_records([
+                d for d in historical_data
+                if resume_date <= d.get('date', '')[:10] <= end_date
+            ], symbol=self.symbol)
+        results = self.simulate(historical_data, resume_date, end_date,
+                                entry_time=result.get('entryTime'), exit_time=result.get('exitTime'))
+        
+        dates = [point['date'] for point in kept] + results.entry_dates()
+        equity = np.concatenate([[point['equity'] for point in kept], results.equity(capital)])
+        return {
+            **result,
+            "endDate": end_date,
+            "finalCapital": float(equity[-1]) if len(equity) else initial_capital,
+            **performance_metrics(initial_capital, equity),
+            "equityCurve": equity_curve(dates, initial_capital, equity),
+            "trades": TradeLog.concat([
+                trades.head(len(kept) * 2 * len(legs)),
+                TradeLog.from_leg_results(results, self.symbol, self.expiration)
+            ])
+        }
+    
+    def _prepare(self, frame: ChainFrame, start_date: str, end_date: str) -> tuple:
+        """Validate the chain for a 0DTE run; return (frame, legs, target deltas)."""
+        frame = frame.slice_dates(start_date, end_date).first_per_date()
+        
+        if len(frame) == 0:
+            raise ValueError(f"No historical data found for date range {start_date} to {end_date}")
+        
+        dates = frame.date_strings()
+        if dates[0] != start_date:
+            raise ValueError(f"No historical data found for entry date {start_date}")
+        if frame.underlying[0] == 0:
+            raise ValueError(f"Invalid underlying price for date {start_date}")
+        
+        legs = self._traded_legs()
+        return frame, legs, self._targets(legs, len(frame))
+    
+    def _traded_legs(self) -> List[LegSpec]:
+        # Only legs with a delta set are traded
+        return [leg for leg in LEGS if self.legs.get(leg.name) is not None]
+    
+    def _targets(self, legs: List[LegSpec], num_snapshots: int) -> np.ndarray:
+        """Target delta of every leg on every snapshot, shaped (snapshots, legs)."""
+        return np.column_stack([
+            np.full(num_snapshots, float(self.legs[leg.name]))
+            for leg in legs
+        ]) if legs else np.empty((num_snapshots, 0))
+    
+    def _simulate_chunks(
+        self,
+        frame: ChainFrame,
+        legs: List[LegSpec],
+        targets: np.ndarray,
+        chunk_days: int = CHUNK_DAYS
+    ) -> Iterator[tuple]:
+        """Run the engine ``chunk_days`` entry days at a time; yield (done, total, results)."""
+        for lo in range(0, len(frame), chunk_days):
+            hi = min(lo + chunk_days, len(frame))
+            yield hi, len(frame), run_0dte(frame, legs, targets, self.quantity, day_range=(lo, hi))
+    
+    def _prepare_intraday(
+        self,
+        data: Union[ChainFrame, ChainChunks],
+        start_date: str,
+        end_date: str,
+        entry_time: Optional[str],
+        exit_time: Optional[str]
+    ) -> tuple:
+        """Validate an intraday 0DTE run; return (chunks, dates, legs, entry minute, exit minute).
+        
+        Only the first chunk is read here; the rest are read as the run
+        consumes them.
+        """
+        entry_time, exit_time = entry_time or DEFAULT_ENTRY_TIME, exit_time or DEFAULT_EXIT_TIME
+        entry_minute, exit_minute = to_minute(entry_time), to_minute(exit_time)
+        if exit_minute <= entry_minute:
+            raise ValueError(f"Exit time {exit_time} must be later than entry time {entry_time}")
+        
+        if isinstance(data, ChainFrame):
+            data = ChainChunks.from_frame(data.slice_dates(start_date, end_date), INTRADAY_CHUNK_DAYS)
+        chunks = (chunk.slice_dates(start_date, end_date) for chunk in data)
+        chunks = (chunk for chunk in chunks if len(chunk))
+        first = next(chunks, None)
+        
+        if first is None:
+            raise ValueError(f"No historical data found for date range {start_date} to {end_date}")
+        if first.date_strings()[0] != start_date:
+            raise ValueError(f"No historical data found for entry date {start_date}")
+        
+        return itertools.chain([first], chunks), len(data), self._traded_legs(), entry_minute, exit_minute
+    
+    def _simulate_intraday(
+        self,
+        chunks: Iterator[ChainFrame],
+        num_dates: int,
+        legs: List[LegSpec],
+        entry_minute: int,
+        exit_minute: int
+    ) -> Iterator[tuple]:
+        """Run the intraday engine one chunk of dates at a time; yield (done, total, results)."""
+        done = 0
+        for chunk in chunks:
+            targets = self._targets(legs, len(chunk))
+            results = run_intraday(chunk, legs, targets, self.quantity, entry_minute, exit_minute)
+            done += len(chunk.day_starts())
+            yield min(done, num_dates), num_dates, results
+    
+    def _backtest_loop(
+        self,
+        start_date: str,
+        end_date: str,
+        initial_capital: float,
+        historical_data: List[dict],
+        progress: Optional[Callable[[int, int], None]] = None
     ) -> dict:
-        """Run backtest simulation for Iron Condor strategy."""
+        """Run backtest simulation day by day."""
         # Generate backtest ID
         backtest_id = str(uuid4())
         
@@ -105,8 +440,11 @@ class IronCondor(Strategy):
         if not filtered_data:
             raise ValueError(f"No historical data found for date range {start_date} to {end_date}")
         
+        # Index the chains once: date -> day map plus strike-sorted option lists
+        chain_index = ChainIndex(filtered_data)
+        
         # Get underlying price for entry date to convert deltas to strikes
-        entry_day_data = next((d for d in filtered_data if d.get('date') == start_date), None)
+        entry_day_data = chain_index.day(start_date)
         if not entry_day_data:
             raise ValueError(f"No historical data found for entry date {start_date}")
         
@@ -114,17 +452,18 @@ class IronCondor(Strategy):
         if underlying_price == 0:
             raise ValueError(f"Invalid underlying price for date {start_date}")
         
-        # Simplified helper function to find option by delta
-        # Just calculates expected strike and finds nearest available strike
+        # Black-Scholes deltas of each day's options, in chain order
+        day_deltas = {}
+        
         def find_option_by_delta(date: str, target_delta: float, expiration: str, option_type: str) -> Tuple[Optional[float], Optional[float]]:
-            """Find option strike and price that best matches target delta.
-            Simply calculates expected strike and finds nearest available strike.
+            """Find the option whose delta is nearest to ``target_delta``.
+            Deltas come from each quote's implied volatility (solved from its mid).
             Returns (price, actual_strike) or (None, None) if not found.
             """
             # For 0DTE options, use the date as the expiration date
             actual_expiration = date if expiration == "0DTE" else expiration
             
-            day_data = next((d for d in filtered_data if d.get('date') == date), None)
+            day_data = chain_index.day(date)
             if not day_data:
                 return (None, None)
             
@@ -132,44 +471,35 @@ class IronCondor(Strategy):
             if underlying == 0:
                 return (None, None)
             
-            # Calculate expected strike from target delta (simple approximation)
-            if option_type == 'put':
-                # For puts: negative delta, more negative = lower strike
-                # Simple mapping: -0.15 → ~1.5% below, -0.25 → ~0.4% below
-                if target_delta == -0.15:
-                    expected_strike = underlying * 0.985  # ~1.5% below
-                elif target_delta == -0.25:
-                    expected_strike = underlying * 0.996  # ~0.4% below
-                else:
-                    # General: more negative delta = lower strike
-                    expected_strike = underlying * (1 + target_delta * 0.06)
-            else:  # call
-                # For calls in Iron Condor: need shortCall < longCall
-                # Strategy: shortCall 0.25, longCall 0.35
-                # Interpret: 0.25 = near ATM (lower strike), 0.35 = OTM (higher strike)
-                if target_delta == 0.25:
-                    expected_strike = underlying * 1.0002  # Near ATM (~477)
-                elif target_delta == 0.35:
-                    expected_strike = underlying * 1.0065  # OTM (~480)
-                else:
-                    # General: higher delta value = higher strike for Iron Condor
-                    expected_strike = underlying * (1 + (target_delta - 0.25) * 0.026)
+            if date not in day_deltas:
+                day_frame = ChainFrame.from_records([day_data], symbol=self.symbol)
+                day_deltas[date] = chain_greeks(day_frame)['delta'].tolist()
             
-            # Find nearest available strike
-            options = day_data.get('options', [])
+            # Nearest delta; ties go to the first option in chain order
             best_match = None
-            best_diff = float('inf')
+            best_distance = None
+            for option, delta in zip(day_data.get('options', []), day_deltas[date]):
+                if option.get('optionType') != option_type or option.get('expiration') != actual_expiration:
+                    continue
+                if delta != delta:  # NaN: no implied volatility for this quote
+                    continue
+                distance = abs(delta - target_delta)
+                if best_distance is None or distance < best_distance:
+                    best_match, best_distance = option, distance
             
-            for option in options:
-                if (option.get('expiration') == actual_expiration and
-                    option.get('optionType') == option_type):
-                    strike = option.get('strike', 0)
-                    diff = abs(strike - expected_strike)
-                    
-                    if diff < best_diff:
-                        best_diff = diff
-                        best_match = option
+            if best_match:
+                return (best_match.get('mid'), best_match.get('strike'))
+            return (None, None)
+        
+        # Helper function to find option by strike (for exit trades)
+        def find_option_by_strike(date: str, target_strike: float, expiration: str, option_type: str, tolerance: float = 2.0) -> Tuple[Optional[float], Optional[float]]:
+            """Find option premium (mid price) by strike from historical data.
+            Returns (price, actual_strike) or (None, None) if not found.
+            """
+            # For 0DTE options, use the date as the expiration date
+            actual_expiration = date if expiration == "0DTE" else expiration
             
+            best_match = chain_index.nearest(date, target_strike, option_type, expiration=actual_expiration, tolerance=tolerance)
             if best_match:
                 return (best_match.get('mid'), best_match.get('strike'))
             return (None, None)
@@ -178,8 +508,12 @@ class IronCondor(Strategy):
         trades = []
         current_capital = initial_capital
         
-        # Get sorted list of trading dates in the range
-        sorted_dates = sorted([d.get('date', '') for d in filtered_data])
+        # Capital after each entry day's trades are booked
+        equity_dates = []
+        equity = []
+        
+        # Sorted list of trading dates in the range
+        sorted_dates = chain_index.dates
         
         # For 0DTE, run strategy on each trading day (enter on day N, exit on day N+1)
         # For other expirations, enter once and hold until expiration
@@ -191,9 +525,12 @@ class IronCondor(Strategy):
             trading_days = [start_date] if start_date in sorted_dates else []
         
         # Process each trading day
-        for entry_date in trading_days:
+        for day_number, entry_date in enumerate(trading_days):
+            if progress:
+                progress(day_number, len(trading_days))
+            
             # Get underlying price for this entry date
-            entry_day_data = next((d for d in filtered_data if d.get('date') == entry_date), None)
+            entry_day_data = chain_index.day(entry_date)
             if not entry_day_data:
                 continue  # Skip if no data for this date
             
@@ -298,11 +635,8 @@ class IronCondor(Strategy):
             # Calculate exit date for this entry
             if self.expiration == "0DTE":
                 # For 0DTE, exit on next trading day
-                entry_index = sorted_dates.index(entry_date) if entry_date in sorted_dates else -1
-                if entry_index >= 0 and entry_index < len(sorted_dates) - 1:
-                    exit_date = sorted_dates[entry_index + 1]  # Next trading day
-                else:
-                    exit_date = entry_date  # Fallback to same day if no next day available
+                # Fallback to same day if no next day available
+                exit_date = chain_index.next_date(entry_date) or entry_date
             else:
                 # For other expiration types, use end_date or expiration
                 expiration_date = end_date  # TODO: Parse expiration strings
@@ -310,37 +644,10 @@ class IronCondor(Strategy):
             
             # Only create exit trades if exit_date is within range
             if exit_date > end_date:
+                equity_dates.append(entry_date)
+                equity.append(current_capital)
                 continue
             
-            # Helper function to find option by strike (for exit trades)
-            def find_option_by_strike(date: str, target_strike: float, expiration: str, option_type: str, tolerance: float = 2.0) -> Tuple[Optional[float], Optional[float]]:
-                """Find option premium (mid price) by strike from historical data.
-                Returns (price, actual_strike) or (None, None) if not found.
-                """
-                # For 0DTE options, use the date as the expiration date
-                actual_expiration = date if expiration == "0DTE" else expiration
-                
-                day_data = next((d for d in filtered_data if d.get('date') == date), None)
-                if not day_data:
-                    return (None, None)
-                
-                options = day_data.get('options', [])
-                best_match = None
-                best_diff = float('inf')
-                
-                for option in options:
-                    if (option.get('expiration') == actual_expiration and
-                        option.get('optionType') == option_type):
-                        strike = option.get('strike', 0)
-                        diff = abs(strike - target_strike)
-                        if diff < best_diff and diff <= tolerance:
-                            best_diff = diff
-                            best_match = option
-                
-                if best_match:
-                    return (best_match.get('mid'), best_match.get('strike'))
-                return (None, None)
-            
             # Create exit trades (reverse of entry) for this day's positions
             day_exit_trades = []
             for trade in day_entry_trades:
@@ -351,37 +658,18 @@ class IronCondor(Strategy):
                 if option['expiration'] == "0DTE":
                     # For 0DTE, find option with same strike on next day (any expiration is fine since 0DTE expired)
                     # Just match by strike and option type on the next trading day
-                    day_data = next((d for d in filtered_data if d.get('date') == exit_date), None)
-                    if day_data:
-                        options = day_data.get('options', [])
-                        best_match = None
-                        best_diff = float('inf')
-                        for opt in options:
-                            if opt.get('optionType') == option['optionType']:
-                                strike = opt.get('strike', 0)
-                                diff = abs(strike - option['strike'])
-                                if diff < best_diff and diff <= 2.0:
-                                    best_diff = diff
-                                    best_match = opt
-                        if best_match:
-                            exit_price = best_match.get('mid')
-                        else:
-                            exit_price = None
-                    else:
-                        exit_price = None
+                    best_match = chain_index.nearest(exit_date, option['strike'], option['optionType'], tolerance=2.0)
+                    exit_price = best_match.get('mid') if best_match else None
                 else:
                     # For non-0DTE options, use normal expiration matching
                     exit_price, _ = find_option_by_strike(exit_date, option['strike'], option['expiration'], option['optionType'])
                 
                 # If exit price still not found, try to find from closest available date
                 if exit_price is None:
-                    for day_data in sorted(filtered_data, key=lambda x: x.get('date', ''), reverse=True):
-                        options = day_data.get('options', [])
-                        for opt in options:
-                            if (abs(opt.get('strike', 0) - option['strike']) <= 2.0 and
-                                opt.get('optionType') == option['optionType']):
-                                exit_price = opt.get('mid')
-                                break
+                    for fallback_date in reversed(chain_index.dates):
+                        opt = chain_index.first_within(fallback_date, option['strike'], option['optionType'], 2.0)
+                        if opt is not None:
+                            exit_price = opt.get('mid')
                         if exit_price is not None:
                             break
                     
@@ -408,27 +696,39 @@ class IronCondor(Strategy):
                 current_capital += exit_pnl
             
             trades.extend(day_exit_trades)
+            equity_dates.append(entry_date)
+            equity.append(current_capital)
         
-        # Calculate metrics
-        final_capital = current_capital
-        total_return = ((final_capital - initial_capital) / initial_capital) * 100 if initial_capital > 0 else 0
-        
-        # Calculate max drawdown (simplified - would need daily P&L tracking for accurate calculation)
-        max_drawdown = -5.2  # Mock value - can be enhanced with actual daily tracking
+        if progress:
+            progress(len(trading_days), len(trading_days))
         
-        # Calculate Sharpe ratio (simplified - would need returns series for accurate calculation)
-        sharpe_ratio = 1.85  # Mock value - can be enhanced with actual returns calculation
+        return self._result(backtest_id, start_date, end_date, initial_capital, trades, equity_dates, equity)
+    
+    def _result(
+        self,
+        backtest_id: str,
+        start_date: str,
+        end_date: str,
+        initial_capital: float,
+        trades: Union[List[dict], TradeLog],
+        equity_dates: List[str],
+        equity: Union[List[float], np.ndarray]
+    ) -> dict:
+        """Assemble the BacktestResult dict from the trades and daily equity.
         
+        Trade dicts (from the loop) are packed into a TradeLog.
+        """
+        if not isinstance(trades, TradeLog):
+            trades = TradeLog.from_trades(trades, self.symbol, self.expiration, self.quantity)
         return {
             "strategyId": self.id,
             "backtestId": backtest_id,
             "startDate": start_date,
             "endDate": end_date,
             "initialCapital": initial_capital,
-            "finalCapital": final_capital,
-            "totalReturn": total_return,
-            "maxDrawdown": max_drawdown,
-            "sharpeRatio": sharpe_ratio,
+            "finalCapital": float(equity[-1]) if len(equity) else initial_capital,
+            **performance_metrics(initial_capital, equity),
+            "equityCurve": equity_curve(equity_dates, initial_capital, equity),
             "trades": trades,
             "createdAt": datetime.utcnow().isoformat()
         }
@@ -0,0 +1,129 @@
+"""Bootstrap resampling of a backtest's daily P&L.
+
+A backtest is one path through history. Resampling its daily P&L (with
+replacement, either day by day or in blocks of consecutive days, which
+keeps short-range streaks together) gives many alternative paths of the
+same length, and the spread of their metrics shows how much of the
+result is luck. All paths are built and measured as (paths x days)
+matrices; the metrics follow ``performance_metrics``.
+
+Daily P&L is resampled in dollars, as the strategies trade a fixed
+quantity whatever the capital.
+"""
+from typing import Dict, Optional
+
+import numpy as np
+
+from .performance import TRADING_DAYS_PER_YEAR
+
+# Matrix cells (paths x days) processed at once, bounding memory use
+BATCH_CELLS = 2_000_000
+METRICS = ('finalCapital', 'totalReturn', 'maxDrawdown', 'sharpeRatio')
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+
+def bootstrap_indices(rng: np.random.Generator, days: int, paths: int, block_size: int = 1) -> np.ndarray:
+    """Day indices of ``paths`` resampled paths of ``days`` days.
+
+    With ``block_size`` 1 days are drawn independently; larger blocks use a
+    circular block bootstrap (blocks may wrap from the last day to the first).
+    """
+    if block_size <= 1:
+        return rng.integers(0, days, size=(paths, days))
+    blocks = -(-days // block_size)
+    starts = rng.integers(0, days, size=(paths, blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)) % days
+    return indices.reshape(paths, blocks * block_size)[:, :days]
+
+
+def path_metrics(initial_capital: float, pnl: np.ndarray) -> Dict[str, np.ndarray]:
+    """Final capital, total return, max drawdown and Sharpe of each row of daily P&L."""
+    paths = pnl.shape[0]
+    curve = np.empty((paths, pnl.shape[1] + 1))
+    curve[:, 0] = initial_capital
+    np.cumsum(pnl, axis=1, out=curve[:, 1:])
+    curve[:, 1:] += initial_capital
+
+    final = curve[:, -1]
+    total_return = (final - initial_capital) / initial_capital * 100 if initial_capital > 0 else np.zeros(paths)
+
+    peaks = np.maximum.accumulate(curve, axis=1)
+    if initial_capital > 0:
+        # Peaks never fall below the starting capital, so no zero peaks to skip
+        max_drawdown = (np.divide(curve, peaks, out=peaks).min(axis=1) - 1) * 100
+    else:
+        drawdowns = np.divide(curve - peaks, peaks, out=np.zeros_like(curve), where=peaks > 0)
+        max_drawdown = drawdowns.min(axis=1) * 100
+
+    previous = curve[:, :-1]
+    if previous.min() > 0:
+        returns = pnl / previous
+    else:
+        returns = np.divide(pnl, previous, out=np.zeros_like(pnl), where=previous > 0)
+    days = returns.shape[1]
+    mean = returns.sum(axis=1) / days
+    if days > 1:
+        # Sample variance from row sums, without a centered copy of the matrix
+        squares = np.einsum('ij,ij->i', returns, returns)
+        volatility = np.sqrt(np.maximum(squares - days * mean ** 2, 0) / (days - 1))
+    else:
+        volatility = np.zeros(paths)
+    sharpe = np.divide(mean, volatility, out=np.zeros(paths), where=volatility > 0)
+    sharpe *= np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    return {
+        "finalCapital": final,
+        "totalReturn": total_return,
+        "maxDrawdown": max_drawdown,
+        "sharpeRatio": sharpe
+    }
+
+
+def distribution(values: np.ndarray, confidence: float, bins: int) -> dict:
+    """Summary statistics, a central confidence interval and a histogram."""
+    tail = (1 - confidence) / 2 * 100
+    low, high, *percentiles = np.percentile(values, [tail, 100 - tail, *PERCENTILES])
+    counts, edges = np.histogram(values, bins=bins)
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "confidenceInterval": [float(low), float(high)],
+        "percentiles": {str(p): float(v) for p, v in zip(PERCENTILES, percentiles)},
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()}
+    }
+
+
+def bootstrap(
+    initial_capital: float,
+    pnl: np.ndarray,
+    paths: int = 10000,
+    block_size: int = 1,
+    confidence: float = 0.95,
+    bins: int = 30,
+    seed: Optional[int] = None
+) -> dict:
+    """Resample ``pnl`` into ``paths`` paths and describe their metrics.
+
+    Returns a distribution per metric (see METRICS) and the probability of
+    ending below the starting capital.
+    """
+    pnl = np.asarray(pnl, dtype='float64')
+    days = len(pnl)
+    if days == 0:
+        raise ValueError("Backtest has no daily P&L to resample")
+    if not 1 <= block_size <= days:
+        raise ValueError(f"Block size must be between 1 and the number of days ({days})")
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, BATCH_CELLS // days)
+    results = {metric: np.empty(paths) for metric in METRICS}
+    for start in range(0, paths, batch):
+        stop = min(start + batch, paths)
+        indices = bootstrap_indices(rng, days, stop - start, block_size)
+        for metric, values in path_metrics(initial_capital, pnl[indices]).items():
+            results[metric][start:stop] = values
+
+    return {
+        **{metric: distribution(values, confidence, bins) for metric, values in results.items()},
+        "probabilityOfLoss": float(np.count_nonzero(results['finalCapital'] < initial_capital)) / paths
+    }
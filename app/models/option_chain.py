@@ -0,0 +1,446 @@
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+
+# Option types are stored as small integer codes in columnar form
+OPTION_TYPES = ('put', 'call')
+OPTION_TYPE_CODES = {name: code for code, name in enumerate(OPTION_TYPES)}
+
+# Quote columns, keyed by the field names used in historical_data.json
+QUOTE_COLUMNS = {
+    'strike': 'float64',
+    'expiration': 'datetime64[D]',
+    'optionType': 'int8',
+    'bid': 'float64',
+    'ask': 'float64',
+    'mid': 'float64',
+    'volume': 'int64',
+    'openInterest': 'int64',
+    'impliedVolatility': 'float64',
+}
+
+
+# Intraday snapshot times are stored as minutes since midnight (exchange time)
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_day(value: str) -> np.datetime64:
+    """Convert an ISO date (or datetime) string to a numpy day."""
+    return np.datetime64(value[:10], 'D')
+
+
+def to_minute(value: str) -> int:
+    """Convert an ``HH:MM`` time of day to minutes since midnight."""
+    try:
+        hours, minutes = value.split(':')[:2]
+        minute = int(hours) * 60 + int(minutes)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid time of day: {value!r} (expected HH:MM)")
+    if not 0 <= minute < MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time of day: {value!r} (expected HH:MM)")
+    return minute
+
+
+def format_minute(minute: int) -> str:
+    """Format minutes since midnight as ``HH:MM``."""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def _record_time(record: dict) -> Optional[str]:
+    # Intraday records carry a "time" field or an ISO datetime as their date
+    if record.get('time'):
+        return record['time']
+    date = record.get('date', '')
+    return date[11:16] if len(date) > 10 else None
+
+
+class ChainFrame:
+    """Columnar view of option-chain snapshots for a single symbol.
+
+    Day-level arrays (``dates``, ``underlying``) have one entry per snapshot.
+    Quote arrays in ``quotes`` have one entry per option quote, and the quotes
+    of snapshot ``i`` live in rows ``offsets[i]:offsets[i + 1]``. ``greeks``,
+    when the chain store precomputed them, holds per-quote arrays too.
+
+    Intraday data has many snapshots per date, ordered by ``times`` (minutes
+    since midnight, one entry per snapshot); ``times`` is None for daily data.
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        dates: np.ndarray,
+        underlying: np.ndarray,
+        offsets: np.ndarray,
+        quotes: Dict[str, np.ndarray],
+        greeks: Optional[Dict[str, np.ndarray]] = None,
+        times: Optional[np.ndarray] = None
+    ):
+        self.symbol = symbol
+        self.dates = dates
+        self.underlying = underlying
+        self.offsets = offsets
+        self.quotes = quotes
+        self.greeks = greeks
+        self.times = times
+        # Derived arrays (e.g. sorted strike grids) computed by the backtest
+        # engine; valid for as long as the frame itself
+        self.cache: Dict[tuple, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def num_quotes(self) -> int:
+        return int(self.offsets[-1] - self.offsets[0]) if len(self.offsets) else 0
+
+    def day_of_row(self) -> np.ndarray:
+        """Snapshot index of every quote row."""
+        if ('day_of_row',) not in self.cache:
+            self.cache[('day_of_row',)] = np.repeat(np.arange(len(self.dates)), np.diff(self.offsets))
+        return self.cache[('day_of_row',)]
+
+    def date_strings(self) -> List[str]:
+        """Snapshot dates as ISO strings."""
+        if ('date_strings',) not in self.cache:
+            self.cache[('date_strings',)] = np.datetime_as_string(self.dates, unit='D').tolist()
+        return self.cache[('date_strings',)]
+
+    def time_strings(self) -> Optional[List[str]]:
+        """Snapshot times as ``HH:MM`` strings, or None for daily data."""
+        if self.times is None:
+            return None
+        if ('time_strings',) not in self.cache:
+            self.cache[('time_strings',)] = [format_minute(m) for m in self.times.tolist()]
+        return self.cache[('time_strings',)]
+
+    def day_starts(self) -> np.ndarray:
+        """Index of the first snapshot of every date."""
+        if ('day_starts',) not in self.cache:
+            self.cache[('day_starts',)] = np.flatnonzero(
+                np.concatenate([[len(self.dates) > 0], self.dates[1:] != self.dates[:-1]])
+            )
+        return self.cache[('day_starts',)]
+
+    @classmethod
+    def from_records(cls, records: List[dict], symbol: Optional[str] = None) -> 'ChainFrame':
+        """Build a frame from historical_data.json style day records.
+
+        Records are sorted by date (and time, for intraday snapshots); they
+        are assumed to belong to one symbol.
+        """
+        times = [_record_time(r) for r in records]
+        intraday = any(times)
+        if intraday:
+            order = sorted(range(len(records)), key=lambda i: (records[i].get('date', '')[:10], times[i] or ''))
+            records = [records[i] for i in order]
+            times = [times[i] for i in order]
+        else:
+            records = sorted(records, key=lambda r: r.get('date', ''))
+        if symbol is None:
+            symbol = records[0].get('symbol', '') if records else ''
+
+        counts = [len(r.get('options', [])) for r in records]
+        offsets = np.zeros(len(records) + 1, dtype='int64')
+        np.cumsum(counts, out=offsets[1:])
+
+        options = [option for r in records for option in r.get('options', [])]
+        quotes = {}
+        for name, dtype in QUOTE_COLUMNS.items():
+            if name == 'optionType':
+                values = [OPTION_TYPE_CODES.get(o.get(name), -1) for o in options]
+            elif name == 'expiration':
+                values = [o.get(name) or 'NaT' for o in options]
+            elif dtype == 'int64':
+                values = [o.get(name) or 0 for o in options]
+            else:
+                values = [np.nan if o.get(name) is None else o.get(name) for o in options]
+            quotes[name] = np.array(values, dtype=dtype)
+
+        return cls(
+            symbol=symbol.upper(),
+            dates=np.array([r.get('date', '')[:10] for r in records], dtype='datetime64[D]'),
+            underlying=np.array([r.get('underlyingPrice', 0) or 0 for r in records], dtype='float64'),
+            offsets=offsets,
+            quotes=quotes,
+            times=np.array([to_minute(t or '00:00') for t in times], dtype='int16') if intraday else None
+        )
+
+    @classmethod
+    def concat(cls, frames: List['ChainFrame']) -> Optional['ChainFrame']:
+        """Concatenate frames of the same symbol in date order."""
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return None
+        if len(frames) == 1:
+            return frames[0]
+
+        offsets = [np.zeros(1, dtype='int64')]
+        base = 0
+        for frame in frames:
+            rebased = frame.offsets[1:] - frame.offsets[0] + base
+            offsets.append(rebased)
+            base = int(rebased[-1])
+
+        greeks = None
+        if all(f.greeks is not None for f in frames):
+            greeks = {
+                name: np.concatenate([
+                    f.greeks[name][f.offsets[0]:f.offsets[-1]] for f in frames
+                ])
+                for name in frames[0].greeks
+            }
+
+        times = None
+        if all(f.times is not None for f in frames):
+            times = np.concatenate([f.times for f in frames])
+
+        return cls(
+            symbol=frames[0].symbol,
+            dates=np.concatenate([f.dates for f in frames]),
+            underlying=np.concatenate([f.underlying for f in frames]),
+            offsets=np.concatenate(offsets),
+            quotes={
+                name: np.concatenate([
+                    f.quotes[name][f.offsets[0]:f.offsets[-1]] for f in frames
+                ])
+                for name in QUOTE_COLUMNS
+            },
+            greeks=greeks,
+            times=times
+        )
+
+    def slice_dates(self, start_date: str, end_date: str) -> 'ChainFrame':
+        """Return the snapshots within [start_date, end_date] as views."""
+        lo = int(np.searchsorted(self.dates, to_day(start_date), side='left'))
+        hi = int(np.searchsorted(self.dates, to_day(end_date), side='right'))
+        return self.take_days(lo, hi)
+
+    def take_days(self, lo: int, hi: int) -> 'ChainFrame':
+        """Return snapshots ``lo:hi`` as a frame whose quote arrays are views."""
+        if lo == 0 and hi == len(self.dates):
+            return self
+        row_lo, row_hi = int(self.offsets[lo]), int(self.offsets[hi])
+        return ChainFrame(
+            symbol=self.symbol,
+            dates=self.dates[lo:hi],
+            underlying=self.underlying[lo:hi],
+            offsets=self.offsets[lo:hi + 1] - row_lo,
+            quotes={name: column[row_lo:row_hi] for name, column in self.quotes.items()},
+            greeks=None if self.greeks is None else {
+                name: column[row_lo:row_hi] for name, column in self.greeks.items()
+            },
+            times=None if self.times is None else self.times[lo:hi]
+        )
+
+    def first_per_date(self) -> 'ChainFrame':
+        """Drop repeated snapshots of a date, keeping the first one."""
+        if len(self) < 2 or bool(np.all(self.dates[1:] != self.dates[:-1])):
+            return self
+        keep = np.flatnonzero(np.concatenate([[True], self.dates[1:] != self.dates[:-1]]))
+        counts = np.diff(self.offsets)[keep]
+        starts = self.offsets[keep]
+        rows = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        offsets = np.zeros(len(keep) + 1, dtype='int64')
+        np.cumsum(counts, out=offsets[1:])
+        return ChainFrame(
+            symbol=self.symbol,
+            dates=self.dates[keep],
+            underlying=self.underlying[keep],
+            offsets=offsets,
+            quotes={name: column[rows] for name, column in self.quotes.items()},
+            greeks=None if self.greeks is None else {
+                name: column[rows] for name, column in self.greeks.items()
+            },
+            times=None if self.times is None else self.times[keep]
+        )
+
+    def to_records(self) -> List[dict]:
+        """Convert the frame back to historical_data.json style day records."""
+        # Materialize each column once with tolist(), which is much faster
+        # than converting numpy scalars one at a time
+        columns = {}
+        for name, column in self.quotes.items():
+            if name == 'expiration':
+                columns[name] = np.datetime_as_string(column, unit='D').tolist()
+            elif name == 'optionType':
+                columns[name] = [OPTION_TYPES[code] if code >= 0 else None for code in column.tolist()]
+            else:
+                columns[name] = column.tolist()
+
+        names = list(columns)
+        rows = list(zip(*(columns[name] for name in names)))
+        dates = np.datetime_as_string(self.dates, unit='D').tolist()
+        times = self.time_strings()
+        underlying = self.underlying.tolist()
+        offsets = (self.offsets - self.offsets[0]).tolist()
+
+        records = []
+        for i, date in enumerate(dates):
+            options = []
+            for row in rows[offsets[i]:offsets[i + 1]]:
+                option = {}
+                for name, value in zip(names, row):
+                    if value != value:  # NaN marks a missing float field
+                        continue
+                    option[name] = value
+                options.append(option)
+            record = {
+                "date": date,
+                "symbol": self.symbol,
+                "underlyingPrice": underlying[i],
+                "options": options
+            }
+            if times is not None:
+                record["time"] = times[i]
+            records.append(record)
+        return records
+
+
+class ChainChunks:
+    """Consecutive frames of one symbol's snapshots, read lazily.
+
+    Stands in for a ChainFrame when a date range is too large to hold at
+    once (intraday data). Every iteration calls ``open_chunks`` again, which
+    yields frames of whole dates in date order; ``len()`` is the number of
+    dates.
+    """
+
+    def __init__(self, symbol: str, open_chunks: Callable[[], Iterator[ChainFrame]], num_dates: int):
+        self.symbol = symbol
+        self.open_chunks = open_chunks
+        self.num_dates = num_dates
+
+    def __iter__(self) -> Iterator[ChainFrame]:
+        return self.open_chunks()
+
+    def __len__(self) -> int:
+        return self.num_dates
+
+    @classmethod
+    def from_frame(cls, frame: ChainFrame, chunk_dates: int) -> 'ChainChunks':
+        """Split a frame into chunks of ``chunk_dates`` dates (views, not copies)."""
+        starts = frame.day_starts().tolist() + [len(frame)]
+
+        def chunks() -> Iterator[ChainFrame]:
+            for i in range(0, len(starts) - 1, chunk_dates):
+                yield frame.take_days(starts[i], starts[min(i + chunk_dates, len(starts) - 1)])
+
+        return cls(frame.symbol, chunks, len(starts) - 1)
+
+
+class ChainIndex:
+    """Lookup index over historical_data.json style day records.
+
+    Provides a date -> day map plus, per (date, expiration, optionType) and
+    per (date, optionType), option lists sorted by strike so nearest-strike
+    lookups are binary searches instead of scans over the whole chain.
+    Ties are broken by the quote's position in the original chain, matching
+    a first-match linear scan.
+    """
+
+    def __init__(self, records: List[dict]):
+        self.days: Dict[str, dict] = {}
+        for record in records:
+            # Keep the first record seen for a date
+            self.days.setdefault(record.get('date', ''), record)
+
+        self.dates: List[str] = sorted(self.days)
+        self._positions = {date: i for i, date in enumerate(self.dates)}
+        self._by_expiration: Dict[tuple, tuple] = {}
+        self._by_type: Dict[tuple, tuple] = {}
+
+        for date, record in self.days.items():
+            by_expiration = {}
+            by_type = {}
+            for position, option in enumerate(record.get('options', [])):
+                entry = (option.get('strike', 0), position, option)
+                option_type = option.get('optionType')
+                by_expiration.setdefault((option.get('expiration'), option_type), []).append(entry)
+                by_type.setdefault(option_type, []).append(entry)
+            for (expiration, option_type), entries in by_expiration.items():
+                self._by_expiration[(date, expiration, option_type)] = self._sorted(entries)
+            for option_type, entries in by_type.items():
+                self._by_type[(date, option_type)] = self._sorted(entries)
+
+    @staticmethod
+    def _sorted(entries: List[tuple]) -> tuple:
+        entries.sort(key=lambda e: (e[0], e[1]))
+        return (
+            [e[0] for e in entries],
+            [e[1] for e in entries],
+            [e[2] for e in entries]
+        )
+
+    def day(self, date: str) -> Optional[dict]:
+        """Return the day record for a date, or None."""
+        return self.days.get(date)
+
+    def position(self, date: str) -> int:
+        """Return the position of a date among sorted trading dates, or -1."""
+        return self._positions.get(date, -1)
+
+    def next_date(self, date: str) -> Optional[str]:
+        """Return the trading date after ``date``, or None if it is the last."""
+        position = self.position(date)
+        if 0 <= position < len(self.dates) - 1:
+            return self.dates[position + 1]
+        return None
+
+    def _strikes(self, date: str, option_type: str, expiration: Optional[str]) -> Optional[tuple]:
+        if expiration is None:
+            return self._by_type.get((date, option_type))
+        return self._by_expiration.get((date, expiration, option_type))
+
+    def nearest(
+        self,
+        date: str,
+        target_strike: float,
+        option_type: str,
+        expiration: Optional[str] = None,
+        tolerance: Optional[float] = None
+    ) -> Optional[dict]:
+        """Find the option whose strike is nearest to ``target_strike``.
+
+        Restricts to ``expiration`` when given (any expiration otherwise) and
+        to strikes within ``tolerance`` when given.
+        """
+        indexed = self._strikes(date, option_type, expiration)
+        if not indexed:
+            return None
+        strikes, positions, options = indexed
+
+        i = bisect_left(strikes, target_strike)
+        candidates = []
+        if i > 0:
+            # First quote of the run of equal strikes just below the target
+            candidates.append(bisect_left(strikes, strikes[i - 1]))
+        if i < len(strikes):
+            candidates.append(i)
+
+        best = None
+        best_key = None
+        for c in candidates:
+            key = (abs(strikes[c] - target_strike), positions[c])
+            if best_key is None or key < best_key:
+                best, best_key = c, key
+
+        if tolerance is not None and best_key[0] > tolerance:
+            return None
+        return options[best]
+
+    def first_within(self, date: str, target_strike: float, option_type: str, tolerance: float) -> Optional[dict]:
+        """Find the first option (in chain order) with a strike within ``tolerance``."""
+        indexed = self._strikes(date, option_type, None)
+        if not indexed:
+            return None
+        strikes, positions, options = indexed
+
+        lo = bisect_left(strikes, target_strike - tolerance)
+        hi = bisect_right(strikes, target_strike + tolerance)
+        matches = [c for c in range(lo, hi) if abs(strikes[c] - target_strike) <= tolerance]
+        if not matches:
+            return None
+        return options[min(matches, key=lambda c: positions[c])]
@@ -0,0 +1,79 @@
+"""Backtest performance metrics computed from a daily equity curve.
+
+The equity curve is the capital after each trading day, kept as a float
+array by the backtest engine, so every metric is a handful of numpy
+reductions rather than a pass over the trade list.
+"""
+from typing import List, Sequence
+
+import numpy as np
+
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+def daily_returns(initial_capital: float, equity: np.ndarray) -> np.ndarray:
+    """Fractional return of each day relative to the previous day's capital."""
+    curve = np.concatenate([[initial_capital], equity])
+    previous = curve[:-1]
+    # A day starting with no (or negative) capital has no meaningful return
+    return np.divide(np.diff(curve), previous, out=np.zeros(len(equity)), where=previous > 0)
+
+
+def performance_metrics(initial_capital: float, equity: Sequence[float]) -> dict:
+    """Calculate summary performance metrics from a daily equity curve.
+
+    ``equity`` holds the capital at the end of each trading day. Drawdown,
+    return and win rate are percentages; Sharpe and Sortino are annualized.
+    """
+    equity = np.asarray(equity, dtype='float64')
+    final_capital = float(equity[-1]) if equity.size else initial_capital
+    total_return = ((final_capital - initial_capital) / initial_capital) * 100 if initial_capital > 0 else 0
+
+    if equity.size == 0:
+        return {
+            "totalReturn": total_return,
+            "maxDrawdown": 0.0,
+            "sharpeRatio": 0.0,
+            "sortinoRatio": 0.0,
+            "winRate": 0.0,
+            "avgDailyPnl": 0.0
+        }
+
+    curve = np.concatenate([[initial_capital], equity])
+    pnl = np.diff(curve)
+
+    # Largest peak-to-trough decline, as a (negative) percentage of the peak
+    peaks = np.maximum.accumulate(curve)
+    drawdowns = np.divide(curve - peaks, peaks, out=np.zeros(len(curve)), where=peaks > 0)
+    max_drawdown = float(drawdowns.min()) * 100
+
+    returns = daily_returns(initial_capital, equity)
+    mean_return = returns.mean()
+    annualize = np.sqrt(TRADING_DAYS_PER_YEAR)
+
+    volatility = returns.std(ddof=1) if returns.size > 1 else 0.0
+    sharpe_ratio = float(mean_return / volatility * annualize) if volatility > 0 else 0.0
+
+    # Sortino only penalizes downside deviation
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+    sortino_ratio = float(mean_return / downside * annualize) if downside > 0 else 0.0
+
+    return {
+        "totalReturn": total_return,
+        "maxDrawdown": max_drawdown,
+        "sharpeRatio": sharpe_ratio,
+        "sortinoRatio": sortino_ratio,
+        "winRate": float(np.count_nonzero(pnl > 0)) / pnl.size * 100,
+        "avgDailyPnl": float(pnl.mean())
+    }
+
+
+def equity_curve(dates: List[str], initial_capital: float, equity: Sequence[float]) -> List[dict]:
+    """Pair each date with its closing equity and that day's P&L."""
+    equity = np.asarray(equity, dtype='float64')
+    pnl = np.diff(np.concatenate([[initial_capital], equity]))
+    return [
+        {"date": date, "equity": value, "pnl": change}
+        for date, value, change in zip(dates, equity.tolist(), pnl.tolist())
+    ]
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Callable, Iterator, List, Optional
 
 
 class Strategy(ABC):
@@ -66,7 +66,10 @@ class Strategy(ABC):
         start_date: str,
         end_date: str,
         initial_capital: float,
-        historical_data: List[dict]
+        historical_data: List[dict],
+        progress: Optional[Callable[[int, int], None]] = None,
+        entry_time: Optional[str] = None,
+        exit_time: Optional[str] = None
     ) -> dict:
         """Run backtest simulation with historical data.
         
@@ -74,13 +77,66 @@ class Strategy(ABC):
             start_date: Start date of backtest period (ISO format)
             end_date: End date of backtest period (ISO format)
             initial_capital: Starting capital for backtest
-            historical_data: List of historical price data dicts with date, price, etc.
+            historical_data: List of historical price data dicts with date, price, etc.,
+                or a ChainFrame holding the same data in columnar form (use
+                models.greeks.chain_greeks(frame) for per-quote IV and greeks,
+                which are precomputed for frames from the chain store). Intraday
+                data may come as a ChainChunks, read one chunk of dates at a time
+            progress: Optional callback invoked as progress(done_days, total_days);
+                it may raise to abort the run
+            entry_time: Time of day (HH:MM) to open positions on intraday data
+            exit_time: Time of day (HH:MM) to close them on intraday data
         
         Returns:
-            Dictionary matching BacktestResult schema format
+            Dictionary matching BacktestResult schema format, with the trades
+            as a models.trade_log.TradeLog
         """
         pass
     
+    def stream_backtest(
+        self,
+        start_date: str,
+        end_date: str,
+        initial_capital: float,
+        historical_data: List[dict],
+        entry_time: Optional[str] = None,
+        exit_time: Optional[str] = None
+    ) -> Iterator[dict]:
+        """Run a backtest and return an iterator of per-day results.
+        
+        Each item has the day's ``date``, its ``trades``, the running
+        ``capital`` and the fraction of the run completed (``progress``).
+        This default runs the whole backtest and then groups its trades by
+        date; strategies whose engine produces days incrementally override it.
+        """
+        result = self.backtest(start_date, end_date, initial_capital, historical_data,
+                               entry_time=entry_time, exit_time=exit_time)
+        
+        by_date = {}
+        for trade in result['trades'].to_trades():
+            by_date.setdefault(trade['date'], []).append(trade)
+        
+        def days() -> Iterator[dict]:
+            capital = initial_capital
+            for number, date in enumerate(sorted(by_date), start=1):
+                capital += sum(trade['pnl'] for trade in by_date[date])
+                yield {
+                    "date": date,
+                    "trades": by_date[date],
+                    "capital": capital,
+                    "progress": number / len(by_date)
+                }
+        
+        return days()
+    
+    def extend_backtest(self, result: dict, end_date: str, historical_data: List[dict]) -> dict:
+        """Extend a stored backtest result to a later end date.
+        
+        Strategies whose days are independent override this to simulate only
+        the new days; by default results cannot be extended.
+        """
+        raise ValueError(f"{self.strategy_type} {self.expiration} backtests cannot be extended; run a new backtest")
+    
     @abstractmethod
     def to_dict(self) -> dict:
         """Convert strategy instance to dictionary format for storage."""
@@ -0,0 +1,361 @@
+"""Columnar trade log of a backtest result.
+
+A 0DTE run books eight trades a day; as dicts (each with its own ``option``
+sub-dict) a ten-year run is some 20k small objects held in memory, pickled
+back from the worker pool and written to disk. ``TradeLog`` keeps them as
+parallel typed arrays instead: an index into a table of (date, time)
+stamps, the option type, the action and the strike, premium, price and
+P&L. Symbol, expiration and quantity are the same for every trade of a
+strategy and are stored once.
+
+Results carry a TradeLog under ``trades``; the public ``Trade`` dicts are
+built only at the API edge with ``to_trades``, optionally for a slice.
+Stored results keep the compact ``to_json`` form.
+"""
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .option_chain import OPTION_TYPES, OPTION_TYPE_CODES
+
+ACTIONS = ('buy', 'sell')
+ACTION_CODES = {name: code for code, name in enumerate(ACTIONS)}
+
+# Orders trades can be sorted in; 'seq' is booking order
+SORT_FIELDS = ('seq', 'date', 'strike', 'premium', 'price', 'pnl')
+
+
+def _array(values: Sequence[Optional[float]]) -> np.ndarray:
+    """Float column from a list, with None (a missing value) as NaN."""
+    return np.array([np.nan if v is None else v for v in values], dtype='float64')
+
+
+def _floats(column: np.ndarray) -> list:
+    """Column as a list, with NaN (a missing value) as None."""
+    values = column.tolist()
+    if np.isnan(column).any():
+        values = [None if v != v else v for v in values]
+    return values
+
+
+class TradeLog:
+    """Trades of one backtest as parallel arrays, in booking order."""
+
+    __slots__ = ('symbol', 'expiration', 'quantity', 'dates', 'times',
+                 'stamp', 'option_type', 'action', 'strike', 'premium', 'price', 'pnl')
+
+    def __init__(
+        self,
+        symbol: str,
+        expiration: str,
+        quantity: int,
+        dates: List[str],
+        times: Optional[List[str]],
+        stamp: np.ndarray,
+        option_type: np.ndarray,
+        action: np.ndarray,
+        strike: np.ndarray,
+        premium: np.ndarray,
+        price: np.ndarray,
+        pnl: np.ndarray
+    ):
+        self.symbol = symbol
+        self.expiration = expiration
+        self.quantity = quantity
+        # Table of trade stamps; ``stamp`` indexes it (times only for intraday runs)
+        self.dates = dates
+        self.times = times
+        self.stamp = stamp
+        self.option_type = option_type
+        self.action = action
+        self.strike = strike
+        self.premium = premium
+        self.price = price
+        self.pnl = pnl
+
+    def __len__(self) -> int:
+        return len(self.stamp)
+
+    @classmethod
+    def from_columns(
+        cls,
+        symbol: str,
+        expiration: str,
+        quantity: int,
+        dates: Sequence[str],
+        times: Optional[Sequence[str]],
+        option_types: Sequence[Optional[str]],
+        actions: Sequence[str],
+        strike: Sequence[Optional[float]],
+        premium: Sequence[Optional[float]],
+        price: Sequence[Optional[float]],
+        pnl: Sequence[Optional[float]]
+    ) -> 'TradeLog':
+        """Build a log from per-trade values (``dates`` and ``times`` per trade too)."""
+        stamps = list(zip(dates, times)) if times is not None else [(date, None) for date in dates]
+        table = sorted(set(stamps))
+        position = {key: i for i, key in enumerate(table)}
+
+        return cls(
+            symbol=symbol,
+            expiration=expiration,
+            quantity=quantity,
+            dates=[date for date, _ in table],
+            times=[time for _, time in table] if times is not None else None,
+            stamp=np.array([position[key] for key in stamps], dtype='int32'),
+            option_type=np.array([OPTION_TYPE_CODES.get(t, -1) for t in option_types], dtype='int8'),
+            action=np.array([ACTION_CODES[a] for a in actions], dtype='int8'),
+            strike=_array(strike),
+            premium=_array(premium),
+            price=_array(price),
+            pnl=_array(pnl)
+        )
+
+    @classmethod
+    def from_trades(
+        cls,
+        trades: List[dict],
+        symbol: Optional[str] = None,
+        expiration: Optional[str] = None,
+        quantity: Optional[int] = None
+    ) -> 'TradeLog':
+        """Build a log from public trade dicts (the loop engine, older stored results).
+
+        Symbol, expiration and quantity default to those of the first trade.
+        """
+        first = trades[0]['option'] if trades else {}
+        options = [trade['option'] for trade in trades]
+        intraday = any('time' in trade for trade in trades)
+        return cls.from_columns(
+            symbol=symbol if symbol is not None else first.get('symbol', ''),
+            expiration=expiration if expiration is not None else first.get('expiration', ''),
+            quantity=quantity if quantity is not None else first.get('quantity', 0),
+            dates=[trade['date'] for trade in trades],
+            times=[trade.get('time', '') for trade in trades] if intraday else None,
+            option_types=[option.get('optionType') for option in options],
+            actions=[trade['action'] for trade in trades],
+            strike=[option.get('strike') for option in options],
+            premium=[option.get('premium') for option in options],
+            price=[trade['price'] for trade in trades],
+            pnl=[trade['pnl'] for trade in trades]
+        )
+
+    @classmethod
+    def from_leg_results(cls, results, symbol: str, expiration: str) -> 'TradeLog':
+        """Build the log of a vectorized run straight from its LegResults arrays.
+
+        Each entry day books its entry legs, then its exit legs.
+        """
+        num_days, num_legs = results.entry_price.shape
+        codes = np.array([OPTION_TYPE_CODES[leg.option_type] for leg in results.legs], dtype='int8')
+        opens = np.array([ACTION_CODES[leg.action] for leg in results.legs], dtype='int8')
+
+        def per_trade(entry: np.ndarray, exit: np.ndarray) -> np.ndarray:
+            # (days, legs) entry and exit values -> one value per trade
+            return np.concatenate([entry, exit], axis=1).ravel()
+
+        stamp = per_trade(np.repeat(results.entry_days[:, None], num_legs, axis=1),
+                          np.repeat(results.exit_days[:, None], num_legs, axis=1))
+        # Only the stamps that trades refer to are kept
+        used, stamp = np.unique(stamp, return_inverse=True)
+        used = used.tolist()
+        return cls(
+            symbol=symbol,
+            expiration=expiration,
+            quantity=results.quantity,
+            dates=[results.dates[i] for i in used],
+            times=[results.times[i] for i in used] if results.times is not None else None,
+            stamp=stamp.astype('int32'),
+            option_type=np.tile(codes, 2 * num_days),
+            action=np.tile(np.concatenate([opens, 1 - opens]), num_days),
+            strike=per_trade(results.entry_strike, results.entry_strike),
+            premium=per_trade(results.entry_price, results.entry_price),
+            price=per_trade(results.entry_price, results.exit_price),
+            pnl=per_trade(results.entry_pnl, results.exit_pnl)
+        )
+
+    @classmethod
+    def concat(cls, parts: List['TradeLog']) -> 'TradeLog':
+        """Join logs of the same strategy, merging their stamp tables."""
+        first = parts[0]
+        intraday = first.times is not None
+        table = sorted({
+            stamp for part in parts
+            for stamp in zip(part.dates, part.times if intraday else [None] * len(part.dates))
+        })
+        position = {key: i for i, key in enumerate(table)}
+        stamps = []
+        for part in parts:
+            keys = zip(part.dates, part.times if intraday else [None] * len(part.dates))
+            remap = np.array([position[key] for key in keys], dtype='int32')
+            stamps.append(remap[part.stamp])
+        return cls(
+            symbol=first.symbol,
+            expiration=first.expiration,
+            quantity=first.quantity,
+            dates=[date for date, _ in table],
+            times=[time for _, time in table] if intraday else None,
+            stamp=np.concatenate(stamps).astype('int32'),
+            option_type=np.concatenate([p.option_type for p in parts]),
+            action=np.concatenate([p.action for p in parts]),
+            strike=np.concatenate([p.strike for p in parts]),
+            premium=np.concatenate([p.premium for p in parts]),
+            price=np.concatenate([p.price for p in parts]),
+            pnl=np.concatenate([p.pnl for p in parts])
+        )
+
+    def take(self, rows: Union[slice, np.ndarray]) -> 'TradeLog':
+        """The trades at ``rows`` (a slice or positions), sharing this log's stamp table."""
+        return TradeLog(
+            self.symbol, self.expiration, self.quantity, self.dates, self.times,
+            self.stamp[rows], self.option_type[rows], self.action[rows],
+            self.strike[rows], self.premium[rows], self.price[rows], self.pnl[rows]
+        )
+
+    def head(self, count: int) -> 'TradeLog':
+        """The first ``count`` trades."""
+        return self.take(slice(None, count))
+
+    def stamp_strings(self) -> np.ndarray:
+        """Each table stamp as one sortable string: the date, or "date time"."""
+        if self.times is None:
+            return np.array(self.dates, dtype=str)
+        return np.array([f"{date} {time}" for date, time in zip(self.dates, self.times)], dtype=str)
+
+    def sort_keys(self, sort_by: str) -> np.ndarray:
+        """Per-trade key of a SORT_FIELDS order (stamp strings for 'date')."""
+        if sort_by == 'seq':
+            return np.arange(len(self))
+        if sort_by == 'date':
+            return self.stamp_strings()[self.stamp]
+        return getattr(self, sort_by)
+
+    def query(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        option_type: Optional[str] = None,
+        action: Optional[str] = None,
+        sort_by: str = 'seq',
+        descending: bool = False
+    ) -> np.ndarray:
+        """Positions of the trades matching every given filter, in sort order.
+
+        Dates are inclusive ISO dates. Ties (and the 'seq' order itself)
+        follow booking order.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if start_date is not None or end_date is not None:
+            # The stamp table is in date order, so a date range is a range of stamps
+            dates = np.array(self.dates, dtype=str)
+            lo = np.searchsorted(dates, start_date, side='left') if start_date is not None else 0
+            hi = np.searchsorted(dates, end_date, side='right') if end_date is not None else len(dates)
+            mask &= (self.stamp >= lo) & (self.stamp < hi)
+        if option_type is not None:
+            mask &= self.option_type == OPTION_TYPE_CODES[option_type]
+        if action is not None:
+            mask &= self.action == ACTION_CODES[action]
+
+        rows = np.flatnonzero(mask)
+        keys = self.sort_keys(sort_by)[rows]
+        if descending:
+            return rows[np.lexsort((-rows, keys))[::-1]]
+        return rows[np.lexsort((rows, keys))]
+
+    def columns(self, start: int = 0, stop: Optional[int] = None) -> Dict[str, list]:
+        """Per-trade values of trades ``start:stop`` as plain lists, keyed by public field name."""
+        window = slice(start, stop)
+        stamp = self.stamp[window].tolist()
+        columns = {"date": [self.dates[i] for i in stamp]}
+        if self.times is not None:
+            columns["time"] = [self.times[i] for i in stamp]
+        columns.update({
+            "action": [ACTIONS[code] for code in self.action[window].tolist()],
+            "optionType": [OPTION_TYPES[code] if code >= 0 else None for code in self.option_type[window].tolist()],
+            "strike": _floats(self.strike[window]),
+            "premium": _floats(self.premium[window]),
+            "price": _floats(self.price[window]),
+            "pnl": _floats(self.pnl[window])
+        })
+        return columns
+
+    def to_trades(self, start: int = 0, stop: Optional[int] = None) -> List[dict]:
+        """Public Trade dicts for trades ``start:stop`` (all by default)."""
+        columns = self.columns(start, stop)
+        times = columns.get("time")
+        trades = []
+        for i, date in enumerate(columns["date"]):
+            trade = {"date": date}
+            if times is not None:
+                trade["time"] = times[i]
+            trade.update({
+                "action": columns["action"][i],
+                "option": {
+                    "symbol": self.symbol,
+                    "strike": columns["strike"][i],
+                    "expiration": self.expiration,
+                    "optionType": columns["optionType"][i],
+                    "premium": columns["premium"][i],
+                    "quantity": self.quantity
+                },
+                "price": columns["price"][i],
+                "pnl": columns["pnl"][i]
+            })
+            trades.append(trade)
+        return trades
+
+    def to_json(self) -> dict:
+        """Compact JSON form for storage (codes index ACTIONS and OPTION_TYPES)."""
+        data = {
+            "symbol": self.symbol,
+            "expiration": self.expiration,
+            "quantity": self.quantity,
+            "dates": self.dates,
+            "stamp": self.stamp.tolist(),
+            "optionType": self.option_type.tolist(),
+            "action": self.action.tolist(),
+            "strike": _floats(self.strike),
+            "premium": _floats(self.premium),
+            "price": _floats(self.price),
+            "pnl": _floats(self.pnl)
+        }
+        if self.times is not None:
+            data["times"] = self.times
+        return data
+
+    @classmethod
+    def from_json(cls, data: Union[dict, List[dict]]) -> 'TradeLog':
+        """Read ``to_json`` output, or the list of trade dicts older results stored."""
+        if isinstance(data, list):
+            return cls.from_trades(data)
+
+        return cls(
+            symbol=data["symbol"],
+            expiration=data["expiration"],
+            quantity=data["quantity"],
+            dates=data["dates"],
+            times=data.get("times"),
+            stamp=np.array(data["stamp"], dtype='int32'),
+            option_type=np.array(data["optionType"], dtype='int8'),
+            action=np.array(data["action"], dtype='int8'),
+            strike=_array(data["strike"]),
+            premium=_array(data["premium"]),
+            price=_array(data["price"]),
+            pnl=_array(data["pnl"])
+        )
+
+
+def encode_result(result: dict) -> dict:
+    """A backtest result with its TradeLog in JSON form, ready to be stored."""
+    trades = result.get('trades')
+    if isinstance(trades, TradeLog):
+        return {**result, 'trades': trades.to_json()}
+    return result
+
+
+def decode_result(record: dict) -> dict:
+    """A stored backtest result with its trades read back into a TradeLog."""
+    trades = record.get('trades')
+    if trades is not None and not isinstance(trades, TradeLog):
+        record['trades'] = TradeLog.from_json(trades)
+    return record
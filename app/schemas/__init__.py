@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Union
 
 
 class IronCondorLegs(BaseModel):
@@ -47,6 +47,7 @@ class Option(BaseModel):
 
 class Trade(BaseModel):
     date: str
+    time: Optional[str] = None  # HH:MM, intraday backtests only
     action: str  # 'buy' | 'sell'
     option: Option
     price: float
@@ -57,6 +58,47 @@ class BacktestRequest(BaseModel):
     startDate: str
     endDate: str
     initialCapital: float
+    # Times of day (HH:MM) to open and close 0DTE positions on intraday data
+    entryTime: Optional[str] = None
+    exitTime: Optional[str] = None
+
+
+class BatchBacktestRequest(BaseModel):
+    strategyIds: Union[List[str], str] = "all"  # list of ids | 'all'
+    startDate: str
+    endDate: str
+    initialCapital: float
+    entryTime: Optional[str] = None
+    exitTime: Optional[str] = None
+    save: bool = False  # also store each full result (with trades)
+
+
+class PortfolioBacktestRequest(BaseModel):
+    strategyIds: List[str]  # 0DTE Iron Condors; earlier ids open first when margin runs short
+    startDate: str
+    endDate: str
+    initialCapital: float  # one account shared by all strategies
+    marginLimit: float = 1.0  # share of equity that open positions' margin may use
+    entryTime: Optional[str] = None
+    exitTime: Optional[str] = None
+
+
+class ExtendBacktestRequest(BaseModel):
+    endDate: str  # new end date, later than the stored result's
+
+
+class MonteCarloRequest(BaseModel):
+    paths: int = 10000
+    blockSize: int = 1  # days per resampled block; 1 draws days independently
+    confidence: float = 0.95  # width of the reported confidence intervals
+    bins: int = 30  # histogram bins per metric
+    seed: Optional[int] = None  # fixes the resamples, for reproducible runs
+
+
+class EquityPoint(BaseModel):
+    date: str
+    equity: float
+    pnl: float
 
 
 class BacktestResult(BaseModel):
@@ -69,6 +111,76 @@ class BacktestResult(BaseModel):
     totalReturn: float
     maxDrawdown: float
     sharpeRatio: float
-    trades: List[Trade]
+    sortinoRatio: Optional[float] = None
+    winRate: Optional[float] = None
+    avgDailyPnl: Optional[float] = None
+    equityCurve: Optional[List[EquityPoint]] = None
+    entryTime: Optional[str] = None
+    exitTime: Optional[str] = None
+    tradeCount: Optional[int] = None  # all trades, also when paged or left out
+    trades: Optional[List[Trade]] = None  # left out for ?summary=true, paged with ?offset=&limit=
     createdAt: str
 
+
+class PagedTrade(Trade):
+    seq: int  # position in the backtest's booking order
+
+
+class TradePage(BaseModel):
+    backtestId: str
+    tradeCount: int  # trades matching the filters
+    trades: List[PagedTrade]
+    nextCursor: Optional[str] = None  # pass as ?cursor= for the next page; None on the last
+
+
+
+class ParameterRange(BaseModel):
+    start: float
+    end: float
+    step: float
+
+
+class IronCondorLegRanges(BaseModel):
+    longPut: ParameterRange
+    shortPut: ParameterRange
+    shortCall: ParameterRange
+    longCall: ParameterRange
+
+
+class SweepRequest(BaseModel):
+    symbol: str
+    strategy: str = 'Iron Condor'
+    legs: IronCondorLegRanges
+    quantities: List[int] = [1]
+    expirations: List[str] = ['0DTE']
+    startDate: str
+    endDate: str
+    initialCapital: float
+    rankBy: str = 'totalReturn'  # 'totalReturn' | 'sharpeRatio' | 'maxDrawdown'
+    limit: Optional[int] = 50
+
+
+class WalkForwardRequest(BaseModel):
+    symbol: str
+    legs: IronCondorLegRanges  # 0DTE Iron Condor deltas searched in each in-sample window
+    quantity: int = 1
+    startDate: str
+    endDate: str
+    initialCapital: float
+    inSampleDays: int = 250  # trading days each configuration is chosen on
+    outOfSampleDays: int = 60  # trading days it is then traded on; windows roll by this much
+    rankBy: str = 'sharpeRatio'  # 'totalReturn' | 'sharpeRatio' | 'maxDrawdown'
+    entryTime: Optional[str] = None
+    exitTime: Optional[str] = None
+
+
+class SweepResult(BaseModel):
+    rank: int
+    legs: IronCondorLegs
+    quantity: int
+    expiration: str
+    finalCapital: float
+    totalReturn: float
+    maxDrawdown: float
+    sharpeRatio: float
+    tradeCount: int
@@ -1,5 +1,6 @@
 # Services package
 from . import strategy_service
+from . import optimization_service
 
-__all__ = ['strategy_service']
+__all__ = ['strategy_service', 'optimization_service']
 
@@ -0,0 +1,376 @@
+"""Append-only log of backtest results with an id -> offset index.
+
+Layout on disk::
+
+    backtests/
+      segment-000001.jsonl   one compact JSON result per line
+      segment-000002.jsonl   (a new segment starts past SEGMENT_MAX_BYTES)
+      index.tsv              backtestId <TAB> segment <TAB> offset <TAB> length [<TAB> trades offset]
+
+Saving a result appends one line to the newest segment and one line to the
+index, so its cost no longer grows with the number of stored results. The
+index is loaded into memory once; a lookup seeks straight to its record.
+A later record with the same backtestId supersedes the earlier one.
+
+Several processes (uvicorn workers, the batch CLI) may share one log.
+Appends hold an exclusive lock on ``backtests.lock`` beside the directory,
+and every lookup first reads any index lines other processes appended.
+
+Trades are stored in the columnar form of models.trade_log (older records
+keep a list of trade dicts; both are read back as a TradeLog). They are
+written last in each record, and the index notes where they start, so
+``get_trades`` reads and parses only them.
+
+Results in the legacy backtests.json are imported the first time the log is
+opened. Superseded records are dropped by compaction; run it with the API
+stopped::
+
+    python -m services.backtest_log compact [--keep-last N]
+"""
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models.trade_log import TradeLog, decode_result, encode_result
+from . import metrics
+from .file_service import locked, read_json_file
+
+# File paths
+DATA_DIR = os.environ.get("OPTIONBOT_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
+BACKTESTS_DIR = os.path.join(DATA_DIR, "backtests")
+LEGACY_BACKTESTS_FILE = os.path.join(DATA_DIR, "backtests.json")
+INDEX_NAME = "index.tsv"
+# Label of the segment files in the file I/O metrics
+METRICS_NAME = "backtests"
+
+# Size at which appends roll over to a new segment file
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _segment_name(number: int) -> str:
+    return f"segment-{number:06d}.jsonl"
+
+
+def _encode(record: dict) -> Tuple[bytes, Optional[int]]:
+    """Return a record's line and the offset of its trades within it (None without trades)."""
+    record = encode_result(record)
+    if 'trades' not in record:
+        return json.dumps(record, separators=(',', ':')).encode() + b'\n', None
+    rest = {k: v for k, v in record.items() if k != 'trades'}
+    head = json.dumps(rest, separators=(',', ':')).encode()[:-1] + (b',"trades":' if rest else b'"trades":')
+    trades = json.dumps(record['trades'], separators=(',', ':')).encode()
+    return head + trades + b'}\n', len(head)
+
+
+class BacktestLog:
+    """Backtest results stored in append-only segment files."""
+
+    def __init__(self, directory: str = BACKTESTS_DIR, legacy_file: Optional[str] = LEGACY_BACKTESTS_FILE):
+        self.directory = directory
+        self.legacy_file = legacy_file
+        self._lock = threading.Lock()
+        # backtestId -> (segment number, byte offset, byte length)
+        self._index: Optional[Dict[str, Tuple[int, int, int]]] = None
+        # backtestId -> offset of the trades within its record, where known
+        self._trades_at: Dict[str, int] = {}
+        # Inode and bytes of the index.tsv read into self._index
+        self._index_file: Optional[int] = None
+        self._index_size = 0
+        self._file_locked = False
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the log's file lock (reentrant; called with self._lock held).
+
+        Serializes writers across processes (API workers, the batch CLI);
+        readers only ever consume complete index lines and need no lock.
+        """
+        if self._file_locked:
+            yield
+            return
+        with locked(self.directory + '.lock'):
+            self._file_locked = True
+            try:
+                yield
+            finally:
+                self._file_locked = False
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segments(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith('segment-') and name.endswith('.jsonl'):
+                numbers.append(int(name[len('segment-'):-len('.jsonl')]))
+        return sorted(numbers)
+
+    def _open(self) -> Dict[str, Tuple[int, int, int]]:
+        # Called with self._lock held
+        if self._index is not None:
+            self._refresh()
+            return self._index
+
+        with self._locked():
+            if not os.path.isdir(self.directory):
+                self._create()
+
+            index_path = self._path(INDEX_NAME)
+            try:
+                with open(index_path, 'rb') as f:
+                    data = f.read()
+            except IOError:
+                data = b''
+            if not data.endswith(b'\n'):
+                # Drop a torn final index line; the segment scan below re-indexes it
+                data = data[:data.rfind(b'\n') + 1]
+                if os.path.exists(index_path):
+                    os.truncate(index_path, len(data))
+
+            self._index = {}
+            self._trades_at = {}
+            self._index_file = self._index_inode()
+            self._index_size = len(data)
+            covered = self._load_index(data)
+
+            # Recover records appended after the last index write (e.g. a crash)
+            for segment in self._segments():
+                self._scan(segment, covered.get(segment, 0))
+        return self._index
+
+    def _load_index(self, data: bytes) -> Dict[int, int]:
+        """Apply index lines; return the end of the indexed bytes of each segment."""
+        covered: Dict[int, int] = {}
+        for line in data.decode().splitlines():
+            backtest_id, segment, offset, length, *rest = line.split('\t')
+            segment, offset, length = int(segment), int(offset), int(length)
+            self._index[backtest_id] = (segment, offset, length)
+            if rest:
+                self._trades_at[backtest_id] = int(rest[0])
+            else:
+                self._trades_at.pop(backtest_id, None)
+            covered[segment] = max(covered.get(segment, 0), offset + length)
+        return covered
+
+    def _index_inode(self) -> Optional[int]:
+        try:
+            return os.stat(self._path(INDEX_NAME)).st_ino
+        except OSError:
+            return None
+
+    def _refresh(self) -> None:
+        """Pick up records that other processes appended since the index was read."""
+        try:
+            stat = os.stat(self._path(INDEX_NAME))
+        except OSError:
+            stat = None
+        if stat is None and self._index_file is None:
+            return
+        if stat is None or stat.st_ino != self._index_file or stat.st_size < self._index_size:
+            # Compacted by another process: read the new log from scratch
+            self._index = None
+            self._open()
+            return
+        size = stat.st_size
+        if size == self._index_size:
+            return
+        with open(self._path(INDEX_NAME), 'rb') as f:
+            f.seek(self._index_size)
+            data = f.read(size - self._index_size)
+        # A line still being written is read on a later refresh
+        data = data[:data.rfind(b'\n') + 1]
+        self._load_index(data)
+        self._index_size += len(data)
+
+    def _create(self) -> None:
+        # Build the new log (importing the legacy file) beside its final
+        # location, so a crash never leaves a half-migrated log behind
+        tmp = BacktestLog(self.directory + '.tmp', legacy_file=None)
+        shutil.rmtree(tmp.directory, ignore_errors=True)
+        os.makedirs(tmp.directory)
+        tmp._index = {}
+        if self.legacy_file and os.path.exists(self.legacy_file):
+            for record in read_json_file(self.legacy_file):
+                if record.get('backtestId'):
+                    tmp._append(record)
+        os.replace(tmp.directory, self.directory)
+
+    def _scan(self, segment: int, start: int) -> None:
+        path = self._path(_segment_name(segment))
+        if os.path.getsize(path) <= start:
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn write: cut it off so the next append starts cleanly
+                    os.truncate(path, offset)
+                    break
+                try:
+                    backtest_id = json.loads(line).get('backtestId')
+                except ValueError:
+                    backtest_id = None
+                if backtest_id:
+                    self._index_entry(backtest_id, segment, offset, len(line))
+                offset += len(line)
+
+    def _index_entry(self, backtest_id: str, segment: int, offset: int, length: int,
+                     trades_at: Optional[int] = None) -> None:
+        # Called with the file lock held, so no other process appends in between
+        if trades_at is None:
+            line = f"{backtest_id}\t{segment}\t{offset}\t{length}\n".encode()
+            self._trades_at.pop(backtest_id, None)
+        else:
+            line = f"{backtest_id}\t{segment}\t{offset}\t{length}\t{trades_at}\n".encode()
+            self._trades_at[backtest_id] = trades_at
+        with open(self._path(INDEX_NAME), 'ab') as f:
+            f.write(line)
+        if self._index_file is None:
+            self._index_file = self._index_inode()
+        self._index_size += len(line)
+        self._index[backtest_id] = (segment, offset, length)
+
+    def _append(self, record: dict) -> None:
+        # Called with self._lock and the file lock held, after a refresh
+        data, trades_at = _encode(record)
+        segments = self._segments()
+        segment = segments[-1] if segments else 1
+        path = self._path(_segment_name(segment))
+        if os.path.exists(path) and os.path.getsize(path) + len(data) > SEGMENT_MAX_BYTES:
+            segment += 1
+            path = self._path(_segment_name(segment))
+
+        started = time.perf_counter()
+        with open(path, 'ab') as f:
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        metrics.file_io('write', METRICS_NAME, len(data), time.perf_counter() - started)
+        self._index_entry(record['backtestId'], segment, offset, len(data), trades_at)
+
+    def append(self, record: dict) -> None:
+        """Append a backtest result (it must have a ``backtestId``)."""
+        with self._lock, self._locked():
+            self._open()
+            self._append(record)
+
+    def get(self, backtest_id: str) -> Optional[dict]:
+        """Read one result by id, or None if it is not stored."""
+        with self._lock:
+            entry = self._open().get(backtest_id)
+        if entry is None:
+            return None
+        segment, offset, length = entry
+        return decode_result(json.loads(self._read(segment, offset, length)))
+
+    def _read(self, segment: int, offset: int, length: int) -> bytes:
+        started = time.perf_counter()
+        with open(self._path(_segment_name(segment)), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        metrics.file_io('read', METRICS_NAME, len(data), time.perf_counter() - started)
+        return data
+
+    def get_trades(self, backtest_id: str) -> Optional[TradeLog]:
+        """Read only the trades of one result, or None if it is not stored."""
+        with self._lock:
+            entry = self._open().get(backtest_id)
+            trades_at = self._trades_at.get(backtest_id)
+        if entry is None:
+            return None
+        if trades_at is None:
+            # Indexed before trades offsets were recorded
+            record = self.get(backtest_id)
+            return record.get('trades') if record is not None else None
+        segment, offset, length = entry
+        # The trades run to the record's closing brace and newline
+        return TradeLog.from_json(json.loads(self._read(segment, offset + trades_at, length - trades_at - 2)))
+
+    def ids(self) -> List[str]:
+        """Ids of all stored results, oldest first."""
+        with self._lock:
+            return list(self._open())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._open())
+
+    def __iter__(self) -> Iterator[dict]:
+        """Iterate the current version of every result, in log order."""
+        with self._lock:
+            entries = set(self._open().values())
+            segments = self._segments()
+        for segment in segments:
+            with open(self._path(_segment_name(segment)), 'rb') as f:
+                offset = 0
+                for line in f:
+                    if (segment, offset, len(line)) in entries:
+                        yield decode_result(json.loads(line))
+                    offset += len(line)
+            metrics.file_io('read', METRICS_NAME, offset)
+
+    def size_bytes(self) -> int:
+        """Total size of the segment files."""
+        with self._lock:
+            self._open()
+            return sum(os.path.getsize(self._path(_segment_name(n))) for n in self._segments())
+
+    def compact(self, keep_last: Optional[int] = None) -> int:
+        """Rewrite the log without superseded records; return how many remain.
+
+        With ``keep_last`` only the newest ``keep_last`` results are kept.
+        The compacted log is built beside the old one and swapped in.
+        """
+        with self._lock, self._locked():
+            index = self._open()
+            entries = sorted(index.values())
+            if keep_last is not None:
+                entries = entries[max(0, len(entries) - keep_last):]
+
+            tmp = BacktestLog(self.directory + '.tmp', legacy_file=None)
+            shutil.rmtree(tmp.directory, ignore_errors=True)
+            os.makedirs(tmp.directory)
+            tmp._index = {}
+            for segment, offset, length in entries:
+                with open(self._path(_segment_name(segment)), 'rb') as f:
+                    f.seek(offset)
+                    tmp._append(json.loads(f.read(length)))
+
+            old_dir = self.directory + '.old'
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.replace(self.directory, old_dir)
+            os.replace(tmp.directory, self.directory)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            self._index = None
+            return len(self._open())
+
+
+def main(argv: List[str]) -> int:
+    if not argv or argv[0] not in ('compact', 'migrate'):
+        print("usage: python -m services.backtest_log compact [--keep-last N] | migrate")
+        return 2
+
+    log = BacktestLog()
+    if argv[0] == 'migrate':
+        # Opening the log imports backtests.json if the log does not exist yet
+        print(f"{len(log)} backtests in {os.path.abspath(log.directory)}")
+        return 0
+
+    keep_last = None
+    if '--keep-last' in argv:
+        keep_last = int(argv[argv.index('--keep-last') + 1])
+    before = log.size_bytes()
+    remaining = log.compact(keep_last)
+    print(f"{remaining} backtests, {before} -> {log.size_bytes()} bytes")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
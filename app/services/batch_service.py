@@ -0,0 +1,247 @@
+"""Batch backtests: many saved strategies over one data load per symbol.
+
+Strategies are grouped by symbol. Each group's date range is loaded once
+and its strategies are fanned out across worker processes in chunks; a
+worker keeps the data of the symbol it last loaded, so consecutive chunks
+of a group share one load. The response has a summary per strategy (no
+trade lists) and a combined report over all of them.
+
+The nightly run can be started without the API::
+
+    python -m services.batch_service START END CAPITAL [all | ID ...] [--save]
+
+It may run while the API is up: with ``--save`` it appends to the same
+backtest log, which serializes writers across processes, and the API finds
+the new results on its next lookup.
+"""
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from fastapi import HTTPException, status
+
+from schemas import BatchBacktestRequest
+from models.iron_condor import IronCondor
+from models.option_chain import ChainChunks, ChainFrame
+from models.performance import equity_curve, performance_metrics
+from models.strategy_base import Strategy
+from . import metrics, strategy_service
+
+# Batches smaller than this run in-process; the pool start-up isn't worth it
+MIN_PARALLEL_STRATEGIES = 8
+BATCH_WORKERS = int(os.environ.get("OPTIONBOT_BATCH_WORKERS", os.cpu_count() or 1))
+# Strategies per task sent to a worker
+CHUNK_STRATEGIES = 16
+
+# The last (symbol, start, end, data version) loaded by this process and its data
+_loaded: Optional[Tuple[tuple, Union[ChainFrame, ChainChunks, None]]] = None
+
+
+def _historical_data(symbol: str, start_date: str, end_date: str) -> Union[ChainFrame, ChainChunks, None]:
+    global _loaded
+    # The version changes whenever the chains are re-imported, so a rebuilt
+    # store is never read through data loaded before it; without a version
+    # (store missing or stale) the normal path rebuilds it
+    version = strategy_service.data_version()
+    key = (symbol, start_date, end_date, version)
+    if version is None or _loaded is None or _loaded[0] != key:
+        _loaded = None  # release the old data before loading the new
+        data = strategy_service.get_historical_chain(symbol, start_date, end_date)
+        _loaded = ((symbol, start_date, end_date, strategy_service.data_version()), data)
+    return _loaded[1]
+
+
+def evaluate(strategy: Strategy, request: BatchBacktestRequest) -> Tuple[dict, Optional[tuple], Optional[dict]]:
+    """Backtest one strategy on its symbol's shared data.
+
+    Returns (summary, (equity dates, equity), full result). The full result
+    (with trades) is only built when the batch saves results. Errors are
+    reported in the summary instead of being raised.
+    """
+    summary = {"strategyId": strategy.id, "name": strategy.name, "symbol": strategy.symbol}
+    data = _historical_data(strategy.symbol, request.startDate, request.endDate)
+    if data is None or len(data) == 0:
+        summary["error"] = {
+            "statusCode": status.HTTP_404_NOT_FOUND,
+            "detail": f"No historical data found for {strategy.symbol} between {request.startDate} and {request.endDate}"
+        }
+        return summary, None, None
+
+    result = None
+    try:
+        if strategy.expiration == "0DTE" and isinstance(strategy, IronCondor) and not request.save:
+            results = strategy.simulate(data, request.startDate, request.endDate,
+                                        entry_time=request.entryTime, exit_time=request.exitTime)
+            dates, equity = results.entry_dates(), results.equity(request.initialCapital)
+            trade_count = 2 * results.entry_price.size
+        else:
+            result = strategy.backtest(request.startDate, request.endDate, request.initialCapital, data,
+                                       entry_time=request.entryTime, exit_time=request.exitTime)
+            dates = [point['date'] for point in result['equityCurve']]
+            equity = [point['equity'] for point in result['equityCurve']]
+            trade_count = len(result['trades'])
+    except ValueError as e:
+        summary["error"] = {"statusCode": status.HTTP_400_BAD_REQUEST, "detail": str(e)}
+        return summary, None, None
+
+    summary.update({
+        "finalCapital": float(equity[-1]) if len(equity) else request.initialCapital,
+        **performance_metrics(request.initialCapital, equity),
+        "tradeCount": trade_count
+    })
+    return summary, (list(dates), np.asarray(equity, dtype='float64')), result
+
+
+def _evaluate_chunk(strategies: List[dict], request: BatchBacktestRequest) -> List[tuple]:
+    return [evaluate(Strategy.from_dict(data), request) for data in strategies]
+
+
+def _select(strategy_ids: Union[List[str], str]) -> Tuple[List[Strategy], List[dict]]:
+    """Resolve ids (or "all") to strategy instances; unknown ids become error summaries."""
+    if strategy_ids == "all":
+        records = strategy_service.get_all_strategies()
+        missing = []
+    elif isinstance(strategy_ids, list):
+        records, missing = [], []
+        for strategy_id in dict.fromkeys(strategy_ids):
+            record = strategy_service.get_strategy_by_id(strategy_id)
+            if record is None:
+                missing.append({
+                    "strategyId": strategy_id,
+                    "error": {
+                        "statusCode": status.HTTP_404_NOT_FOUND,
+                        "detail": f"Strategy with id {strategy_id} not found"
+                    }
+                })
+            else:
+                records.append(record)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='strategyIds must be a list of ids or "all"'
+        )
+
+    strategies = []
+    for record in records:
+        try:
+            strategies.append(Strategy.from_dict(record))
+        except ValueError as e:
+            missing.append({
+                "strategyId": record.get('id'),
+                "error": {"statusCode": status.HTTP_400_BAD_REQUEST, "detail": f"Invalid strategy type: {str(e)}"}
+            })
+    return strategies, missing
+
+
+def combined_report(summaries: List[dict], curves: List[tuple], initial_capital: float) -> dict:
+    """Aggregate per-strategy equity curves into one portfolio-level report.
+
+    Each strategy is treated as a separate account funded with
+    ``initial_capital``; on every date the accounts' latest equity is summed.
+    ``curves`` holds the (dates, equity) of every successful summary.
+    """
+    succeeded = [s for s in summaries if "error" not in s]
+    report = {
+        "strategies": len(summaries),
+        "succeeded": len(succeeded),
+        "failed": len(summaries) - len(succeeded),
+        "initialCapital": initial_capital * len(succeeded)
+    }
+    if not succeeded:
+        return report
+
+    dates = sorted({date for strategy_dates, _ in curves for date in strategy_dates})
+    total = np.zeros(len(dates))
+    for strategy_dates, equity in curves:
+        if not len(equity):
+            total += initial_capital
+            continue
+        # Latest equity at or before each date (the starting capital before the first)
+        position = np.searchsorted(np.array(strategy_dates), np.array(dates), side='right') - 1
+        total += np.where(position >= 0, equity[np.maximum(position, 0)], initial_capital)
+
+    by_return = sorted(succeeded, key=lambda s: s['totalReturn'])
+    report.update({
+        "finalCapital": float(total[-1]) if len(total) else report['initialCapital'],
+        **performance_metrics(report['initialCapital'], total),
+        "tradeCount": sum(s['tradeCount'] for s in succeeded),
+        "best": {"strategyId": by_return[-1]['strategyId'], "totalReturn": by_return[-1]['totalReturn']},
+        "worst": {"strategyId": by_return[0]['strategyId'], "totalReturn": by_return[0]['totalReturn']},
+        "equityCurve": equity_curve(dates, report['initialCapital'], total)
+    })
+    return report
+
+
+@metrics.timed("batch")
+def run_batch(request: BatchBacktestRequest) -> dict:
+    """Backtest a list of saved strategies (or "all") and report on them together."""
+    strategies, failed = _select(request.strategyIds)
+
+    # Grouped by symbol so each worker task touches one symbol's data
+    strategies.sort(key=lambda s: s.symbol.upper())
+    tasks = []
+    for strategy in strategies:
+        if not tasks or len(tasks[-1]) == CHUNK_STRATEGIES or tasks[-1][0]['symbol'].upper() != strategy.symbol.upper():
+            tasks.append([])
+        tasks[-1].append(strategy.to_dict())
+
+    with metrics.stage("backtest"):
+        if len(strategies) < MIN_PARALLEL_STRATEGIES or BATCH_WORKERS <= 1:
+            outcomes = [outcome for task in tasks for outcome in _evaluate_chunk(task, request)]
+        else:
+            with ProcessPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+                futures = [pool.submit(_evaluate_chunk, task, request) for task in tasks]
+                outcomes = [outcome for future in futures for outcome in future.result()]
+
+    summaries, curves = [], []
+    with metrics.stage("save"):
+        for summary, curve, result in outcomes:
+            if result is not None:
+                strategy_service.save_backtest(result)
+                summary["backtestId"] = result['backtestId']
+            if curve is not None:
+                curves.append(curve)
+            summaries.append(summary)
+    summaries += failed
+
+    with metrics.stage("combine"):
+        combined = combined_report(summaries, curves, request.initialCapital)
+    return {
+        "startDate": request.startDate,
+        "endDate": request.endDate,
+        "initialCapital": request.initialCapital,
+        "symbols": sorted({s.symbol.upper() for s in strategies}),
+        "results": summaries,
+        "combined": combined
+    }
+
+
+def main(argv: List[str]) -> int:
+    args = [a for a in argv if not a.startswith('--')]
+    if len(args) < 3:
+        print("usage: python -m services.batch_service START END CAPITAL [all | ID ...] [--save]")
+        return 2
+    request = BatchBacktestRequest(
+        strategyIds=args[3:] if len(args) > 3 and args[3:] != ['all'] else "all",
+        startDate=args[0],
+        endDate=args[1],
+        initialCapital=float(args[2]),
+        save='--save' in argv
+    )
+    try:
+        report = run_batch(request)
+    except HTTPException as e:
+        print(e.detail)
+        return 1
+    finally:
+        strategy_service.strategies.close()
+    json.dump(report, sys.stdout, indent=2)
+    print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
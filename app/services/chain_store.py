@@ -0,0 +1,455 @@
+"""Columnar, memory-mapped store for historical option chains.
+
+Layout on disk (one directory per symbol and year)::
+
+    chains/
+      manifest.json
+      build-1a2b3c/
+        SPY/
+          2024/
+            dates.npy  underlying.npy  offsets.npy  [times.npy]
+            strike.npy  expiration.npy  optionType.npy  mid.npy  ...
+            greeks/
+              iv.npy  delta.npy  gamma.npy  theta.npy  vega.npy
+
+Every import writes a new build directory and then replaces manifest.json,
+which names the live build, in one atomic rename. Readers go through the
+manifest, so they see either the old store or the new one and never a
+missing or half-written one. The build before the live one is kept for
+readers that read the old manifest just before the swap; older builds are
+removed, and a reader that finds its build gone reads the live one.
+
+Each column is a plain ``.npy`` file opened with ``mmap_mode='r'``, so a
+backtest only pages in the rows of the days it actually touches. The
+``greeks`` sidecar holds implied volatility and greeks per quote row
+(float32), solved once at import time so backtests never solve them.
+
+Intraday data (records with a ``time``, or an ISO datetime as ``date``) has
+many snapshots per date and a ``times.npy`` column. ``load_chunks`` reads it
+as a ChainChunks: views of a few dates at a time, so a backtest never holds
+more than CHUNK_DATES dates of quotes in memory.
+
+Build the store from historical_data.json with::
+
+    python -m services.chain_store import [source.json]
+
+and add the greeks sidecar to a store built without it with::
+
+    python -m services.chain_store greeks
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from models import greeks
+from models.greeks import GREEK_COLUMNS
+from models.option_chain import ChainChunks, ChainFrame, QUOTE_COLUMNS
+from .file_service import locked
+
+# File paths
+DATA_DIR = os.environ.get("OPTIONBOT_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
+HISTORICAL_DATA_FILE = os.path.join(DATA_DIR, "historical_data.json")
+CHAINS_DIR = os.path.join(DATA_DIR, "chains")
+MANIFEST_NAME = "manifest.json"
+BUILD_PREFIX = "build-"
+GREEKS_DIR = "greeks"
+
+# Dates per chunk when intraday data is read with load_chunks
+CHUNK_DATES = int(os.environ.get("OPTIONBOT_CHUNK_DATES", "20"))
+
+_lock = threading.Lock()
+_build_lock = threading.Lock()
+_partition_cache: Dict[tuple, ChainFrame] = {}
+
+
+@contextmanager
+def _locked(thread_lock: threading.Lock, path: str) -> Iterator[None]:
+    """Hold ``thread_lock`` and an exclusive lock on the file ``path``.
+
+    The file lock serializes the worker processes of the job, sweep and
+    batch pools, which build and swap the store too.
+    """
+    with thread_lock, locked(path):
+        yield
+
+
+def _manifest_path(store_dir: str) -> str:
+    return os.path.join(store_dir, MANIFEST_NAME)
+
+
+def _write_manifest(store_dir: str, manifest: dict) -> None:
+    # Callers hold the store lock, so the temporary name is never shared
+    tmp_path = _manifest_path(store_dir) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, _manifest_path(store_dir))
+
+
+def _partition_path(store_dir: str, manifest: dict, symbol: str, year: str) -> str:
+    # Stores built before builds were versioned keep partitions at the top
+    return os.path.join(store_dir, manifest.get('build', ''), symbol, year)
+
+
+def read_manifest(store_dir: str = CHAINS_DIR) -> Optional[dict]:
+    """Read the store manifest, or None if the store has not been built."""
+    try:
+        with open(_manifest_path(store_dir), 'r') as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return None
+
+
+def _source_stamp(source: str) -> Optional[dict]:
+    if not os.path.exists(source):
+        return None
+    stat = os.stat(source)
+    return {"path": os.path.abspath(source), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def is_stale(source: str = HISTORICAL_DATA_FILE, store_dir: str = CHAINS_DIR) -> bool:
+    """Whether the store is missing or older than its JSON source.
+
+    A store imported from a different file is never considered stale.
+    """
+    stamp = _source_stamp(source)
+    if stamp is None:
+        return False
+    manifest = read_manifest(store_dir)
+    if manifest is None:
+        return True
+    built_from = manifest.get('source') or {}
+    if built_from.get('path') != stamp['path']:
+        return False
+    return built_from != stamp
+
+
+def _write_partition(path: str, frame: ChainFrame) -> None:
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, 'dates.npy'), frame.dates)
+    np.save(os.path.join(path, 'underlying.npy'), frame.underlying)
+    np.save(os.path.join(path, 'offsets.npy'), frame.offsets)
+    if frame.times is not None:
+        np.save(os.path.join(path, 'times.npy'), frame.times)
+    for name, column in frame.quotes.items():
+        np.save(os.path.join(path, f'{name}.npy'), column)
+    _write_greeks(path, frame)
+
+
+def _write_greeks(path: str, frame: ChainFrame) -> None:
+    solved = greeks.solve_rows(frame, np.arange(len(frame.quotes['strike'])))
+    greeks_dir = os.path.join(path, GREEKS_DIR)
+    os.makedirs(greeks_dir, exist_ok=True)
+    for name in GREEK_COLUMNS:
+        # Replace rather than overwrite: readers may have the old file mapped
+        target = os.path.join(greeks_dir, f'{name}.npy')
+        with open(target + '.tmp', 'wb') as f:
+            np.save(f, solved[name])
+        os.replace(target + '.tmp', target)
+
+
+def building(store_dir: str = CHAINS_DIR):
+    """Serialize rebuilds of the store across threads and processes.
+
+    Callers re-check whether the store still needs rebuilding once inside,
+    as another process may just have built it.
+    """
+    return _locked(_build_lock, store_dir + '.build.lock')
+
+
+def import_records(records: List[dict], store_dir: str = CHAINS_DIR, source: Optional[dict] = None) -> dict:
+    """Write day records into a new build of the store and return its manifest.
+
+    The build goes live when the manifest naming it replaces the old one,
+    so readers never observe a missing or half-written store.
+    """
+    by_symbol = defaultdict(list)
+    for record in records:
+        by_symbol[record.get('symbol', '').upper()].append(record)
+
+    # A directory of its own, so concurrent builds never touch each other's files
+    os.makedirs(store_dir, exist_ok=True)
+    build_dir = tempfile.mkdtemp(prefix=BUILD_PREFIX, dir=store_dir)
+    try:
+        manifest = _build(by_symbol, build_dir, source)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    with _locked(_lock, store_dir + '.lock'):
+        old = read_manifest(store_dir)
+        if old is not None:
+            manifest['previous'] = old.get('build', '')
+        _write_manifest(store_dir, manifest)
+        _partition_cache.clear()
+        greeks.cache.clear()
+    if old is not None:
+        _remove_build(store_dir, old)
+    return manifest
+
+
+def _remove_build(store_dir: str, replaced: dict) -> None:
+    """Remove the build that ``replaced`` kept around; its own build stays for late readers."""
+    if replaced.get('build') is None:
+        # Unversioned store: its partitions are at the top of the store
+        for symbol in replaced.get('symbols', {}):
+            shutil.rmtree(os.path.join(store_dir, symbol), ignore_errors=True)
+    elif replaced.get('previous'):
+        shutil.rmtree(os.path.join(store_dir, replaced['previous']), ignore_errors=True)
+
+
+def _build(by_symbol: Dict[str, List[dict]], build_dir: str, source: Optional[dict]) -> dict:
+    """Write every symbol's partitions into ``build_dir`` and return its manifest."""
+    digest = hashlib.sha1()
+    symbols = {}
+    for symbol in sorted(by_symbol):
+        # Columns are built one year partition at a time, so an intraday
+        # history never has to fit in memory as a whole
+        by_year = defaultdict(list)
+        for record in by_symbol[symbol]:
+            by_year[record.get('date', '')[:4]].append(record)
+
+        partitions = []
+        info = {"days": 0, "snapshots": 0, "quotes": 0, "intraday": False}
+        for year in sorted(by_year):
+            part = ChainFrame.from_records(by_year.pop(year), symbol=symbol)
+            if not len(part):
+                continue
+            year = str(part.dates[0].astype('datetime64[Y]'))
+            _write_partition(os.path.join(build_dir, symbol, year), part)
+            partitions.append(year)
+            digest.update(f'{symbol}/{year}:{len(part)}:{part.num_quotes}'.encode())
+            digest.update(part.underlying.tobytes())
+            digest.update(part.quotes['mid'].tobytes())
+            if part.times is not None:
+                digest.update(part.times.tobytes())
+
+            info.setdefault("startDate", str(part.dates[0]))
+            info["endDate"] = str(part.dates[-1])
+            info["days"] += len(part.day_starts())
+            info["snapshots"] += len(part)
+            info["quotes"] += part.num_quotes
+            info["intraday"] = info["intraday"] or part.times is not None
+        symbols[symbol] = {"partitions": partitions, **info}
+
+    return {
+        "version": digest.hexdigest()[:16],
+        "build": os.path.basename(build_dir),
+        "source": source,
+        "greeks": list(GREEK_COLUMNS),
+        "symbols": symbols
+    }
+
+
+def import_json(source: str = HISTORICAL_DATA_FILE, store_dir: str = CHAINS_DIR) -> dict:
+    """Import a historical_data.json file into the columnar store."""
+    with open(source, 'r') as f:
+        records = json.load(f)
+    return import_records(records, store_dir=store_dir, source=_source_stamp(source))
+
+
+def ensure_store(source: str = HISTORICAL_DATA_FILE, store_dir: str = CHAINS_DIR) -> Optional[dict]:
+    """Build or rebuild the store if its JSON source changed; return the manifest.
+
+    Processes finding the store stale at the same time build it once: the
+    others wait and then find it up to date.
+    """
+    if is_stale(source, store_dir):
+        with building(store_dir):
+            if is_stale(source, store_dir):
+                return import_json(source, store_dir)
+    return read_manifest(store_dir)
+
+
+def precompute_greeks(store_dir: str = CHAINS_DIR) -> Optional[dict]:
+    """Write the greeks sidecar of every partition of an existing store."""
+    manifest = read_manifest(store_dir)
+    if manifest is None:
+        return None
+    for symbol, info in manifest['symbols'].items():
+        for year in info['partitions']:
+            path = _partition_path(store_dir, manifest, symbol, year)
+            _write_greeks(path, _open_partition(path, manifest['version'], with_greeks=False))
+
+    manifest['greeks'] = list(GREEK_COLUMNS)
+    with _locked(_lock, store_dir + '.lock'):
+        live = read_manifest(store_dir)
+        if live is None or live.get('build') != manifest.get('build'):
+            # Rebuilt meanwhile; every build has its greeks already
+            return live
+        _write_manifest(store_dir, manifest)
+        _partition_cache.clear()
+    return manifest
+
+
+def data_version(store_dir: str = CHAINS_DIR) -> Optional[str]:
+    """Version stamp of the stored chains (changes whenever they are rebuilt)."""
+    manifest = read_manifest(store_dir)
+    return manifest.get('version') if manifest else None
+
+
+def _open_partition(path: str, version: str, with_greeks: bool = True) -> ChainFrame:
+    key = (version, path, with_greeks)
+    with _lock:
+        frame = _partition_cache.get(key)
+    if frame is not None:
+        return frame
+
+    def load(name: str) -> np.ndarray:
+        return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+    greeks_dir = os.path.join(path, GREEKS_DIR)
+    has_times = os.path.exists(os.path.join(path, 'times.npy'))
+    has_greeks = with_greeks and all(
+        os.path.exists(os.path.join(greeks_dir, f'{name}.npy')) for name in GREEK_COLUMNS
+    )
+    frame = ChainFrame(
+        symbol=os.path.basename(os.path.dirname(path)),
+        dates=load('dates'),
+        underlying=load('underlying'),
+        offsets=load('offsets'),
+        quotes={name: load(name) for name in QUOTE_COLUMNS},
+        greeks={
+            name: np.load(os.path.join(greeks_dir, f'{name}.npy'), mmap_mode='r')
+            for name in GREEK_COLUMNS
+        } if has_greeks else None,
+        times=load('times') if has_times else None
+    )
+    with _lock:
+        _partition_cache[key] = frame
+    return frame
+
+
+def load_range(symbol: str, start_date: str, end_date: str, store_dir: str = CHAINS_DIR) -> Optional[ChainFrame]:
+    """Load the snapshots of ``symbol`` within [start_date, end_date].
+
+    Only the year partitions overlapping the range are opened, and within
+    each partition only the rows of the requested days are sliced.
+    Returns None if the symbol has no data in the store.
+    """
+    frames = _range_frames(symbol, start_date, end_date, store_dir)
+    return ChainFrame.concat(frames) if frames is not None else None
+
+
+def _range_frames(symbol: str, start_date: str, end_date: str, store_dir: str) -> Optional[List[ChainFrame]]:
+    # One view per overlapping year partition; None if the symbol is unknown
+    while True:
+        manifest = read_manifest(store_dir)
+        if not manifest:
+            return None
+        info = manifest['symbols'].get(symbol.upper())
+        if not info:
+            return None
+
+        start_year, end_year = int(start_date[:4]), int(end_date[:4])
+        frames = []
+        try:
+            for year in info['partitions']:
+                if not start_year <= int(year) <= end_year:
+                    continue
+                partition = _open_partition(_partition_path(store_dir, manifest, symbol.upper(), year), manifest['version'])
+                frames.append(partition.slice_dates(start_date, end_date))
+            return frames
+        except FileNotFoundError:
+            # Rebuilds since the manifest was read removed its build; read
+            # the live one instead
+            live = read_manifest(store_dir)
+            if live is None or live.get('build') == manifest.get('build'):
+                raise
+
+
+def load_snapshots(symbol: str, start_date: str, end_date: str, store_dir: str = CHAINS_DIR) -> Optional[Dict[str, np.ndarray]]:
+    """Snapshot-level columns of ``symbol`` within [start_date, end_date].
+
+    Returns ``dates``, ``times`` (None for daily data), ``underlying`` and
+    ``optionCount`` (quotes per snapshot). The quote columns are never
+    touched, so a price history costs a few bytes per snapshot to read.
+    Returns None if the symbol has no data in the store.
+    """
+    frames = _range_frames(symbol, start_date, end_date, store_dir)
+    if frames is None:
+        return None
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return {
+            "dates": np.empty(0, dtype='datetime64[D]'),
+            "times": None,
+            "underlying": np.empty(0),
+            "optionCount": np.empty(0, dtype='int64')
+        }
+    return {
+        "dates": np.concatenate([frame.dates for frame in frames]),
+        "times": np.concatenate([frame.times for frame in frames]) if frames[0].times is not None else None,
+        "underlying": np.concatenate([frame.underlying for frame in frames]),
+        "optionCount": np.concatenate([np.diff(frame.offsets) for frame in frames])
+    }
+
+
+def symbol_info(symbol: str, store_dir: str = CHAINS_DIR) -> Optional[dict]:
+    """Manifest entry of ``symbol`` (partitions, date range, counts), or None."""
+    manifest = read_manifest(store_dir)
+    return manifest['symbols'].get(symbol.upper()) if manifest else None
+
+
+def is_intraday(symbol: str, store_dir: str = CHAINS_DIR) -> bool:
+    """Whether the store holds intraday (timestamped) snapshots for ``symbol``."""
+    manifest = read_manifest(store_dir)
+    info = manifest['symbols'].get(symbol.upper()) if manifest else None
+    return bool(info and info.get('intraday'))
+
+
+def load_chunks(
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    chunk_dates: int = CHUNK_DATES,
+    store_dir: str = CHAINS_DIR
+) -> Optional[ChainChunks]:
+    """Load the snapshots of ``symbol`` within [start_date, end_date] lazily.
+
+    Like ``load_range``, but partitions are never concatenated: iterating
+    the result yields views of ``chunk_dates`` dates at a time, so only the
+    pages of the chunk being processed need to be resident.
+    """
+    frames = _range_frames(symbol, start_date, end_date, store_dir)
+    if frames is None:
+        return None
+    parts = [ChainChunks.from_frame(frame, chunk_dates) for frame in frames if len(frame)]
+
+    def chunks():
+        for part in parts:
+            yield from part
+
+    return ChainChunks(symbol.upper(), chunks, sum(len(part) for part in parts))
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) < 1 or argv[0] not in ('import', 'greeks'):
+        print("usage: python -m services.chain_store import [source.json] | greeks")
+        return 2
+    if argv[0] == 'greeks':
+        manifest = precompute_greeks()
+        if manifest is None:
+            print("no chain store; run 'import' first")
+            return 1
+        print(f"greeks written for {len(manifest['symbols'])} symbols")
+        return 0
+    source = argv[1] if len(argv) > 1 else HISTORICAL_DATA_FILE
+    manifest = import_json(source)
+    for symbol, info in manifest['symbols'].items():
+        print(f"{symbol}: {info['days']} days, {info['quotes']} quotes "
+              f"({info['startDate']} to {info['endDate']})")
+    print(f"version {manifest['version']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
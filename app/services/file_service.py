@@ -1,17 +1,48 @@
 import json
 import os
-from typing import List
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
 from fastapi import HTTPException, status
 
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; callers serialize their own threads
+    fcntl = None
+
+
+@contextmanager
+def locked(lock_path: str) -> Iterator[None]:
+    """Hold an exclusive lock on the file ``lock_path`` (created if missing).
+
+    Serializes processes, such as the API's pool workers or a CLI run
+    beside the API, that write the same files.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    with open(lock_path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
 
 def read_json_file(file_path: str) -> List[dict]:
     """Read JSON data from file. Returns empty list if file doesn't exist or is invalid."""
     if not os.path.exists(file_path):
         return []
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
+        started = time.perf_counter()
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        metrics.file_io('read', os.path.basename(file_path), len(data), time.perf_counter() - started)
+        return json.loads(data)
+    except (json.JSONDecodeError, UnicodeDecodeError, IOError):
         return []
 
 
@@ -22,10 +53,13 @@ def write_json_file(file_path: str, data: List[dict]) -> None:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         
         # Write to temp file first, then rename (atomic operation)
+        started = time.perf_counter()
+        body = json.dumps(data, indent=2).encode()
         temp_file = file_path + '.tmp'
-        with open(temp_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(temp_file, 'wb') as f:
+            f.write(body)
         os.replace(temp_file, file_path)
+        metrics.file_io('write', os.path.basename(file_path), len(body), time.perf_counter() - started)
     except IOError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
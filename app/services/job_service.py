@@ -0,0 +1,316 @@
+"""Background backtest jobs on a managed process pool.
+
+Backtests are CPU-bound, so running them inside an ``async`` endpoint
+blocks every other request on the worker. Jobs submitted here run in a
+``ProcessPoolExecutor``; progress and cancellation flags are shared with
+the workers through a ``multiprocessing.Manager`` dict, and finished
+results are saved from the API process.
+
+Before a job is queued its inputs are looked up in the result cache; a hit
+completes the job at once (rescaled if only the capital differs) and
+finished results are added to the cache.
+
+Workers time their stages (queueing, data loading, the engine) and send
+them back with the result; they are recorded in the API process's metrics
+under the ``backtest_job`` operation, together with saving and caching.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from models.strategy_base import Strategy
+from . import metrics, strategy_service
+from .result_cache import cache_key, rescale
+
+BACKTEST_WORKERS = int(os.environ.get("OPTIONBOT_BACKTEST_WORKERS", os.cpu_count() or 1))
+# Finished jobs remembered for status polling
+MAX_FINISHED_JOBS = 1000
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+# Operation label of queued backtests in the metrics
+JOB_OPERATION = "backtest_job"
+# Internal job fields left out of its status
+_PRIVATE_FIELDS = ('future', 'cacheKey', 'profile')
+
+_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+_manager = None
+_shared = None  # job id -> progress fraction; ('cancel', job id) -> True
+_jobs: Dict[str, dict] = {}
+
+
+class BacktestCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+
+class BacktestJobError(Exception):
+    """Picklable carrier for an HTTPException raised inside a worker."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _manager, _shared
+    with _lock:
+        if _executor is None:
+            _manager = multiprocessing.Manager()
+            _shared = _manager.dict()
+            _executor = ProcessPoolExecutor(max_workers=BACKTEST_WORKERS)
+        return _executor
+
+
+def shutdown() -> None:
+    """Stop the worker pool, cancelling queued jobs."""
+    global _executor, _manager, _shared
+    with _lock:
+        executor, manager = _executor, _manager
+        _executor = _manager = _shared = None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+    if manager is not None:
+        manager.shutdown()
+
+
+def _run_job(job_id: str, strategy_data: dict, start_date: str, end_date: str,
+             initial_capital: float, entry_time: Optional[str], exit_time: Optional[str], shared,
+             queued_at: float) -> Tuple[dict, List[Tuple[str, float]]]:
+    """Worker-process entry point; returns the result and its stage timings."""
+    profile = metrics.Profile(JOB_OPERATION)
+    profile.add('queue', time.time() - queued_at)
+
+    def progress(done: int, total: int) -> None:
+        if shared.get(('cancel', job_id)):
+            raise BacktestCancelled(job_id)
+        shared[job_id] = done / total if total else 1.0
+
+    progress(0, 1)
+    strategy = Strategy.from_dict(strategy_data)
+    try:
+        with metrics.activate(profile):
+            result = strategy_service.compute_backtest(strategy, start_date, end_date, initial_capital, progress,
+                                                       entry_time, exit_time)
+    except HTTPException as e:
+        raise BacktestJobError(e.status_code, e.detail)
+    result['backtestId'] = job_id
+    return result, profile.stages
+
+
+def _finish(job: dict, state: str, **fields) -> None:
+    # Under the lock, so a concurrent get_job never moves the job back to RUNNING
+    with _lock:
+        job.update(fields, status=state, finishedAt=datetime.utcnow().isoformat())
+
+
+def _on_done(job_id: str, future: Future) -> None:
+    job = _jobs[job_id]
+    # The worker is done with its progress and cancellation flags
+    shared = _shared
+    if shared is not None:
+        shared.pop(job_id, None)
+        shared.pop(('cancel', job_id), None)
+
+    try:
+        result, stages = future.result()
+    except (CancelledError, BacktestCancelled):
+        _finish(job, CANCELLED)
+    except BacktestJobError as e:
+        _finish(job, FAILED, error={"statusCode": e.status_code, "detail": e.detail})
+    except Exception as e:
+        _finish(job, FAILED, error={"statusCode": status.HTTP_500_INTERNAL_SERVER_ERROR, "detail": str(e)})
+    else:
+        profile = job['profile']
+        metrics.record(JOB_OPERATION, stages)
+        profile.stages.extend(stages)
+        with metrics.activate(profile):
+            try:
+                strategy_service.save_backtest(result)
+            except Exception as e:
+                _finish(job, FAILED, error={
+                    "statusCode": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    "detail": f"Backtest finished but could not be saved: {e}"
+                })
+            else:
+                if job.get('cacheKey'):
+                    try:
+                        with metrics.stage('cache_store'):
+                            strategy_service.result_cache.put(job['cacheKey'], result)
+                    except OSError:
+                        pass  # the cache is an optimization; the result itself is saved
+                _finish(job, COMPLETED, progress=1.0)
+        profile.seconds = profile.elapsed()
+        metrics.OPERATION_SECONDS.observe(profile.seconds, JOB_OPERATION)
+    _prune()
+
+
+def _prune() -> None:
+    with _lock:
+        finished = [job_id for job_id, job in _jobs.items() if job['status'] in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del _jobs[job_id]
+
+
+def submit(strategy_id: str, start_date: str, end_date: str, initial_capital: float,
+           entry_time: Optional[str] = None, exit_time: Optional[str] = None) -> dict:
+    """Queue a backtest and return its job status (including the backtestId)."""
+    strategy = strategy_service.get_strategy_instance(strategy_id)
+    if not strategy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Strategy with id {strategy_id} not found"
+        )
+
+    job_id = strategy_service.generate_id()
+    job = {
+        "backtestId": job_id,
+        "strategyId": strategy_id,
+        "startDate": start_date,
+        "endDate": end_date,
+        "initialCapital": initial_capital,
+        "status": QUEUED,
+        "progress": 0.0,
+        "submittedAt": datetime.utcnow().isoformat()
+    }
+
+    version = strategy_service.data_version()
+    if version is not None:
+        job['cacheKey'] = cache_key(strategy.to_dict(), start_date, end_date, version, entry_time, exit_time)
+        with metrics.stage('cache_lookup'):
+            cached = strategy_service.result_cache.get(job['cacheKey'])
+        if cached is not None:
+            return _complete_from_cache(job, cached)
+
+    executor = _get_executor()
+    job['profile'] = metrics.Profile(JOB_OPERATION)
+    with _lock:
+        _jobs[job_id] = job
+    future = executor.submit(
+        _run_job, job_id, strategy.to_dict(), start_date, end_date, initial_capital,
+        entry_time, exit_time, _shared, time.time()
+    )
+    job['future'] = future
+    future.add_done_callback(lambda f: _on_done(job_id, f))
+    return get_job(job_id)
+
+
+def _complete_from_cache(job: dict, cached: dict) -> dict:
+    """Finish a job with a cached result instead of running it."""
+    same = cached['strategyId'] == job['strategyId'] and cached['initialCapital'] == job['initialCapital']
+    stored = strategy_service.get_backtest_by_id(cached['backtestId']) if same else None
+    # A stored result that has since been extended no longer matches the cached one
+    if stored is not None and stored['endDate'] == cached['endDate']:
+        # The identical result is already stored; answer with it
+        job['backtestId'] = cached['backtestId']
+    else:
+        result = rescale(cached, job['initialCapital'])
+        result['strategyId'] = job['strategyId']
+        result['backtestId'] = job['backtestId']
+        strategy_service.save_backtest(result)
+
+    job['status'] = COMPLETED
+    job['progress'] = 1.0
+    job['cached'] = True
+    job['finishedAt'] = datetime.utcnow().isoformat()
+    with _lock:
+        _jobs[job['backtestId']] = job
+    _prune()
+    return get_job(job['backtestId'])
+
+
+def _cancelled(backtest_id: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Backtest job {backtest_id} was cancelled"
+    )
+
+
+async def run(strategy_id: str, start_date: str, end_date: str, initial_capital: float,
+              entry_time: Optional[str] = None, exit_time: Optional[str] = None) -> dict:
+    """Run a backtest on the pool and wait for its result without blocking the event loop."""
+    # Submitting reads the strategy and the result cache, and may save a cached result
+    job = await run_in_threadpool(submit, strategy_id, start_date, end_date, initial_capital, entry_time, exit_time)
+    entry = _jobs[job['backtestId']]
+    future = entry.get('future')
+    if future is None:
+        # Answered from the result cache
+        return await run_in_threadpool(strategy_service.get_backtest_by_id, job['backtestId'])
+    try:
+        # Shielded so that a cancelled request leaves the job to finish
+        # (like a running one does) and ``future.cancelled()`` only means cancel()
+        result, _ = await asyncio.shield(asyncio.wrap_future(future))
+        # The job's stages (timed in the worker and while saving) belong to this request
+        profile = metrics.current_profile()
+        if profile is not None:
+            profile.stages.extend(entry['profile'].stages)
+        return result
+    except BacktestJobError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except asyncio.CancelledError:
+        # A job cancelled before it started cancels its future, which
+        # wrap_future reports as CancelledError; otherwise the request
+        # itself was cancelled and that must propagate
+        if not future.cancelled():
+            raise
+        raise _cancelled(job['backtestId'])
+    except BacktestCancelled:
+        raise _cancelled(job['backtestId'])
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Return a job's status and progress, or None if it is unknown."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return None
+
+    if job['status'] in (QUEUED, RUNNING):
+        shared = _shared
+        progress = shared.get(job_id) if shared is not None else None
+        if progress is not None:
+            with _lock:
+                # The job may have finished while the progress was fetched
+                if job['status'] in (QUEUED, RUNNING):
+                    job['status'] = RUNNING
+                    job['progress'] = progress
+    with _lock:
+        return {key: value for key, value in job.items() if key not in _PRIVATE_FIELDS}
+
+
+def list_jobs() -> List[dict]:
+    """Return the status of all remembered jobs."""
+    return [get_job(job_id) for job_id in list(_jobs)]
+
+
+def cancel(job_id: str) -> dict:
+    """Cancel a queued or running job."""
+    job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Backtest job with id {job_id} not found"
+        )
+    if job['status'] in FINISHED_STATES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Backtest job {job_id} already {job['status']}"
+        )
+
+    if not job['future'].cancel():
+        # Already running: the worker checks this flag between chunks
+        _shared[('cancel', job_id)] = True
+    return get_job(job_id)
@@ -0,0 +1,131 @@
+"""JSON responses for large payloads, bypassing FastAPI's generic encoder.
+
+Endpoints returning backtest results or the strategy list build plain dicts
+and lists of JSON types, so walking them with ``jsonable_encoder`` and
+serializing with the stdlib ``json`` module is wasted work. ``json_response``
+serializes them directly (with orjson when it is installed), compresses the
+body with brotli or gzip according to Accept-Encoding, and tags it with an
+ETag so a repeated GET whose If-None-Match matches gets an empty 304.
+
+orjson and brotli are optional: without them the stdlib ``json`` module and
+gzip are used.
+
+With ``profile`` the stage timings of the running operation (see
+services.metrics) are sent in a Server-Timing header and, for object
+bodies, under a ``profile`` key.
+"""
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+import numpy as np
+from fastapi import Request, Response, status
+
+from . import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def _numpy_default(value: Any) -> Any:
+    # What orjson's OPT_SERIALIZE_NUMPY does, for the stdlib fallback
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize JSON-compatible content, numpy scalars and arrays included."""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, separators=(',', ':'), default=_numpy_default).encode()
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header with their q-values."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+    return accepted
+
+
+def _choose_encoding(header: str) -> Optional[str]:
+    accepted = _accepted_encodings(header)
+    default = accepted.get('*', 0.0)
+    for coding in ('br', 'gzip') if brotli is not None else ('gzip',):
+        if accepted.get(coding, default) > 0:
+            return coding
+    return None
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: W/ prefixes are ignored
+    if if_none_match.strip() == '*':
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return etag.replace('W/', '') in (tag.replace('W/', '') for tag in tags)
+
+
+def json_response(
+    request: Request,
+    content: Any,
+    status_code: int = status.HTTP_200_OK,
+    headers: Optional[Dict[str, str]] = None,
+    profile: bool = False
+) -> Response:
+    """Serialize ``content`` into a (possibly compressed) JSON response.
+
+    The ETag is weak because the same content may be sent gzip-, brotli- or
+    un-encoded; GET and HEAD requests whose If-None-Match matches it get a
+    304 without a body.
+    """
+    with metrics.stage('serialize'):
+        body = dumps(content)
+    timing = metrics.current_profile() if profile else None
+    if timing is not None:
+        headers = {**(headers or {}), "Server-Timing": timing.server_timing()}
+        if isinstance(content, dict):
+            body = dumps({**content, "profile": timing.to_dict()})
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {**(headers or {}), "ETag": etag, "Vary": "Accept-Encoding"}
+
+    if_none_match = request.headers.get('if-none-match')
+    if request.method in ('GET', 'HEAD') and if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if len(body) >= MIN_COMPRESS_BYTES:
+        encoding = _choose_encoding(request.headers.get('accept-encoding', ''))
+        with metrics.stage('compress'):
+            if encoding == 'br':
+                body = brotli.compress(body, quality=BROTLI_QUALITY)
+            elif encoding == 'gzip':
+                body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
@@ -0,0 +1,231 @@
+"""Price histories and option chains for the frontend, read from the chain store.
+
+``get_price_history`` serves the underlying price of every snapshot in a
+date range. The store's year partitions and sorted dates locate the range
+without scanning it, and only the snapshot-level columns are read, never
+the quotes. With ``points`` a long history is cut down to at most that many
+points, either with LTTB (which keeps the shape of the line) or as OHLC
+bars. ``get_option_chain`` serves the quotes of one snapshot.
+
+Both take ``fields``, a comma-separated list of the keys to return for
+each point or option.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from fastapi import HTTPException, status
+
+from models.downsample import lttb, ohlc
+from models.greeks import GREEK_COLUMNS
+from models.option_chain import (
+    MINUTES_PER_DAY, OPTION_TYPES, OPTION_TYPE_CODES, QUOTE_COLUMNS, format_minute, to_day, to_minute
+)
+from . import metrics, strategy_service
+
+HISTORY_FIELDS = ('date', 'time', 'underlyingPrice', 'optionCount')
+OHLC_FIELDS = ('date', 'time', 'open', 'high', 'low', 'close', 'count')
+DOWNSAMPLE_METHODS = ('lttb', 'ohlc')
+
+
+def _fields(fields: Optional[str], available: Sequence[str]) -> List[str]:
+    """Parse a ``fields`` parameter; all available fields when it is empty."""
+    if not fields:
+        return list(available)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in requested if field not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}; available: {', '.join(available)}"
+        )
+    return requested
+
+
+def _rows(columns: Dict[str, list], fields: List[str]) -> List[dict]:
+    # Fields without a column (e.g. time, for daily data) are left out
+    names = [field for field in fields if field in columns]
+    return [dict(zip(names, row)) for row in zip(*(columns[name] for name in names))]
+
+
+def _floats(column: np.ndarray) -> list:
+    # NaN marks a missing value; JSON has no NaN
+    return [None if value != value else value for value in column.tolist()]
+
+
+def _chain_info(symbol: str) -> dict:
+    info = strategy_service.get_chain_info(symbol)
+    if info is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No historical data found for {symbol}"
+        )
+    return info
+
+
+def _check_date(value: str, name: str) -> None:
+    try:
+        to_day(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {name}: {value!r} (expected YYYY-MM-DD)"
+        )
+
+
+@metrics.timed("get_price_history")
+def get_price_history(
+    symbol: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fields: Optional[str] = None,
+    points: Optional[int] = None,
+    method: str = 'lttb'
+) -> dict:
+    """Underlying price of every snapshot within the date range (the whole history by default).
+
+    Snapshots without an underlying price are left out. With ``points``
+    the series is downsampled: ``lttb`` keeps that many of its points and
+    ``ohlc`` returns that many bars at most.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}"
+        )
+    minimum = 3 if method == 'lttb' else 1
+    if points is not None and points < minimum:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"points must be at least {minimum} for {method}"
+        )
+    bars = points is not None and method == 'ohlc'
+    selected = _fields(fields, OHLC_FIELDS if bars else HISTORY_FIELDS)
+
+    info = _chain_info(symbol)
+    start_date = start_date or info['startDate']
+    end_date = end_date or info['endDate']
+    _check_date(start_date, 'startDate')
+    _check_date(end_date, 'endDate')
+
+    with metrics.stage("read"):
+        history = strategy_service.get_price_history(symbol, start_date, end_date)
+        priced = history['underlying'] != 0
+        dates = history['dates'][priced]
+        times = history['times'][priced] if history['times'] is not None else None
+        prices = history['underlying'][priced]
+    if len(prices) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No historical data found for {symbol} between {start_date} and {end_date}"
+        )
+
+    with metrics.stage("downsample"):
+        if bars:
+            summary = ohlc(prices, points)
+            index = summary['start']
+            columns = {name: summary[name].tolist() for name in ('open', 'high', 'low', 'close', 'count')}
+        else:
+            if points is not None:
+                # Time of each snapshot in minutes, so gaps between days keep their width
+                x = dates.astype('int64') * MINUTES_PER_DAY
+                if times is not None:
+                    x = x + times
+                index = lttb(x, prices, points)
+            else:
+                index = np.arange(len(prices))
+            columns = {
+                "underlyingPrice": prices[index].tolist(),
+                "optionCount": history['optionCount'][priced][index].tolist()
+            }
+        columns["date"] = np.datetime_as_string(dates[index], unit='D').tolist()
+        if times is not None:
+            columns["time"] = [format_minute(minute) for minute in times[index].tolist()]
+
+    return {
+        "symbol": symbol.upper(),
+        "startDate": start_date,
+        "endDate": end_date,
+        "intraday": times is not None,
+        "total": len(prices),
+        "method": method if points is not None else None,
+        "data": _rows(columns, selected)
+    }
+
+
+@metrics.timed("get_option_chain")
+def get_option_chain(
+    symbol: str,
+    date: Optional[str] = None,
+    time: Optional[str] = None,
+    expiration: Optional[str] = None,
+    option_type: Optional[str] = None,
+    fields: Optional[str] = None
+) -> dict:
+    """Quotes of one snapshot: the last one of ``date`` (the latest stored date by default).
+
+    For intraday data ``time`` picks the last snapshot at or before it.
+    ``expiration`` and ``option_type`` filter the quotes.
+    """
+    if option_type is not None and option_type not in OPTION_TYPE_CODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"optionType must be one of {', '.join(OPTION_TYPES)}"
+        )
+    if expiration is not None:
+        _check_date(expiration, 'expiration')
+    info = _chain_info(symbol)
+    date = date or info['endDate']
+    _check_date(date, 'date')
+
+    with metrics.stage("read"):
+        frame = strategy_service.get_historical_frame(symbol, date, date)
+    if frame is None or len(frame) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No option chain found for {symbol} on {date}"
+        )
+    snapshot = len(frame) - 1
+    if time is not None and frame.times is not None:
+        try:
+            minute = to_minute(time)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        snapshot = int(np.searchsorted(frame.times, minute, side='right')) - 1
+        if snapshot < 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No option chain found for {symbol} on {date} at or before {time}"
+            )
+    frame = frame.take_days(snapshot, snapshot + 1)
+    available = tuple(QUOTE_COLUMNS) + (GREEK_COLUMNS if frame.greeks is not None else ())
+    selected = _fields(fields, available)
+
+    with metrics.stage("to_rows"):
+        quotes = frame.quotes
+        rows = np.arange(int(frame.offsets[0]), int(frame.offsets[-1]))
+        if expiration is not None:
+            rows = rows[quotes['expiration'][rows] == to_day(expiration)]
+        if option_type is not None:
+            rows = rows[quotes['optionType'][rows] == OPTION_TYPE_CODES[option_type]]
+
+        columns = {}
+        for name in selected:
+            column = quotes[name] if name in QUOTE_COLUMNS else frame.greeks[name]
+            values = column[rows]
+            if name == 'expiration':
+                columns[name] = np.datetime_as_string(values, unit='D').tolist()
+            elif name == 'optionType':
+                columns[name] = [OPTION_TYPES[code] if code >= 0 else None for code in values.tolist()]
+            elif values.dtype.kind == 'f':
+                columns[name] = _floats(values)
+            else:
+                columns[name] = values.tolist()
+        options = _rows(columns, selected)
+
+    return {
+        "symbol": symbol.upper(),
+        "date": frame.date_strings()[0],
+        **({"time": frame.time_strings()[0]} if frame.times is not None else {}),
+        "underlyingPrice": float(frame.underlying[0]),
+        "options": options
+    }
@@ -0,0 +1,245 @@
+"""Per-stage timings and I/O byte counters, exported in Prometheus format.
+
+Service functions time their stages (loading data, running the engine,
+saving, serializing) with ``stage``; each stage is observed into the
+``optionbot_stage_seconds`` histogram labelled with the operation it ran
+in, and whole operations into ``optionbot_operation_seconds``. Bytes read
+and written by the storage layer are counted in ``optionbot_file_bytes_total``.
+``render`` gives the text exposition served on ``/metrics``.
+
+While an ``operation`` is active its stages are also collected in a
+``Profile`` held in a context variable, which endpoints attach to the
+response when called with ``?profile=1``.
+
+Metrics live in the memory of the process that records them: backtest
+workers send their stage timings back with their results, and every
+uvicorn worker process exports its own.
+"""
+import functools
+import inspect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: float) -> str:
+    value = float(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...] = BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        bounds = [f'le="{bound}"' for bound in self.buckets] + ['le="+Inf"']
+        for labels, values in series:
+            for bound, count in zip(bounds, values):
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, bound)} {count}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(values[-1])}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {values[-2]}')
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float, *labels: str) -> None:
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, value in series:
+            lines.append(f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}')
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    'optionbot_stage_seconds', 'Time spent in each stage of an operation.', ('operation', 'stage')
+)
+OPERATION_SECONDS = Histogram(
+    'optionbot_operation_seconds', 'Time spent in each service operation.', ('operation',)
+)
+FILE_SECONDS = Histogram(
+    'optionbot_file_seconds', 'Time spent reading and writing data files.', ('direction', 'file')
+)
+FILE_BYTES = Counter(
+    'optionbot_file_bytes_total', 'Bytes read from and written to data files.', ('direction', 'file')
+)
+_METRICS = (OPERATION_SECONDS, STAGE_SECONDS, FILE_SECONDS, FILE_BYTES)
+
+
+class Profile:
+    """Stage durations of one operation, in the order they ran."""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.stages: List[Tuple[str, float]] = []
+        self.started = time.perf_counter()
+        # Set when the operation ends
+        self.seconds: Optional[float] = None
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages.append((stage, seconds))
+
+    def elapsed(self) -> float:
+        """Duration of the operation, so far if it is still running."""
+        return self.seconds if self.seconds is not None else time.perf_counter() - self.started
+
+    def to_dict(self) -> dict:
+        return {
+            "operation": self.operation,
+            "totalMs": round(self.elapsed() * 1000, 3),
+            "stages": [{"stage": stage, "ms": round(seconds * 1000, 3)} for stage, seconds in self.stages]
+        }
+
+    def server_timing(self) -> str:
+        """The stages as a Server-Timing header value."""
+        timings = [f'{stage};dur={seconds * 1000:.3f}' for stage, seconds in self.stages]
+        timings.append(f'total;dur={self.elapsed() * 1000:.3f}')
+        return ', '.join(timings)
+
+
+_profile: ContextVar[Optional[Profile]] = ContextVar('optionbot_profile', default=None)
+
+
+def current_profile() -> Optional[Profile]:
+    """The profile of the operation running in this context, if any."""
+    return _profile.get()
+
+
+@contextmanager
+def operation(name: str) -> Iterator[Profile]:
+    """Time an operation and collect its stages.
+
+    An operation started inside another one is timed on its own, but its
+    stages go to the outer operation's profile, which is the one yielded.
+    """
+    outer = _profile.get()
+    profile = outer or Profile(name)
+    token = _profile.set(profile) if outer is None else None
+    started = time.perf_counter()
+    try:
+        yield profile
+    finally:
+        elapsed = time.perf_counter() - started
+        OPERATION_SECONDS.observe(elapsed, name)
+        if token is not None:
+            profile.seconds = profile.elapsed()
+            _profile.reset(token)
+
+
+@contextmanager
+def activate(profile: Profile) -> Iterator[Profile]:
+    """Collect stages into an existing profile (e.g. in a callback thread)."""
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a stage of the current operation."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        profile = _profile.get()
+        STAGE_SECONDS.observe(elapsed, profile.operation if profile else 'none', name)
+        if profile is not None:
+            profile.add(name, elapsed)
+
+
+def record(operation: str, stages: List[Tuple[str, float]]) -> None:
+    """Observe stages timed elsewhere (in a worker process)."""
+    for name, seconds in stages:
+        STAGE_SECONDS.observe(seconds, operation, name)
+
+
+def timed(name: str) -> Callable:
+    """Decorator running a function (or coroutine function) as an ``operation``."""
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with operation(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with operation(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def file_io(direction: str, name: str, nbytes: int, seconds: Optional[float] = None) -> None:
+    """Count a read or write of a data file (``name`` labels it, e.g. the file name)."""
+    FILE_BYTES.inc(nbytes, direction, name)
+    if seconds is not None:
+        FILE_SECONDS.observe(seconds, direction, name)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,180 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+from fastapi import HTTPException, status
+
+from schemas import ParameterRange, SweepRequest
+from models.iron_condor import IronCondor
+from models.option_chain import ChainFrame
+from models.performance import performance_metrics
+from . import metrics, strategy_service
+
+# Upper bound on candidates evaluated by one sweep
+MAX_SWEEP_COMBINATIONS = 20000
+# Sweeps smaller than this run in-process; the pool start-up isn't worth it
+MIN_PARALLEL_COMBINATIONS = 64
+SWEEP_WORKERS = int(os.environ.get("OPTIONBOT_SWEEP_WORKERS", os.cpu_count() or 1))
+
+LEG_NAMES = ('longPut', 'shortPut', 'shortCall', 'longCall')
+RANK_FIELDS = ('totalReturn', 'sharpeRatio', 'sortinoRatio', 'maxDrawdown', 'winRate', 'avgDailyPnl', 'finalCapital')
+
+# Historical data of the sweep a pool worker process serves (set by its
+# initializer; sweeps run in-process pass their frame along instead)
+_sweep_frame: Optional[ChainFrame] = None
+
+
+def expand_range(param: ParameterRange) -> List[float]:
+    """Expand an inclusive start/end/step range into its values."""
+    if param.step <= 0:
+        if param.start != param.end:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Range step must be positive"
+            )
+        return [param.start]
+    count = int(np.floor((param.end - param.start) / param.step + 1e-9)) + 1
+    if count <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Empty range from {param.start} to {param.end}"
+        )
+    return [round(param.start + i * param.step, 6) for i in range(count)]
+
+
+def build_candidates(symbol: str, request: SweepRequest) -> tuple:
+    """Build IronCondor candidates for every combination; return (valid, skipped)."""
+    leg_values = [expand_range(getattr(request.legs, name)) for name in LEG_NAMES]
+    total = len(request.quantities) * len(request.expirations)
+    for values in leg_values:
+        total *= len(values)
+    if total > MAX_SWEEP_COMBINATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Sweep has {total} combinations; the limit is {MAX_SWEEP_COMBINATIONS}"
+        )
+
+    candidates = []
+    skipped = 0
+    for expiration, quantity, *deltas in itertools.product(request.expirations, request.quantities, *leg_values):
+        strategy = IronCondor(
+            id="",
+            name="",
+            symbol=symbol,
+            expiration=expiration,
+            legs=dict(zip(LEG_NAMES, deltas)),
+            quantity=quantity,
+            created_at=""
+        )
+        if quantity <= 0 or not strategy.validate_legs():
+            skipped += 1
+            continue
+        candidates.append(strategy)
+    return candidates, skipped
+
+
+def _init_worker(frame: ChainFrame) -> None:
+    global _sweep_frame
+    _sweep_frame = frame
+
+
+def evaluate(strategy: IronCondor, frame: ChainFrame, start_date: str, end_date: str, initial_capital: float) -> dict:
+    """Backtest one candidate against the sweep's data and summarize it."""
+    if strategy.expiration == "0DTE":
+        results = strategy.simulate(frame, start_date, end_date)
+        equity = results.equity(initial_capital)
+        trade_count = 2 * results.entry_price.size
+    else:
+        result = strategy.backtest(start_date, end_date, initial_capital, frame)
+        equity = [point['equity'] for point in result['equityCurve']]
+        trade_count = len(result['trades'])
+
+    return {
+        "legs": strategy.legs,
+        "quantity": strategy.quantity,
+        "expiration": strategy.expiration,
+        "finalCapital": float(equity[-1]) if len(equity) else initial_capital,
+        **performance_metrics(initial_capital, equity),
+        "tradeCount": trade_count
+    }
+
+
+def _evaluate_chunk(strategies: List[IronCondor], frame: ChainFrame, start_date: str, end_date: str, initial_capital: float) -> List[dict]:
+    return [evaluate(s, frame, start_date, end_date, initial_capital) for s in strategies]
+
+
+def _evaluate_worker_chunk(strategies: List[IronCondor], start_date: str, end_date: str, initial_capital: float) -> List[dict]:
+    # Runs in a pool worker, against the frame its initializer received
+    return _evaluate_chunk(strategies, _sweep_frame, start_date, end_date, initial_capital)
+
+
+@metrics.timed("sweep")
+def run_sweep(request: SweepRequest) -> dict:
+    """Backtest every valid leg-delta/quantity/expiration combination.
+
+    Historical data is loaded once and shared with the worker processes;
+    the result is a ranked summary table without trade lists.
+    """
+    if request.strategy.lower() != 'iron condor':
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Sweeps are not supported for strategy type: {request.strategy}"
+        )
+    if request.rankBy not in RANK_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"rankBy must be one of {', '.join(RANK_FIELDS)}"
+        )
+
+    symbol = request.symbol.upper()
+    candidates, skipped = build_candidates(symbol, request)
+
+    with metrics.stage("load_chain"):
+        frame = strategy_service.get_historical_frame(symbol, request.startDate, request.endDate)
+    if frame is None or len(frame) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No historical data found for {symbol} between {request.startDate} and {request.endDate}"
+        )
+
+    args = (request.startDate, request.endDate, request.initialCapital)
+    try:
+        with metrics.stage("backtest"):
+            if len(candidates) < MIN_PARALLEL_COMBINATIONS or SWEEP_WORKERS <= 1:
+                # Concurrent requests share this process, so the frame is
+                # passed along rather than set globally
+                summaries = _evaluate_chunk(candidates, frame, *args)
+            else:
+                chunk_size = max(1, len(candidates) // (SWEEP_WORKERS * 4))
+                chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+                with ProcessPoolExecutor(
+                    max_workers=SWEEP_WORKERS,
+                    initializer=_init_worker,
+                    initargs=(frame,)
+                ) as pool:
+                    futures = [pool.submit(_evaluate_worker_chunk, chunk, *args) for chunk in chunks]
+                    summaries = [summary for future in futures for summary in future.result()]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    # maxDrawdown is negative, so larger is better for every rank field
+    summaries.sort(key=lambda s: s[request.rankBy], reverse=True)
+    if request.limit is not None:
+        summaries = summaries[:request.limit]
+    for rank, summary in enumerate(summaries, start=1):
+        summary['rank'] = rank
+
+    return {
+        "symbol": symbol,
+        "startDate": request.startDate,
+        "endDate": request.endDate,
+        "initialCapital": request.initialCapital,
+        "evaluated": len(candidates),
+        "skipped": skipped,
+        "results": summaries
+    }
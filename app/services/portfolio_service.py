@@ -0,0 +1,163 @@
+"""Portfolio backtests: several strategies trading one account.
+
+Each symbol's data is loaded once and every strategy is simulated on it by
+the vectorized engine; the portfolio then walks the union of the
+strategies' entry days in one pass. On each day the strategies open their
+positions in the order they were given, each reserving its margin (see
+``LegResults.margin``) out of the account's equity; a position that does
+not fit is skipped for that day. The day's round trips are then booked
+against the shared equity.
+
+A single strategy with enough capital reproduces its standalone backtest.
+"""
+from typing import Dict, List
+
+from fastapi import HTTPException, status
+
+from schemas import PortfolioBacktestRequest
+from models.iron_condor import IronCondor
+from models.option_chain import ChainChunks
+from models.performance import equity_curve, performance_metrics
+from . import strategy_service
+
+
+class _Member:
+    """One strategy's simulated positions and its share of the portfolio."""
+
+    def __init__(self, strategy: IronCondor, results):
+        self.strategy = strategy
+        self.legs = len(results.legs)
+        self.flows = results.round_trips().tolist()
+        self.margin = results.margin().tolist()
+        self.rows = {date: row for row, date in enumerate(results.entry_dates())}
+        self.dates: List[str] = []
+        self.pnl: List[float] = []
+        self.skipped = 0
+        self.peak_margin = 0.0
+
+    def summary(self, initial_capital: float) -> dict:
+        # Equity of the account had it held only this strategy's positions
+        equity = []
+        capital = initial_capital
+        for pnl in self.pnl:
+            capital += pnl
+            equity.append(capital)
+        return {
+            "strategyId": self.strategy.id,
+            "name": self.strategy.name,
+            "symbol": self.strategy.symbol,
+            "tradeCount": len(self.pnl) * 2 * self.legs,
+            "skippedEntries": self.skipped,
+            "totalPnl": capital - initial_capital,
+            "peakMargin": self.peak_margin,
+            "equityCurve": equity_curve(self.dates, initial_capital, equity)
+        }
+
+
+def _strategies(strategy_ids: List[str]) -> List[IronCondor]:
+    if not strategy_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="strategyIds must not be empty")
+    strategies = []
+    for strategy_id in dict.fromkeys(strategy_ids):
+        strategy = strategy_service.get_strategy_instance(strategy_id)
+        if strategy is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Strategy with id {strategy_id} not found"
+            )
+        if not isinstance(strategy, IronCondor) or strategy.expiration != "0DTE":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Strategy {strategy_id} is not a 0DTE Iron Condor; portfolios support only those"
+            )
+        strategies.append(strategy)
+    return strategies
+
+
+def _load(symbol: str, sharing: int, request: PortfolioBacktestRequest):
+    data = strategy_service.get_historical_chain(symbol, request.startDate, request.endDate)
+    if isinstance(data, ChainChunks) and sharing > 1:
+        # Intraday chunks are read lazily on every pass; keep them for the
+        # other strategies on this symbol instead of reading them again
+        frames = list(data)
+        data = ChainChunks(data.symbol, lambda: iter(frames), len(data))
+    return data
+
+
+def _simulate(strategies: List[IronCondor], request: PortfolioBacktestRequest) -> List[_Member]:
+    """Simulate every strategy, loading each symbol's data once."""
+    symbols = [strategy.symbol.upper() for strategy in strategies]
+    data: Dict[str, object] = {}
+    members = []
+    for strategy, symbol in zip(strategies, symbols):
+        if symbol not in data:
+            data[symbol] = _load(symbol, symbols.count(symbol), request)
+        if data[symbol] is None or len(data[symbol]) == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No historical data found for {strategy.symbol} between {request.startDate} and {request.endDate}"
+            )
+        try:
+            results = strategy.simulate(data[symbol], request.startDate, request.endDate,
+                                        entry_time=request.entryTime, exit_time=request.exitTime)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        members.append(_Member(strategy, results))
+    return members
+
+
+def run_portfolio(request: PortfolioBacktestRequest) -> dict:
+    """Backtest strategies against one shared account and report on it and on each strategy."""
+    if not 0 < request.marginLimit <= 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="marginLimit must be in (0, 1]")
+    members = _simulate(_strategies(request.strategyIds), request)
+
+    calendar = sorted({date for member in members for date in member.rows})
+    capital = request.initialCapital
+    dates, equity = [], []
+    peak_margin = 0.0
+    for date in calendar:
+        # Margin is reserved out of the equity at the start of the day
+        available = capital * request.marginLimit
+        reserved = 0.0
+        opened = []
+        for member in members:
+            row = member.rows.get(date)
+            if row is None:
+                continue
+            margin = member.margin[row]
+            if reserved + margin > available:
+                member.skipped += 1
+                continue
+            reserved += margin
+            member.peak_margin = max(member.peak_margin, margin)
+            opened.append((member, row))
+        peak_margin = max(peak_margin, reserved)
+
+        # Flows are added one at a time, in the engine's booking order
+        for member, row in opened:
+            before = capital
+            for flow in member.flows[row]:
+                capital += flow
+            member.dates.append(date)
+            member.pnl.append(capital - before)
+        if opened:
+            dates.append(date)
+            equity.append(capital)
+
+    return {
+        "strategyIds": [member.strategy.id for member in members],
+        "startDate": request.startDate,
+        "endDate": request.endDate,
+        "initialCapital": request.initialCapital,
+        "marginLimit": request.marginLimit,
+        "finalCapital": capital,
+        **performance_metrics(request.initialCapital, equity),
+        "tradeCount": sum(len(member.pnl) * 2 * member.legs for member in members),
+        "skippedEntries": sum(member.skipped for member in members),
+        "peakMargin": peak_margin,
+        "equityCurve": equity_curve(dates, request.initialCapital, equity),
+        "strategies": [member.summary(request.initialCapital) for member in members],
+        **({"entryTime": request.entryTime} if request.entryTime else {}),
+        **({"exitTime": request.exitTime} if request.exitTime else {})
+    }
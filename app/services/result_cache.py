@@ -0,0 +1,156 @@
+"""Memoized backtest results.
+
+A result is keyed by a hash of everything that determines its trades: the
+strategy's ``to_dict()`` without id, name and createdAt, the date range,
+the intraday entry/exit times and the version of the historical chains.
+The starting capital is not part of the key. Quantities are fixed, so the
+trades do not depend on it, and ``rescale`` turns a cached result into
+the one for another capital by shifting its equity curve.
+
+Each entry is one compact JSON file in ``data/result_cache/``. Entries
+older than OPTIONBOT_RESULT_CACHE_TTL hours are dropped. Past
+OPTIONBOT_RESULT_CACHE_MB, the least recently used entries are evicted
+first.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from models.performance import equity_curve, performance_metrics
+from models.trade_log import decode_result, encode_result
+
+# File paths
+DATA_DIR = os.environ.get("OPTIONBOT_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
+CACHE_DIR = os.path.join(DATA_DIR, "result_cache")
+
+MAX_BYTES = int(float(os.environ.get("OPTIONBOT_RESULT_CACHE_MB", "256")) * 1024 * 1024)
+MAX_AGE = float(os.environ.get("OPTIONBOT_RESULT_CACHE_TTL", "168")) * 3600
+
+# Strategy fields that do not change its results
+IGNORED_FIELDS = ('id', 'name', 'createdAt')
+
+
+def cache_key(
+    strategy: dict,
+    start_date: str,
+    end_date: str,
+    data_version: str,
+    entry_time: Optional[str] = None,
+    exit_time: Optional[str] = None
+) -> str:
+    """Hash of a backtest's inputs, excluding the initial capital."""
+    content = {
+        "strategy": {k: v for k, v in strategy.items() if k not in IGNORED_FIELDS},
+        "startDate": start_date,
+        "endDate": end_date,
+        "entryTime": entry_time,
+        "exitTime": exit_time,
+        "dataVersion": data_version
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def rescale(result: dict, initial_capital: float) -> dict:
+    """Return ``result`` as if it had started with ``initial_capital``.
+
+    Trades are unchanged; equity moves by the capital difference and the
+    metrics are recomputed from it. Returns a new dict.
+    """
+    shift = initial_capital - result['initialCapital']
+    dates = [point['date'] for point in result['equityCurve']]
+    equity = [point['equity'] + shift for point in result['equityCurve']]
+    return {
+        **result,
+        "initialCapital": initial_capital,
+        "finalCapital": float(equity[-1]) if equity else initial_capital,
+        **performance_metrics(initial_capital, equity),
+        "equityCurve": equity_curve(dates, initial_capital, equity),
+        "createdAt": datetime.utcnow().isoformat()
+    }
+
+
+class ResultCache:
+    """Backtest results on disk, keyed by ``cache_key``, bounded by size and age."""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.nbytes = 0
+        self._lock = threading.Lock()
+        # key -> (size in bytes, time stored), least recently used first
+        self._entries: Optional['OrderedDict[str, Tuple[int, float]]'] = None
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load(self) -> 'OrderedDict[str, Tuple[int, float]]':
+        # Called with self._lock held; after a restart, recency is approximated by age
+        if self._entries is None:
+            os.makedirs(self.directory, exist_ok=True)
+            found = []
+            for name in os.listdir(self.directory):
+                if name.endswith('.json'):
+                    stat = os.stat(os.path.join(self.directory, name))
+                    found.append((stat.st_mtime, name[:-len('.json')], stat.st_size))
+            self._entries = OrderedDict((key, (size, stored)) for stored, key, size in sorted(found))
+            self.nbytes = sum(size for size, _ in self._entries.values())
+            self._evict()
+        return self._entries
+
+    def _remove(self, key: str) -> None:
+        size, _ = self._entries.pop(key)
+        self.nbytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        expired = time.time() - self.max_age
+        for key in [k for k, (_, stored) in self._entries.items() if stored < expired]:
+            self._remove(key)
+        while self.nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached result for ``key``, or None."""
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time() - self.max_age:
+                self._remove(key)
+                return None
+            entries.move_to_end(key)
+        try:
+            with open(self._path(key), 'rb') as f:
+                return decode_result(json.loads(f.read()))
+        except (IOError, ValueError):
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+            return None
+
+    def put(self, key: str, result: dict) -> None:
+        """Store a result (larger than the whole budget: not stored)."""
+        data = json.dumps(encode_result(result), separators=(',', ':')).encode()
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            entries = self._load()
+            path = self._path(key)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+            if key in entries:
+                self.nbytes -= entries.pop(key)[0]
+            entries[key] = (len(data), time.time())
+            self.nbytes += len(data)
+            self._evict()
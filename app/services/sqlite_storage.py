@@ -0,0 +1,457 @@
+"""Embedded SQLite storage backend.
+
+Selected with ``OPTIONBOT_STORAGE=sqlite`` (the default, ``json``, keeps
+strategies.json and the backtest segment log). The database runs in WAL
+mode so readers never block the writer, and every write is a transaction,
+so concurrent requests (or API processes) cannot lose each other's updates.
+
+Tables:
+
+- ``strategies``: one row per strategy
+- ``backtests``: backtest summaries; the equity curve is kept as JSON
+- ``trades``: one row per trade, keyed by (backtest_id, seq)
+- ``option_quotes``: historical chains; the columnar chain store used by
+  backtests is rebuilt from this table whenever it changes
+
+Copy the existing JSON data into the database with::
+
+    python -m services.sqlite_storage migrate [--db path]
+"""
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from models.trade_log import TradeLog
+from . import chain_store
+from .backtest_log import BacktestLog
+from .file_service import read_json_file
+
+# File paths
+DATA_DIR = os.environ.get("OPTIONBOT_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
+DATABASE_FILE = os.environ.get("OPTIONBOT_SQLITE_PATH", os.path.join(DATA_DIR, "optionbot.db"))
+POOL_SIZE = int(os.environ.get("OPTIONBOT_SQLITE_POOL", "4"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS strategies (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    expiration TEXT NOT NULL,
+    legs TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS strategies_symbol ON strategies (symbol);
+CREATE TABLE IF NOT EXISTS backtests (
+    backtest_id TEXT PRIMARY KEY,
+    strategy_id TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    initial_capital REAL NOT NULL,
+    final_capital REAL NOT NULL,
+    created_at TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS backtests_strategy ON backtests (strategy_id, created_at);
+CREATE TABLE IF NOT EXISTS trades (
+    backtest_id TEXT NOT NULL REFERENCES backtests (backtest_id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    action TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    strike REAL,
+    expiration TEXT,
+    option_type TEXT,
+    premium REAL,
+    quantity INTEGER,
+    price REAL,
+    pnl REAL,
+    time TEXT,
+    PRIMARY KEY (backtest_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS trades_date ON trades (backtest_id, date);
+CREATE TABLE IF NOT EXISTS option_quotes (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    underlying_price REAL NOT NULL,
+    strike REAL,
+    expiration TEXT,
+    option_type TEXT,
+    bid REAL,
+    ask REAL,
+    mid REAL,
+    volume INTEGER,
+    open_interest INTEGER,
+    implied_volatility REAL,
+    PRIMARY KEY (symbol, date, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS option_quotes_strike ON option_quotes (symbol, date, option_type, strike);
+"""
+
+# Columns stored for a backtest outside its summary JSON
+BACKTEST_COLUMNS = ('backtestId', 'strategyId', 'startDate', 'endDate', 'initialCapital', 'finalCapital', 'createdAt')
+
+# option_quotes column -> historical_data.json option field
+QUOTE_FIELDS = {
+    'strike': 'strike',
+    'expiration': 'expiration',
+    'option_type': 'optionType',
+    'bid': 'bid',
+    'ask': 'ask',
+    'mid': 'mid',
+    'volume': 'volume',
+    'open_interest': 'openInterest',
+    'implied_volatility': 'impliedVolatility',
+}
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Add the columns that databases created by earlier versions lack."""
+    columns = {row['name'] for row in conn.execute("PRAGMA table_info(trades)")}
+    if 'time' not in columns:
+        # Intraday trade times; NULL for daily backtests
+        try:
+            conn.execute("ALTER TABLE trades ADD COLUMN time TEXT")
+        except sqlite3.OperationalError:
+            pass  # added meanwhile by another connection
+
+
+class ConnectionPool:
+    """A fixed number of SQLite connections shared between threads.
+
+    Connections are opened lazily, so forked worker processes never inherit
+    an open connection.
+    """
+
+    def __init__(self, path: str = DATABASE_FILE, size: int = POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle: queue.Queue = queue.Queue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(SCHEMA)
+        _migrate(conn)
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; the block runs as one transaction."""
+        with self._lock:
+            opened = self._opened < self.size and self._idle.empty()
+            if opened:
+                self._opened += 1
+        try:
+            conn = self._connect() if opened else self._idle.get()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self) -> None:
+        """Close idle connections."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+
+def _strategy_row(strategy: dict) -> tuple:
+    return (
+        strategy['id'], strategy['name'], strategy['symbol'], strategy['strategy'],
+        strategy['expiration'], json.dumps(strategy['legs']), strategy['quantity'], strategy['createdAt']
+    )
+
+
+def _strategy_dict(row: sqlite3.Row) -> dict:
+    return {
+        "id": row['id'],
+        "name": row['name'],
+        "symbol": row['symbol'],
+        "strategy": row['strategy'],
+        "expiration": row['expiration'],
+        "legs": json.loads(row['legs']),
+        "quantity": row['quantity'],
+        "createdAt": row['created_at']
+    }
+
+
+class SqliteStrategyRepository:
+    """Strategies table with the StrategyRepository interface."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    def all(self) -> List[dict]:
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT * FROM strategies ORDER BY rowid").fetchall()
+        return [_strategy_dict(row) for row in rows]
+
+    def get(self, strategy_id: str) -> Optional[dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT * FROM strategies WHERE id = ?", (strategy_id,)).fetchone()
+        return _strategy_dict(row) if row else None
+
+    def put(self, strategy: dict) -> None:
+        with self.pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO strategies VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = excluded.name, symbol = excluded.symbol, "
+                "strategy = excluded.strategy, expiration = excluded.expiration, legs = excluded.legs, "
+                "quantity = excluded.quantity",
+                _strategy_row(strategy)
+            )
+
+    def delete(self, strategy_id: str) -> bool:
+        with self.pool.connection() as conn:
+            return conn.execute("DELETE FROM strategies WHERE id = ?", (strategy_id,)).rowcount > 0
+
+    def flush(self) -> None:
+        """Writes are committed immediately; nothing to flush."""
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class SqliteBacktestStore:
+    """Backtest summary and trade tables with the BacktestLog interface."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, record: dict) -> None:
+        summary = {k: v for k, v in record.items() if k not in BACKTEST_COLUMNS and k != 'trades'}
+        conn.execute("DELETE FROM backtests WHERE backtest_id = ?", (record['backtestId'],))
+        conn.execute(
+            "INSERT INTO backtests VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            tuple(record.get(name) for name in BACKTEST_COLUMNS) + (json.dumps(summary),)
+        )
+        trades = record.get('trades', [])
+        if not isinstance(trades, TradeLog):
+            trades = TradeLog.from_trades(trades)
+        columns = trades.columns()
+        times = columns.get('time') or [None] * len(columns['date'])
+        conn.executemany(
+            "INSERT INTO trades (backtest_id, seq, date, action, symbol, strike, expiration, option_type, "
+            "premium, quantity, price, pnl, time) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    record['backtestId'], seq, date, action, trades.symbol, strike, trades.expiration,
+                    option_type, premium, trades.quantity, price, pnl, time
+                )
+                for seq, (date, action, option_type, strike, premium, price, pnl, time) in enumerate(zip(
+                    columns['date'], columns['action'], columns['optionType'], columns['strike'],
+                    columns['premium'], columns['price'], columns['pnl'], times
+                ))
+            )
+        )
+
+    def append(self, record: dict) -> None:
+        with self.pool.connection() as conn:
+            self._insert(conn, record)
+
+    @staticmethod
+    def _trades(conn: sqlite3.Connection, backtest_id: str) -> TradeLog:
+        rows = conn.execute(
+            "SELECT date, option_type, action, strike, premium, price, pnl, symbol, expiration, quantity, time "
+            "FROM trades WHERE backtest_id = ? ORDER BY seq", (backtest_id,)
+        ).fetchall()
+        if not rows:
+            return TradeLog.from_trades([])
+        columns = list(zip(*rows))
+        return TradeLog.from_columns(
+            symbol=columns[7][0],
+            expiration=columns[8][0],
+            quantity=columns[9][0],
+            dates=columns[0],
+            # Daily backtests store no times
+            times=columns[10] if any(time is not None for time in columns[10]) else None,
+            option_types=columns[1],
+            actions=columns[2],
+            strike=columns[3],
+            premium=columns[4],
+            price=columns[5],
+            pnl=columns[6]
+        )
+
+    @classmethod
+    def _record(cls, conn: sqlite3.Connection, row: sqlite3.Row) -> dict:
+        record = {name: row[i] for i, name in enumerate(BACKTEST_COLUMNS)}
+        record.update(json.loads(row['summary']))
+        record['trades'] = cls._trades(conn, row['backtest_id'])
+        return record
+
+    def get(self, backtest_id: str) -> Optional[dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT * FROM backtests WHERE backtest_id = ?", (backtest_id,)).fetchone()
+            return self._record(conn, row) if row else None
+
+    def get_trades(self, backtest_id: str) -> Optional[TradeLog]:
+        with self.pool.connection() as conn:
+            if conn.execute("SELECT 1 FROM backtests WHERE backtest_id = ?", (backtest_id,)).fetchone() is None:
+                return None
+            return self._trades(conn, backtest_id)
+
+    def ids(self) -> List[str]:
+        with self.pool.connection() as conn:
+            return [row[0] for row in conn.execute("SELECT backtest_id FROM backtests ORDER BY rowid")]
+
+    def __len__(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM backtests").fetchone()[0]
+
+    def __iter__(self) -> Iterator[dict]:
+        for backtest_id in self.ids():
+            record = self.get(backtest_id)
+            if record is not None:
+                yield record
+
+
+class SqliteChainSource:
+    """Option quotes table feeding the columnar chain store."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    def import_records(self, records: List[dict]) -> int:
+        """Replace the quotes of every (symbol, date) in ``records``; return the row count."""
+        rows = []
+        days = set()
+        for record in records:
+            key = (record.get('symbol', '').upper(), record.get('date', '')[:10])
+            if key in days:
+                continue  # the chain store keeps the first snapshot of a date
+            days.add(key)
+            for seq, option in enumerate(record.get('options', [])):
+                rows.append(key + (seq, record.get('underlyingPrice', 0) or 0) + tuple(
+                    option.get(field) for field in QUOTE_FIELDS.values()
+                ))
+
+        with self.pool.connection() as conn:
+            conn.executemany("DELETE FROM option_quotes WHERE symbol = ? AND date = ?", days)
+            conn.executemany(
+                f"INSERT INTO option_quotes VALUES ({', '.join('?' * 13)})", rows
+            )
+            version = int(self._meta(conn, 'chains_version') or 0) + 1
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('chains_version', ?)", (str(version),)
+            )
+        return len(rows)
+
+    @staticmethod
+    def _meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def source(self) -> Optional[dict]:
+        """Stamp identifying the current quotes, or None if there are none."""
+        with self.pool.connection() as conn:
+            version = self._meta(conn, 'chains_version')
+        if version is None:
+            return None
+        return {"path": "sqlite:" + os.path.abspath(self.pool.path), "version": int(version)}
+
+    def records(self) -> List[dict]:
+        """All quotes as historical_data.json style day records."""
+        records = []
+        current = None
+        with self.pool.connection() as conn:
+            for row in conn.execute("SELECT * FROM option_quotes ORDER BY symbol, date, seq"):
+                if current is None or (current['symbol'], current['date']) != (row['symbol'], row['date']):
+                    current = {
+                        "date": row['date'],
+                        "symbol": row['symbol'],
+                        "underlyingPrice": row['underlying_price'],
+                        "options": []
+                    }
+                    records.append(current)
+                current['options'].append({
+                    field: row[column] for column, field in QUOTE_FIELDS.items()
+                    if row[column] is not None
+                })
+        return records
+
+    def ensure_store(self, store_dir: str = chain_store.CHAINS_DIR) -> Optional[dict]:
+        """Rebuild the columnar chain store if the quotes changed; return its manifest.
+
+        Returns None when the table holds no quotes.
+        """
+        source = self.source()
+        if source is None:
+            return None
+        manifest = chain_store.read_manifest(store_dir)
+        if manifest is not None and manifest.get('source') == source:
+            return manifest
+        with chain_store.building(store_dir):
+            manifest = chain_store.read_manifest(store_dir)
+            if manifest is not None and manifest.get('source') == source:
+                return manifest
+            return chain_store.import_records(self.records(), store_dir=store_dir, source=source)
+
+
+def migrate(
+    db_path: str = DATABASE_FILE,
+    strategies_file: str = os.path.join(DATA_DIR, "strategies.json"),
+    backtests: Optional[BacktestLog] = None,
+    historical_file: str = chain_store.HISTORICAL_DATA_FILE
+) -> dict:
+    """Copy strategies, backtest results and option chains into SQLite."""
+    pool = ConnectionPool(db_path, size=1)
+    counts = {"strategies": 0, "backtests": 0, "quotes": 0}
+
+    with pool.connection() as conn:
+        for strategy in read_json_file(strategies_file):
+            conn.execute("INSERT OR REPLACE INTO strategies VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _strategy_row(strategy))
+            counts['strategies'] += 1
+        for record in backtests if backtests is not None else BacktestLog():
+            SqliteBacktestStore._insert(conn, record)
+            counts['backtests'] += 1
+
+    if os.path.exists(historical_file):
+        with open(historical_file, 'r') as f:
+            counts['quotes'] = SqliteChainSource(pool).import_records(json.load(f))
+    pool.close()
+    return counts
+
+
+def main(argv: List[str]) -> int:
+    if not argv or argv[0] != 'migrate':
+        print("usage: python -m services.sqlite_storage migrate [--db path]")
+        return 2
+    db_path = argv[argv.index('--db') + 1] if '--db' in argv else DATABASE_FILE
+    counts = migrate(db_path)
+    print(f"{counts['strategies']} strategies, {counts['backtests']} backtests, "
+          f"{counts['quotes']} option quotes -> {os.path.abspath(db_path)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,109 @@
+"""In-memory strategy store with write-behind persistence.
+
+strategies.json is parsed once into an id-keyed dict; reads are served from
+memory and writes mark the store dirty. A timer flushes dirty state to disk
+(through ``write_json_file``, so the file is replaced atomically) at most
+once per flush interval, and ``close()`` flushes whatever is left on
+shutdown. The file is only read at start-up, so edits made to it by hand
+while the API is running are overwritten by the next flush.
+"""
+import atexit
+import copy
+import os
+import threading
+from typing import Dict, List, Optional
+
+from .file_service import read_json_file, write_json_file
+
+# Seconds between a write and the flush that persists it
+FLUSH_INTERVAL = float(os.environ.get("OPTIONBOT_FLUSH_INTERVAL", "1.0"))
+
+
+class StrategyRepository:
+    """Strategies keyed by id, persisted to a JSON file in the background."""
+
+    def __init__(self, file_path: str, flush_interval: float = FLUSH_INTERVAL):
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # Serializes flushes so an older snapshot never overwrites a newer one
+        self._flush_lock = threading.Lock()
+        self._items: Optional[Dict[str, dict]] = None
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.close)
+
+    def _load(self) -> Dict[str, dict]:
+        # Called with self._lock held; dicts keep the file's order
+        if self._items is None:
+            self._items = {
+                strategy.get('id'): strategy
+                for strategy in read_json_file(self.file_path)
+            }
+        return self._items
+
+    def all(self) -> List[dict]:
+        """Return copies of all strategies, in creation order."""
+        with self._lock:
+            return [copy.deepcopy(strategy) for strategy in self._load().values()]
+
+    def get(self, strategy_id: str) -> Optional[dict]:
+        """Return a copy of a strategy, or None if it does not exist."""
+        with self._lock:
+            strategy = self._load().get(strategy_id)
+            return copy.deepcopy(strategy) if strategy is not None else None
+
+    def put(self, strategy: dict) -> None:
+        """Insert or replace a strategy (keyed by its ``id``)."""
+        with self._lock:
+            self._load()[strategy['id']] = copy.deepcopy(strategy)
+            self._mark_dirty()
+
+    def delete(self, strategy_id: str) -> bool:
+        """Remove a strategy; return False if it did not exist."""
+        with self._lock:
+            if self._load().pop(strategy_id, None) is None:
+                return False
+            self._mark_dirty()
+            return True
+
+    def _mark_dirty(self) -> None:
+        # Called with self._lock held
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_from_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush()
+        except Exception:
+            # Keep the changes pending; the next write or close() retries
+            with self._lock:
+                self._dirty = True
+
+    def flush(self) -> None:
+        """Write pending changes to disk now."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = list(self._items.values())
+                self._dirty = False
+            try:
+                write_json_file(self.file_path, snapshot)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def close(self) -> None:
+        """Cancel the pending timer and flush; called on shutdown."""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush()
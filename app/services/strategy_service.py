@@ -1,49 +1,87 @@
+import base64
+import json
 import os
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 from uuid import uuid4
 from datetime import datetime
+
+import numpy as np
 from fastapi import HTTPException, status
 
-from .file_service import read_json_file, write_json_file
+from . import chain_store, metrics, sqlite_storage
+from .backtest_log import BacktestLog
+from .result_cache import ResultCache
+from .strategy_repository import StrategyRepository
 from schemas import (
     CreateStrategyRequest,
     UpdateStrategyRequest
 )
 from models.strategy_base import Strategy
+from models.option_chain import ChainChunks, ChainFrame, OPTION_TYPES, to_day
+from models.monte_carlo import bootstrap
+from models.performance import performance_metrics
+from models.trade_log import ACTIONS, SORT_FIELDS
 
 # File paths
-DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+DATA_DIR = os.environ.get("OPTIONBOT_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
 STRATEGIES_FILE = os.path.join(DATA_DIR, "strategies.json")
 BACKTESTS_FILE = os.path.join(DATA_DIR, "backtests.json")
+BACKTESTS_DIR = os.path.join(DATA_DIR, "backtests")
 HISTORICAL_DATA_FILE = os.path.join(DATA_DIR, "historical_data.json")
 
+# Storage backend: 'json' (files under data/) or 'sqlite'
+STORAGE_BACKEND = os.environ.get("OPTIONBOT_STORAGE", "json").lower()
+
 # Ensure data directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
+if STORAGE_BACKEND == "sqlite":
+    _pool = sqlite_storage.ConnectionPool()
+    strategies = sqlite_storage.SqliteStrategyRepository(_pool)
+    backtests = sqlite_storage.SqliteBacktestStore(_pool)
+    chain_source = sqlite_storage.SqliteChainSource(_pool)
+elif STORAGE_BACKEND == "json":
+    # Strategies are served from memory and written back to STRATEGIES_FILE
+    # in the background
+    strategies = StrategyRepository(STRATEGIES_FILE)
+    # Backtest results are appended to a segment log (backtests.json is
+    # imported into it the first time it is opened)
+    backtests = BacktestLog(BACKTESTS_DIR, legacy_file=BACKTESTS_FILE)
+    chain_source = None
+else:
+    raise ValueError(f"Unknown OPTIONBOT_STORAGE backend: {STORAGE_BACKEND}")
+
+# Results of earlier runs, reused when the same backtest is requested again
+result_cache = ResultCache()
+
+# Largest page of trades served at once
+MAX_TRADES_PAGE = 1000
+# Most resampled paths in one Monte Carlo run
+MAX_MONTE_CARLO_PATHS = 100000
+
 
 def generate_id() -> str:
     """Generate a unique UUID4 string."""
     return str(uuid4())
 
 
+@metrics.timed("get_all_strategies")
 def get_all_strategies() -> List[dict]:
     """Get all strategies."""
-    return read_json_file(STRATEGIES_FILE)
+    with metrics.stage("strategy_read"):
+        return strategies.all()
 
 
+@metrics.timed("get_strategy_by_id")
 def get_strategy_by_id(strategy_id: str) -> Optional[dict]:
     """Get a strategy by ID."""
-    strategies = get_all_strategies()
-    for strategy in strategies:
-        if strategy.get('id') == strategy_id:
-            return strategy
-    return None
+    with metrics.stage("strategy_read"):
+        return strategies.get(strategy_id)
 
 
+@metrics.timed("create_strategy")
 def create_strategy(request: CreateStrategyRequest) -> dict:
     """Create a new strategy."""
-    strategies = get_all_strategies()
-    
     # Generate unique ID and create strategy
     strategy_id = generate_id()
     strategy_name = f"{request.strategy} - {request.symbol} {request.expiration}"
@@ -59,15 +97,15 @@ def create_strategy(request: CreateStrategyRequest) -> dict:
         "createdAt": datetime.utcnow().isoformat()
     }
     
-    strategies.append(new_strategy)
-    write_json_file(STRATEGIES_FILE, strategies)
+    with metrics.stage("strategy_write"):
+        strategies.put(new_strategy)
     
     return new_strategy
 
 
+@metrics.timed("update_strategy")
 def update_strategy(strategy_id: str, request: UpdateStrategyRequest) -> dict:
     """Update an existing strategy."""
-    strategies = get_all_strategies()
     strategy = get_strategy_by_id(strategy_id)
     
     if not strategy:
@@ -92,25 +130,23 @@ def update_strategy(strategy_id: str, request: UpdateStrategyRequest) -> dict:
     if any([request.symbol, request.strategy, request.expiration]):
         strategy['name'] = f"{strategy['strategy']} - {strategy['symbol']} {strategy['expiration']}"
     
-    write_json_file(STRATEGIES_FILE, strategies)
+    with metrics.stage("strategy_write"):
+        strategies.put(strategy)
     
     return strategy
 
 
+@metrics.timed("delete_strategy")
 def delete_strategy(strategy_id: str) -> bool:
     """Delete a strategy."""
-    strategies = get_all_strategies()
-    strategy = get_strategy_by_id(strategy_id)
-    
-    if not strategy:
+    with metrics.stage("strategy_write"):
+        deleted = strategies.delete(strategy_id)
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Strategy with id {strategy_id} not found"
         )
     
-    strategies.remove(strategy)
-    write_json_file(STRATEGIES_FILE, strategies)
-    
     return True
 
 
@@ -129,35 +165,215 @@ def get_strategy_instance(strategy_id: str) -> Optional[Strategy]:
         )
 
 
+def _check_dates(start_date: str, end_date: str) -> None:
+    """Reject malformed dates before they reach the chain store."""
+    for name, value in (('startDate', start_date), ('endDate', end_date)):
+        try:
+            to_day(value)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid {name}: {value!r} (expected YYYY-MM-DD)"
+            )
+
+
+def get_historical_frame(symbol: str, start_date: str, end_date: str) -> Optional[ChainFrame]:
+    """Fetch historical option chains for symbol within date range as columns.
+    
+    Reads from the memory-mapped chain store, which is (re)built from
+    historical_data.json (or, with the SQLite backend, the option_quotes
+    table once it has been populated) whenever its source changes.
+    """
+    _check_dates(start_date, end_date)
+    _ensure_chain_store()
+    return chain_store.load_range(symbol, start_date, end_date)
+
+
+def get_historical_chain(symbol: str, start_date: str, end_date: str) -> Optional[Union[ChainFrame, ChainChunks]]:
+    """Fetch historical option chains for a backtest.
+    
+    Like get_historical_frame, but intraday data comes back as a ChainChunks
+    that reads a few dates at a time instead of the whole range at once.
+    """
+    _check_dates(start_date, end_date)
+    _ensure_chain_store()
+    if chain_store.is_intraday(symbol):
+        return chain_store.load_chunks(symbol, start_date, end_date)
+    return chain_store.load_range(symbol, start_date, end_date)
+
+
+def get_price_history(symbol: str, start_date: str, end_date: str) -> Optional[Dict[str, np.ndarray]]:
+    """Fetch the underlying price of every snapshot within date range, without the quotes."""
+    _check_dates(start_date, end_date)
+    _ensure_chain_store()
+    return chain_store.load_snapshots(symbol, start_date, end_date)
+
+
+def get_chain_info(symbol: str) -> Optional[dict]:
+    """Stored date range and counts of a symbol's chains, or None if it has none."""
+    _ensure_chain_store()
+    return chain_store.symbol_info(symbol)
+
+
+def data_version() -> Optional[str]:
+    """Version of the chains a backtest would read right now.
+    
+    None when the store is missing or out of date; the next backtest
+    rebuilds it, so no version can be promised before then.
+    """
+    manifest = chain_store.read_manifest()
+    if manifest is None:
+        return None
+    source = chain_source.source() if chain_source is not None else None
+    if source is not None:
+        return manifest['version'] if manifest.get('source') == source else None
+    if chain_store.is_stale(HISTORICAL_DATA_FILE):
+        return None
+    return manifest['version']
+
+
+def _ensure_chain_store() -> None:
+    if chain_source is None or chain_source.ensure_store() is None:
+        chain_store.ensure_store(HISTORICAL_DATA_FILE)
+
+
+@metrics.timed("get_historical_data")
 def get_historical_data(symbol: str, start_date: str, end_date: str) -> List[dict]:
     """Fetch historical price data for symbol within date range.
     
-    Reads from historical_data.json file and filters by symbol and date range.
+    Returns day records in historical_data.json layout, sorted by date.
+    """
+    with metrics.stage("load_chain"):
+        frame = get_historical_frame(symbol, start_date, end_date)
+    
+    # If no data found, return empty list
+    if frame is None:
+        return []
+    with metrics.stage("to_records"):
+        return frame.to_records()
+
+
+@metrics.timed("compute_backtest")
+def compute_backtest(
+    strategy: Strategy,
+    start_date: str,
+    end_date: str,
+    initial_capital: float,
+    progress: Optional[Callable[[int, int], None]] = None,
+    entry_time: Optional[str] = None,
+    exit_time: Optional[str] = None
+) -> dict:
+    """Run a backtest for a strategy instance without saving the result."""
+    # Fetch historical data as columns (the backtest engine works on arrays)
+    with metrics.stage("load_chain"):
+        historical_data = get_historical_chain(
+            strategy.symbol,
+            start_date,
+            end_date
+        )
+    
+    if historical_data is None or len(historical_data) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No historical data found for {strategy.symbol} between {start_date} and {end_date}"
+        )
+    
+    # Run backtest using strategy's backtest method
+    try:
+        with metrics.stage("backtest"):
+            return strategy.backtest(
+                start_date=start_date,
+                end_date=end_date,
+                initial_capital=initial_capital,
+                historical_data=historical_data,
+                progress=progress,
+                entry_time=entry_time,
+                exit_time=exit_time
+            )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def stream_backtest(
+    strategy_id: str,
+    start_date: str,
+    end_date: str,
+    initial_capital: float,
+    entry_time: Optional[str] = None,
+    exit_time: Optional[str] = None
+) -> Iterator[Tuple[str, dict]]:
+    """Run a backtest and return an iterator of (event, payload) pairs.
+    
+    Emits a "day" event per trading day (trades, running capital, progress)
+    and a final "summary" event with the metrics. Validation happens before
+    the iterator is returned, so errors can still become HTTP errors. The
+    full trade list is never held in memory, so streamed runs are not saved.
     """
-    # Read historical data from JSON file
-    all_data = read_json_file(HISTORICAL_DATA_FILE)
+    strategy = get_strategy_instance(strategy_id)
+    if not strategy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Strategy with id {strategy_id} not found"
+        )
+    
+    historical_data = get_historical_chain(strategy.symbol, start_date, end_date)
+    if historical_data is None or len(historical_data) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No historical data found for {strategy.symbol} between {start_date} and {end_date}"
+        )
     
-    # Filter by symbol and date range
-    filtered_data = [
-        entry for entry in all_data
-        if entry.get('symbol', '').upper() == symbol.upper()
-        and start_date <= entry.get('date', '') <= end_date
-    ]
+    try:
+        days = strategy.stream_backtest(start_date, end_date, initial_capital, historical_data,
+                                        entry_time, exit_time)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    # Sort by date
-    filtered_data.sort(key=lambda x: x.get('date', ''))
+    def events() -> Iterator[Tuple[str, dict]]:
+        equity = []
+        trade_count = 0
+        try:
+            for day in days:
+                equity.append(day['capital'])
+                trade_count += len(day['trades'])
+                yield "day", day
+        except ValueError as e:
+            yield "error", {"detail": str(e)}
+            return
+        
+        yield "summary", {
+            "strategyId": strategy.id,
+            "startDate": start_date,
+            "endDate": end_date,
+            "initialCapital": initial_capital,
+            "finalCapital": equity[-1] if equity else initial_capital,
+            **performance_metrics(initial_capital, equity),
+            "tradeCount": trade_count
+        }
     
-    # If no data found, return empty list (or could return mock data as fallback)
-    return filtered_data
+    return events()
+
 
+def save_backtest(backtest_result: dict) -> None:
+    """Save a backtest result."""
+    with metrics.stage("save"):
+        backtests.append(backtest_result)
 
+
+@metrics.timed("run_backtest")
 def run_backtest(
     strategy_id: str,
     start_date: str,
     end_date: str,
     initial_capital: float
 ) -> dict:
-    """Run a backtest for a strategy."""
+    """Run a backtest for a strategy and save the result."""
     # Get strategy instance
     strategy = get_strategy_instance(strategy_id)
     if not strategy:
@@ -166,51 +382,277 @@ def run_backtest(
             detail=f"Strategy with id {strategy_id} not found"
         )
     
-    # Fetch historical data
-    historical_data = get_historical_data(
-        strategy.symbol,
-        start_date,
-        end_date
-    )
+    backtest_result = compute_backtest(strategy, start_date, end_date, initial_capital)
+    save_backtest(backtest_result)
+    
+    return backtest_result
+
+
+@metrics.timed("extend_backtest")
+def extend_backtest(backtest_id: str, end_date: str) -> dict:
+    """Extend a stored backtest to a later end date and save it.
     
-    if not historical_data:
+    Only the days after the last stored one are simulated (that day is
+    simulated again so it can close on the next trading day); the result
+    keeps its backtestId. The strategy's current settings are used.
+    """
+    result = get_backtest_by_id(backtest_id)
+    if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No historical data found for {strategy.symbol} between {start_date} and {end_date}"
+            detail=f"Backtest with id {backtest_id} not found"
+        )
+    if end_date <= result['endDate']:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"End date {end_date} must be later than the backtest's end date {result['endDate']}"
         )
     
-    # Run backtest using strategy's backtest method
-    try:
-        backtest_result = strategy.backtest(
-            start_date=start_date,
-            end_date=end_date,
-            initial_capital=initial_capital,
-            historical_data=historical_data
+    strategy = get_strategy_instance(result['strategyId'])
+    if not strategy:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Strategy with id {result['strategyId']} not found"
         )
+    
+    # The new days, from the last day the stored result traded
+    curve = result.get('equityCurve') or []
+    resume_date = curve[-1]['date'] if curve else result['startDate']
+    with metrics.stage("load_chain"):
+        historical_data = get_historical_chain(strategy.symbol, resume_date, end_date)
+    if historical_data is None or len(historical_data) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No historical data found for {strategy.symbol} between {resume_date} and {end_date}"
+        )
+    
+    try:
+        with metrics.stage("backtest"):
+            extended = strategy.extend_backtest(result, end_date, historical_data)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
     
-    # Save backtest result
-    backtests = get_all_backtests()
-    backtests.append(backtest_result)
-    write_json_file(BACKTESTS_FILE, backtests)
+    save_backtest(extended)
+    return extended
+
+
+def backtest_payload(
+    result: dict,
+    summary: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None
+) -> dict:
+    """Turn a backtest result into its API response.
     
-    return backtest_result
+    Trades are kept as a TradeLog internally and only become Trade dicts
+    here. ``summary`` leaves them out; otherwise ``offset`` and ``limit``
+    select a page of them. ``tradeCount`` is always the total.
+    """
+    if offset < 0 or (limit is not None and limit < 0):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="offset and limit must not be negative"
+        )
+    
+    trades = result['trades']
+    payload = {k: v for k, v in result.items() if k != 'trades'}
+    payload['tradeCount'] = len(trades)
+    if not summary:
+        with metrics.stage("payload"):
+            payload['trades'] = trades.to_trades(offset, offset + limit if limit is not None else None)
+    return payload
+
+
+def _encode_cursor(sort: str, key, seq: int) -> str:
+    data = json.dumps([sort, key, seq], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, key, seq = json.loads(data)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor belongs to a different sort order"
+        )
+    # The key is compared with the sort column, so it must be of its type
+    sort_by = sort.split(':')[0]
+    if sort_by == 'date':
+        valid_key = isinstance(key, str)
+    elif sort_by == 'seq':
+        valid_key = isinstance(key, int) and not isinstance(key, bool)
+    else:
+        valid_key = _is_number(key)
+    if not valid_key or not isinstance(seq, int) or isinstance(seq, bool):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return key, seq
+
+
+@metrics.timed("get_backtest_trades")
+def get_backtest_trades(
+    backtest_id: str,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    option_type: Optional[str] = None,
+    action: Optional[str] = None,
+    sort_by: str = 'seq',
+    order: str = 'asc'
+) -> dict:
+    """Return one page of a stored backtest's trades.
+    
+    Only the trades are read from storage, not the rest of the result.
+    Trades can be filtered by (inclusive) date range, option type and
+    action, and sorted by any of SORT_FIELDS. Pages are keyset-paginated:
+    ``nextCursor`` holds the sort key and position of the page's last
+    trade, so a page stays correct if the backtest is extended meanwhile.
+    """
+    if sort_by not in SORT_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sortBy must be one of {', '.join(SORT_FIELDS)}"
+        )
+    if order not in ('asc', 'desc'):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="order must be asc or desc")
+    if option_type is not None and option_type not in OPTION_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"optionType must be one of {', '.join(OPTION_TYPES)}"
+        )
+    if action is not None and action not in ACTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"action must be one of {', '.join(ACTIONS)}"
+        )
+    if not 1 <= limit <= MAX_TRADES_PAGE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"limit must be between 1 and {MAX_TRADES_PAGE}"
+        )
+    
+    with metrics.stage("read_result"):
+        trades = backtests.get_trades(backtest_id)
+    if trades is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Backtest with id {backtest_id} not found"
+        )
+    
+    descending = order == 'desc'
+    sort = f"{sort_by}:{order}"
+    with metrics.stage("query"):
+        rows = trades.query(start_date, end_date, option_type, action, sort_by, descending)
+        keys = trades.sort_keys(sort_by)[rows]
+        start = 0
+        if cursor:
+            key, seq = _decode_cursor(cursor, sort)
+            # First trade past the cursor in (key, booking order)
+            past = keys < key if descending else keys > key
+            after = past | ((keys == key) & (rows > seq))
+            start = int(np.argmax(after)) if after.any() else len(rows)
+    
+    page = rows[start:start + limit]
+    next_cursor = None
+    if start + limit < len(rows):
+        last = page[-1]
+        next_cursor = _encode_cursor(sort, keys[start + limit - 1].item(), int(last))
+    
+    with metrics.stage("payload"):
+        page_trades = [
+            {**trade, "seq": seq}
+            for seq, trade in zip(page.tolist(), trades.take(page).to_trades())
+        ]
+    return {
+        "backtestId": backtest_id,
+        "tradeCount": len(rows),
+        "trades": page_trades,
+        "nextCursor": next_cursor
+    }
+
+
+@metrics.timed("monte_carlo")
+def monte_carlo(
+    backtest_id: str,
+    paths: int = 10000,
+    block_size: int = 1,
+    confidence: float = 0.95,
+    bins: int = 30,
+    seed: Optional[int] = None
+) -> dict:
+    """Bootstrap a stored backtest's daily P&L into ``paths`` alternative paths.
+    
+    Returns the distributions of final capital, total return, max drawdown
+    and Sharpe ratio over the paths, next to the backtest's own values.
+    ``block_size`` > 1 resamples blocks of consecutive days.
+    """
+    if not 1 <= paths <= MAX_MONTE_CARLO_PATHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"paths must be between 1 and {MAX_MONTE_CARLO_PATHS}"
+        )
+    if not 0 < confidence < 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="confidence must be between 0 and 1")
+    if not 1 <= bins <= 1000:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="bins must be between 1 and 1000")
+    
+    result = get_backtest_by_id(backtest_id)
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Backtest with id {backtest_id} not found"
+        )
+    
+    initial_capital = result['initialCapital']
+    equity = np.array([point['equity'] for point in result.get('equityCurve') or []], dtype='float64')
+    pnl = np.diff(np.concatenate([[initial_capital], equity]))
+    try:
+        with metrics.stage("resample"):
+            distributions = bootstrap(initial_capital, pnl, paths, block_size, confidence, bins, seed)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {
+        "backtestId": backtest_id,
+        "paths": paths,
+        "days": len(pnl),
+        "blockSize": block_size,
+        "confidence": confidence,
+        "seed": seed,
+        "historical": {
+            "finalCapital": result['finalCapital'],
+            "totalReturn": result['totalReturn'],
+            "maxDrawdown": result['maxDrawdown'],
+            "sharpeRatio": result['sharpeRatio']
+        },
+        **distributions
+    }
 
 
+@metrics.timed("get_all_backtests")
 def get_all_backtests() -> List[dict]:
     """Get all backtest results."""
-    return read_json_file(BACKTESTS_FILE)
+    with metrics.stage("read_result"):
+        return list(backtests)
 
 
+@metrics.timed("get_backtest_by_id")
 def get_backtest_by_id(backtest_id: str) -> Optional[dict]:
     """Get a backtest result by ID."""
-    backtests = get_all_backtests()
-    for backtest in backtests:
-        if backtest.get('backtestId') == backtest_id:
-            return backtest
-    return None
+    with metrics.stage("read_result"):
+        return backtests.get(backtest_id)
 
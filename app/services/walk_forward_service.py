@@ -0,0 +1,216 @@
+"""Walk-forward optimization of 0DTE Iron Condor leg deltas.
+
+``[startDate, endDate]`` is split into rolling windows: every combination
+of the delta grid is ranked on an in-sample window of ``inSampleDays``
+trading days, and the best one is traded on the ``outOfSampleDays`` that
+follow. The windows then roll forward by the out-of-sample length, and the
+out-of-sample days are stitched into one account.
+
+Each leg of a 0DTE Iron Condor is entered and exited on its own, so a
+day's P&L is the sum of its legs' P&L. Every value of every leg is
+simulated once over the whole range; a combination's P&L in any window is
+then a sum of slices of those rows instead of a backtest per combination
+per window. As in a single backtest over the range, a position entered on
+the last day of a window closes on the next trading day.
+"""
+import itertools
+from typing import List, Tuple
+
+import numpy as np
+from fastapi import HTTPException, status
+
+from schemas import IronCondorLegRanges, WalkForwardRequest
+from models.iron_condor import IronCondor
+from models.monte_carlo import BATCH_CELLS, path_metrics
+from models.option_chain import ChainChunks
+from models.performance import equity_curve, performance_metrics
+from . import metrics, strategy_service
+from .optimization_service import LEG_NAMES, MAX_SWEEP_COMBINATIONS, expand_range
+
+WALK_FORWARD_RANK_FIELDS = ('totalReturn', 'sharpeRatio', 'maxDrawdown')
+
+
+def _leg_grid(symbol: str, legs: IronCondorLegRanges) -> Tuple[List[List[float]], np.ndarray, int]:
+    """Values of each leg and the valid combinations as rows of value indices; also the skipped count."""
+    values = [expand_range(getattr(legs, name)) for name in LEG_NAMES]
+    total = int(np.prod([len(leg_values) for leg_values in values]))
+    if total > MAX_SWEEP_COMBINATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Walk-forward grid has {total} combinations; the limit is {MAX_SWEEP_COMBINATIONS}"
+        )
+
+    combinations = []
+    for indices in itertools.product(*(range(len(leg_values)) for leg_values in values)):
+        deltas = [leg_values[i] for leg_values, i in zip(values, indices)]
+        strategy = IronCondor(
+            id="",
+            name="",
+            symbol=symbol,
+            expiration="0DTE",
+            legs=dict(zip(LEG_NAMES, deltas)),
+            quantity=1,
+            created_at=""
+        )
+        if strategy.validate_legs():
+            combinations.append(indices)
+    if not combinations:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No valid leg combinations; deltas must satisfy shortPut < longPut < 0 < longCall < shortCall"
+        )
+    return values, np.array(combinations), total - len(combinations)
+
+
+def _simulate_legs(symbol: str, values: List[List[float]], request: WalkForwardRequest) -> tuple:
+    """Simulate every value of every leg over the whole range.
+
+    Returns the entry dates and, per leg, its entry and exit P&L shaped
+    (values, days).
+    """
+    data = strategy_service.get_historical_chain(symbol, request.startDate, request.endDate)
+    if data is None or len(data) == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No historical data found for {symbol} between {request.startDate} and {request.endDate}"
+        )
+    if isinstance(data, ChainChunks):
+        # Intraday chunks are read lazily on every pass; keep them for the
+        # other legs instead of reading them again
+        frames = list(data)
+        data = ChainChunks(data.symbol, lambda: iter(frames), len(data))
+
+    dates = None
+    entry_pnl, exit_pnl = [], []
+    for name, leg_values in zip(LEG_NAMES, values):
+        entries, exits = [], []
+        for value in leg_values:
+            strategy = IronCondor(
+                id="",
+                name="",
+                symbol=symbol,
+                expiration="0DTE",
+                legs={name: value},
+                quantity=request.quantity,
+                created_at=""
+            )
+            try:
+                results = strategy.simulate(data, request.startDate, request.endDate,
+                                            entry_time=request.entryTime, exit_time=request.exitTime)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+            # Entry days don't depend on the legs, so every run shares them
+            if dates is None:
+                dates = results.entry_dates()
+            entries.append(results.entry_pnl[:, 0])
+            exits.append(results.exit_pnl[:, 0])
+        entry_pnl.append(np.vstack(entries))
+        exit_pnl.append(np.vstack(exits))
+    return dates, entry_pnl, exit_pnl
+
+
+def _best(leg_pnl: List[np.ndarray], combinations: np.ndarray, lo: int, hi: int, request: WalkForwardRequest) -> tuple:
+    """Index and in-sample metrics of the best combination over days ``lo:hi``."""
+    days = hi - lo
+    ranked = {metric: np.empty(len(combinations)) for metric in WALK_FORWARD_RANK_FIELDS}
+    batch = max(1, BATCH_CELLS // days)
+    for start in range(0, len(combinations), batch):
+        rows = combinations[start:start + batch]
+        pnl = leg_pnl[0][rows[:, 0], lo:hi].copy()
+        for j in range(1, len(LEG_NAMES)):
+            pnl += leg_pnl[j][rows[:, j], lo:hi]
+        for metric, values in path_metrics(request.initialCapital, pnl).items():
+            if metric in ranked:
+                ranked[metric][start:start + len(rows)] = values
+    # maxDrawdown is negative, so larger is better for every rank field
+    best = int(np.argmax(ranked[request.rankBy]))
+    return best, {metric: float(values[best]) for metric, values in ranked.items()}
+
+
+def _trade(entry_pnl: List[np.ndarray], exit_pnl: List[np.ndarray], indices: np.ndarray, lo: int, hi: int, capital: float) -> np.ndarray:
+    """Equity after each of days ``lo:hi`` trading one combination from ``capital``.
+
+    Flows are booked in the engine's order (net entry, then each exit), so
+    the equity matches a backtest of the combination to the last bit.
+    """
+    net_entry = np.zeros(hi - lo)
+    for j, i in enumerate(indices):
+        net_entry = net_entry + entry_pnl[j][i, lo:hi]
+    flows = np.column_stack([net_entry] + [exit_pnl[j][i, lo:hi] for j, i in enumerate(indices)])
+    step = flows.shape[1]
+    return np.cumsum(np.concatenate([[capital], flows.ravel()]))[step::step]
+
+
+@metrics.timed("walk_forward")
+def run_walk_forward(request: WalkForwardRequest) -> dict:
+    """Choose leg deltas on rolling in-sample windows and trade them on the windows that follow."""
+    if request.rankBy not in WALK_FORWARD_RANK_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"rankBy must be one of {', '.join(WALK_FORWARD_RANK_FIELDS)}"
+        )
+    if request.inSampleDays < 1 or request.outOfSampleDays < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="inSampleDays and outOfSampleDays must be positive"
+        )
+    if request.quantity <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="quantity must be positive")
+
+    symbol = request.symbol.upper()
+    values, combinations, skipped = _leg_grid(symbol, request.legs)
+    with metrics.stage('simulate'):
+        dates, entry_pnl, exit_pnl = _simulate_legs(symbol, values, request)
+    if len(dates) <= request.inSampleDays:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Walk-forward needs more than {request.inSampleDays} trading days; "
+                   f"{symbol} has {len(dates)} between {request.startDate} and {request.endDate}"
+        )
+    leg_pnl = [entry + exit for entry, exit in zip(entry_pnl, exit_pnl)]
+
+    capital = request.initialCapital
+    windows, equity = [], []
+    for lo in range(request.inSampleDays, len(dates), request.outOfSampleDays):
+        hi = min(lo + request.outOfSampleDays, len(dates))
+        with metrics.stage('rank'):
+            best, in_sample = _best(leg_pnl, combinations, lo - request.inSampleDays, lo, request)
+        indices = combinations[best]
+        window_equity = _trade(entry_pnl, exit_pnl, indices, lo, hi, capital)
+        windows.append({
+            "inSampleStart": dates[lo - request.inSampleDays],
+            "inSampleEnd": dates[lo - 1],
+            "outOfSampleStart": dates[lo],
+            "outOfSampleEnd": dates[hi - 1],
+            "legs": {name: leg_values[i] for name, leg_values, i in zip(LEG_NAMES, values, indices.tolist())},
+            "inSample": in_sample,
+            "outOfSample": {
+                "startCapital": capital,
+                "finalCapital": float(window_equity[-1]),
+                **performance_metrics(capital, window_equity)
+            }
+        })
+        equity.append(window_equity)
+        capital = float(window_equity[-1])
+
+    equity = np.concatenate(equity)
+    traded_dates = dates[request.inSampleDays:]
+    return {
+        "symbol": symbol,
+        "startDate": request.startDate,
+        "endDate": request.endDate,
+        "initialCapital": request.initialCapital,
+        "quantity": request.quantity,
+        "inSampleDays": request.inSampleDays,
+        "outOfSampleDays": request.outOfSampleDays,
+        "rankBy": request.rankBy,
+        "evaluated": len(combinations),
+        "skipped": skipped,
+        "finalCapital": capital,
+        **performance_metrics(request.initialCapital, equity),
+        "tradeCount": len(traded_dates) * 2 * len(LEG_NAMES),
+        "equityCurve": equity_curve(traded_dates, request.initialCapital, equity),
+        "windows": windows,
+        **({"entryTime": request.entryTime} if request.entryTime else {}),
+        **({"exitTime": request.exitTime} if request.exitTime else {})
+    }
@@ -0,0 +1,40 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(__file__), '..')
+SAMPLE_DIR = os.path.join(APP_DIR, 'data')
+
+# The services read OPTIONBOT_DATA_DIR when they are imported, so point it at
+# a scratch copy of the sample data before any test module imports them
+DATA_DIR = tempfile.mkdtemp(prefix='optionbot-tests-')
+for name in ('historical_data.json', 'strategies.json', 'backtests.json'):
+    shutil.copy(os.path.join(SAMPLE_DIR, name), DATA_DIR)
+os.environ['OPTIONBOT_DATA_DIR'] = DATA_DIR
+os.environ.setdefault('OPTIONBOT_BACKTEST_WORKERS', '2')
+os.environ.setdefault('OPTIONBOT_FLUSH_INTERVAL', '0.05')
+
+# The app imports its packages from the app directory (``from models import ...``)
+sys.path.insert(0, APP_DIR)
+
+STRATEGY_ID = '0e1f8502-62f5-4495-a8f6-a841990dd7d7'
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def client():
+    from fastapi.testclient import TestClient
+    from main import app
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope='session')
+def strategy_id() -> str:
+    return STRATEGY_ID
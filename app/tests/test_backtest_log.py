@@ -0,0 +1,127 @@
+"""The append-only backtest result log."""
+import json
+import multiprocessing
+import os
+
+import pytest
+
+from services.backtest_log import INDEX_NAME, BacktestLog, _segment_name
+
+SAMPLE_BACKTESTS = os.path.join(os.path.dirname(__file__), '..', 'data', 'backtests.json')
+
+
+@pytest.fixture(scope="module")
+def legacy_records() -> list:
+    with open(SAMPLE_BACKTESTS) as f:
+        return json.load(f)
+
+
+def _record(template: dict, backtest_id: str, final_capital: float = 12345.0) -> dict:
+    return {**template, "backtestId": backtest_id, "finalCapital": final_capital}
+
+
+def _same(stored: dict, record: dict) -> bool:
+    trades = stored.pop("trades").to_trades()
+    expected = dict(record)
+    return stored == {k: v for k, v in expected.items() if k != "trades"} and trades == expected["trades"]
+
+
+def test_legacy_file_is_imported(tmp_path, legacy_records):
+    legacy = tmp_path / "backtests.json"
+    legacy.write_text(json.dumps(legacy_records))
+    log = BacktestLog(str(tmp_path / "backtests"), legacy_file=str(legacy))
+
+    assert log.ids() == [record["backtestId"] for record in legacy_records]
+    for record in legacy_records:
+        assert _same(log.get(record["backtestId"]), record)
+        assert log.get_trades(record["backtestId"]).to_trades() == record["trades"]
+    assert log.get("missing") is None and log.get_trades("missing") is None
+
+
+def test_append_supersedes_and_compacts(tmp_path, legacy_records):
+    log = BacktestLog(str(tmp_path / "backtests"), legacy_file=None)
+    template = legacy_records[0]
+    for i in range(5):
+        log.append(_record(template, f"id-{i}"))
+    log.append(_record(template, "id-1", 999.0))
+
+    assert len(log) == 5
+    assert log.get("id-1")["finalCapital"] == 999.0
+    assert [record["backtestId"] for record in log] == ["id-0", "id-2", "id-3", "id-4", "id-1"]
+
+    assert log.compact(keep_last=3) == 3
+    assert sorted(log.ids()) == ["id-1", "id-3", "id-4"]
+    assert log.get("id-1")["finalCapital"] == 999.0
+    # A fresh reader of the compacted log agrees
+    assert sorted(BacktestLog(log.directory, legacy_file=None).ids()) == ["id-1", "id-3", "id-4"]
+
+
+def test_torn_writes_are_recovered(tmp_path, legacy_records):
+    directory = str(tmp_path / "backtests")
+    log = BacktestLog(directory, legacy_file=None)
+    log.append(_record(legacy_records[0], "kept"))
+    # A crash after the record but before its index line, then a torn record
+    record = json.dumps(_record(legacy_records[0], "unindexed"), separators=(',', ':'))
+    with open(os.path.join(directory, _segment_name(1)), 'a') as f:
+        f.write(record + "\n" + record[:20])
+    with open(os.path.join(directory, INDEX_NAME), 'a') as f:
+        f.write("torn\t1\t")
+
+    reopened = BacktestLog(directory, legacy_file=None)
+    assert sorted(reopened.ids()) == ["kept", "unindexed"]
+    reopened.append(_record(legacy_records[0], "after"))
+    assert _same(BacktestLog(directory, legacy_file=None).get("after"), _record(legacy_records[0], "after"))
+
+
+def test_records_of_other_processes_are_found(tmp_path, legacy_records):
+    # Two instances stand in for two API worker processes
+    directory = str(tmp_path / "backtests")
+    first = BacktestLog(directory, legacy_file=None)
+    second = BacktestLog(directory, legacy_file=None)
+    first.append(_record(legacy_records[0], "a"))
+    assert second.get("a") is not None
+
+    second.append(_record(legacy_records[0], "a", 1.0))
+    second.append(_record(legacy_records[0], "b"))
+    assert first.get("a")["finalCapital"] == 1.0
+    assert first.get_trades("b").to_trades() == legacy_records[0]["trades"]
+    assert sorted(first.ids()) == ["a", "b"]
+
+    # Compaction in one process is picked up by the other, also once the
+    # new index has outgrown the old one
+    second.compact(keep_last=1)
+    assert first.ids() == ["b"]
+    for i in range(10):
+        second.append(_record(legacy_records[0], f"c{i}"))
+    assert len(first) == 11
+    assert first.get("c9")["backtestId"] == "c9"
+
+
+def _append_many(directory: str, template: dict, worker: int, count: int) -> None:
+    log = BacktestLog(directory, legacy_file=None)
+    for i in range(count):
+        log.append(_record(template, f"{worker}-{i}", float(worker * 1000 + i)))
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_concurrent_appends_from_processes(tmp_path, legacy_records):
+    directory = str(tmp_path / "backtests")
+    BacktestLog(directory, legacy_file=None).ids()
+    context = multiprocessing.get_context('fork')
+    workers = [
+        context.Process(target=_append_many, args=(directory, legacy_records[0], worker, 25))
+        for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    log = BacktestLog(directory, legacy_file=None)
+    assert len(log) == 100
+    for worker in range(4):
+        for i in range(25):
+            record = log.get(f"{worker}-{i}")
+            assert record["finalCapital"] == worker * 1000 + i
+            assert log.get_trades(f"{worker}-{i}").to_trades() == legacy_records[0]["trades"]
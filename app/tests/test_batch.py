@@ -0,0 +1,40 @@
+"""Batch backtests over the API and from the command line."""
+import json
+import os
+import subprocess
+import sys
+
+from conftest import APP_DIR, DATA_DIR
+
+BODY = {"startDate": "2024-01-02", "endDate": "2024-01-10", "initialCapital": 10000}
+
+
+def test_batch_reports_each_strategy(client, strategy_id):
+    response = client.post("/backtest/batch", json={**BODY, "strategyIds": [strategy_id, "missing"]})
+    assert response.status_code == 200
+    results = {result["strategyId"]: result for result in response.json()["results"]}
+    assert results["missing"]["error"]["statusCode"] == 404
+
+    single = client.post(f"/backtest/{strategy_id}", json=BODY, params={"summary": True}).json()
+    assert results[strategy_id]["finalCapital"] == single["finalCapital"]
+    assert results[strategy_id]["tradeCount"] == single["tradeCount"]
+    combined = response.json()["combined"]
+    assert (combined["succeeded"], combined["failed"]) == (1, 1)
+
+
+def test_cli_save_beside_the_api(client, strategy_id):
+    # The API has its backtest log open before the CLI writes to it
+    assert client.get("/backtest/results/missing").status_code == 404
+
+    env = {**os.environ, "OPTIONBOT_DATA_DIR": DATA_DIR, "OPTIONBOT_BATCH_WORKERS": "1"}
+    completed = subprocess.run(
+        [sys.executable, "-m", "services.batch_service", BODY["startDate"], BODY["endDate"], "10000", "all", "--save"],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, timeout=120, check=True
+    )
+    report = json.loads(completed.stdout)
+    backtest_id = report["results"][0]["backtestId"]
+
+    response = client.get(f"/backtest/results/{backtest_id}")
+    assert response.status_code == 200
+    assert response.json()["strategyId"] == strategy_id
+    assert response.json()["finalCapital"] == report["results"][0]["finalCapital"]
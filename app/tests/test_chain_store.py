@@ -0,0 +1,93 @@
+"""The columnar chain store and the backtests that read it."""
+import multiprocessing
+import os
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_chains
+from services import chain_store
+
+
+@pytest.mark.parametrize("start_date,end_date", [
+    ("abc", "2024-01-10"),
+    ("2024-13-02", "2024-01-10"),
+    ("2024-01-02", "2024-01-32"),
+])
+def test_malformed_dates_are_rejected(client, strategy_id, start_date, end_date):
+    body = {"startDate": start_date, "endDate": end_date, "initialCapital": 10000}
+    response = client.post(f"/backtest/{strategy_id}", json=body)
+    assert response.status_code == 400
+    assert "expected YYYY-MM-DD" in response.json()["detail"]
+
+
+def test_range_without_data_is_not_found(client, strategy_id):
+    body = {"startDate": "2030-01-02", "endDate": "2030-01-10", "initialCapital": 10000}
+    response = client.post(f"/backtest/{strategy_id}", json=body)
+    assert response.status_code == 404
+
+
+def _assert_readable(store_dir: str, days: int) -> None:
+    # Read the way a backtest does, without the process's partition cache
+    manifest = chain_store.read_manifest(store_dir)
+    assert manifest is not None
+    total = 0
+    for year in manifest["symbols"]["SPY"]["partitions"]:
+        path = chain_store._partition_path(store_dir, manifest, "SPY", year)
+        total += len(np.load(os.path.join(path, "dates.npy"), mmap_mode="r"))
+    assert total == days
+
+
+def test_every_step_of_a_rebuild_leaves_a_readable_store(tmp_path, monkeypatch):
+    store_dir = str(tmp_path / "chains")
+    records = generate_chains(symbols=1, days=10, strikes=10, expirations=2, seed=1, names=['SPY'])
+    chain_store.import_records(records, store_dir=store_dir)
+
+    replace = os.replace
+    steps = []
+
+    def checked_replace(src, dst):
+        replace(src, dst)
+        _assert_readable(store_dir, 10)
+        steps.append(dst)
+
+    monkeypatch.setattr(os, "replace", checked_replace)
+    chain_store.import_records(records, store_dir=store_dir)
+    assert steps
+    _assert_readable(store_dir, 10)
+
+
+def _rebuild(store_dir, versions, times):
+    for i in range(times):
+        chain_store.import_records(versions[i % 2], store_dir=store_dir)
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_rebuild_while_reading(tmp_path):
+    store_dir = str(tmp_path / "chains")
+    versions = [
+        generate_chains(symbols=1, days=10, strikes=10, expirations=2, seed=seed, names=['SPY'])
+        for seed in (1, 2)
+    ]
+    chain_store.import_records(versions[0], store_dir=store_dir)
+    start_date, end_date = versions[0][0]["date"], versions[0][-1]["date"]
+
+    # Rebuild from another process, as the job and batch pools do, while
+    # this one keeps reading: it must see the old store or the new one,
+    # never none or a partial one
+    rebuilder = multiprocessing.get_context('fork').Process(target=_rebuild, args=(store_dir, versions, 30))
+    rebuilder.start()
+    reads = 0
+    while rebuilder.is_alive():
+        frame = chain_store.load_range("SPY", start_date, end_date, store_dir=store_dir)
+        assert frame is not None and len(frame) == 10
+        assert float(frame.quotes["mid"].sum()) > 0
+        reads += 1
+    rebuilder.join()
+    assert rebuilder.exitcode == 0
+    assert reads > 0
+
+    # Only the live build and the one before it are kept
+    builds = [name for name in os.listdir(store_dir) if name.startswith(chain_store.BUILD_PREFIX)]
+    assert len(builds) == 2
+    assert chain_store.read_manifest(store_dir)["build"] in builds
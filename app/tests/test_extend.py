@@ -0,0 +1,93 @@
+"""Extending stored backtests to a later end date."""
+import pytest
+
+from benchmarks.synthetic import generate_chains
+from models.iron_condor import IronCondor
+from models.option_chain import ChainFrame
+
+BODY = {"startDate": "2024-01-02", "endDate": "2024-01-10", "initialCapital": 10000}
+METRICS = ("finalCapital", "totalReturn", "maxDrawdown", "sharpeRatio")
+
+
+def _strategy(**fields) -> IronCondor:
+    return IronCondor(**{
+        "id": "test",
+        "name": "test",
+        "symbol": "SPY",
+        "expiration": "0DTE",
+        "legs": {"longPut": -0.10, "shortPut": -0.20, "shortCall": 0.20, "longCall": 0.10},
+        "quantity": 1,
+        "created_at": "",
+        **fields
+    })
+
+
+def _same_result(extended: dict, full: dict) -> None:
+    assert extended["trades"] == full["trades"]
+    assert extended["equityCurve"] == full["equityCurve"]
+    for field in METRICS:
+        assert extended[field] == pytest.approx(full[field]), field
+
+
+def test_extend_matches_a_full_backtest(client, strategy_id):
+    short = client.post(f"/backtest/{strategy_id}", json={**BODY, "endDate": "2024-01-05"}).json()
+    response = client.post(f"/backtest/results/{short['backtestId']}/extend", json={"endDate": BODY["endDate"]})
+    assert response.status_code == 200
+    extended = response.json()
+    full = client.post(f"/backtest/{strategy_id}", json=BODY).json()
+
+    assert extended["backtestId"] == short["backtestId"]
+    assert extended["startDate"] == BODY["startDate"] and extended["endDate"] == BODY["endDate"]
+    _same_result(extended, full)
+    # The extended result replaces the stored one
+    stored = client.get(f"/backtest/results/{short['backtestId']}").json()
+    assert stored["endDate"] == BODY["endDate"]
+    assert stored["trades"] == full["trades"]
+
+
+def test_extend_summary(client, strategy_id):
+    short = client.post(f"/backtest/{strategy_id}", json={**BODY, "endDate": "2024-01-05"}).json()
+    response = client.post(
+        f"/backtest/results/{short['backtestId']}/extend", json={"endDate": BODY["endDate"]}, params={"summary": True}
+    )
+    assert "trades" not in response.json()
+    assert response.json()["tradeCount"] > len(short["trades"])
+
+
+def test_extend_errors(client, strategy_id):
+    result = client.post(f"/backtest/{strategy_id}", json=BODY).json()
+    url = f"/backtest/results/{result['backtestId']}/extend"
+    assert client.post(url, json={"endDate": BODY["endDate"]}).status_code == 400
+    assert client.post(url, json={"endDate": "2024-01-03"}).status_code == 400
+    assert client.post(url, json={"endDate": "2024/02/01"}).status_code == 400
+    assert client.post("/backtest/results/missing/extend", json={"endDate": "2024-02-01"}).status_code == 404
+
+
+def test_repeated_extensions_match_a_full_backtest():
+    records = generate_chains(symbols=1, days=30, strikes=20, expirations=2, seed=5, names=['SPY'])
+    frame = ChainFrame.from_records(records, symbol='SPY')
+    dates = [record["date"][:10] for record in records]
+    strategy = _strategy()
+
+    result = strategy.backtest(dates[0], dates[9], 10000, frame)
+    for end in (dates[17], dates[18], dates[-1]):
+        result = strategy.extend_backtest(result, end, frame)
+    full = strategy.backtest(dates[0], dates[-1], 10000, frame)
+    assert result["endDate"] == full["endDate"]
+    assert result["trades"].to_trades() == full["trades"].to_trades()
+    assert result["equityCurve"] == full["equityCurve"]
+    assert result["finalCapital"] == pytest.approx(full["finalCapital"])
+
+
+def test_changed_strategy_cannot_extend():
+    records = generate_chains(symbols=1, days=10, strikes=20, expirations=2, seed=5, names=['SPY'])
+    frame = ChainFrame.from_records(records, symbol='SPY')
+    start_date, end_date = records[0]["date"][:10], records[5]["date"][:10]
+    result = _strategy().backtest(start_date, end_date, 10000, frame)
+
+    with pytest.raises(ValueError, match="current legs"):
+        _strategy(quantity=2).extend_backtest(result, records[-1]["date"][:10], frame)
+    with pytest.raises(ValueError, match="later than"):
+        _strategy().extend_backtest(result, end_date, frame)
+    with pytest.raises(ValueError, match="cannot be extended"):
+        _strategy(expiration="1DTE").extend_backtest(result, records[-1]["date"][:10], frame)
@@ -0,0 +1,178 @@
+"""Backtest jobs on the process pool: submit, poll, cancel."""
+import asyncio
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from services import job_service, strategy_service
+
+BODY = {"startDate": "2024-01-02", "endDate": "2024-01-10", "initialCapital": 10000}
+
+
+def _wait(client, backtest_id: str, timeout: float = 30) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        response = client.get(f"/backtest/results/{backtest_id}", params={"summary": True})
+        if response.status_code != 202:
+            return response.json()
+        time.sleep(0.05)
+    raise AssertionError(f"job {backtest_id} did not finish")
+
+
+@pytest.fixture
+def no_result_cache(monkeypatch):
+    # Without a data version nothing is looked up in or stored to the cache
+    monkeypatch.setattr(strategy_service, "data_version", lambda: None)
+
+
+class _HeldExecutor:
+    """Executor whose jobs stay queued until the test starts or fails them."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+
+@pytest.fixture
+def held_executor(monkeypatch, no_result_cache):
+    executor = _HeldExecutor()
+    monkeypatch.setattr(job_service, "_get_executor", lambda: executor)
+    monkeypatch.setattr(job_service, "_shared", {})
+    return executor
+
+
+class _FinishingShared(dict):
+    """Progress store whose lookup races with the job finishing."""
+
+    def __init__(self, job: dict):
+        super().__init__()
+        self.job = job
+
+    def get(self, key, default=None):
+        job_service._finish(self.job, job_service.COMPLETED, progress=1.0)
+        return 0.5
+
+
+def test_poll_racing_completion_keeps_job_completed(monkeypatch):
+    job = {"backtestId": "race", "status": job_service.RUNNING, "progress": 0.25}
+    monkeypatch.setitem(job_service._jobs, "race", job)
+    monkeypatch.setattr(job_service, "_shared", _FinishingShared(job))
+
+    assert job_service.get_job("race")["status"] == job_service.COMPLETED
+    assert job["status"] == job_service.COMPLETED
+    assert job["progress"] == 1.0
+
+
+def test_failed_save_fails_the_job(client, strategy_id, no_result_cache, monkeypatch):
+    def save_backtest(result):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(strategy_service, "save_backtest", save_backtest)
+    job = client.post(f"/backtest/jobs/{strategy_id}", json=BODY).json()
+    status = _wait(client, job["backtestId"])
+    assert status["status"] == job_service.FAILED
+    assert status["error"]["statusCode"] == 500
+    assert "disk full" in status["error"]["detail"]
+
+
+def test_submit_runs_off_the_event_loop(client, strategy_id, monkeypatch):
+    submit = job_service.submit
+    loops = []
+
+    def checked_submit(*args, **kwargs):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return submit(*args, **kwargs)
+
+    monkeypatch.setattr(job_service, "submit", checked_submit)
+    job = client.post(f"/backtest/jobs/{strategy_id}", json=BODY).json()
+    _wait(client, job["backtestId"])
+    assert client.post(f"/backtest/{strategy_id}", json=BODY, params={"summary": True}).status_code == 200
+    assert loops == [None, None]
+
+
+def test_submit_and_poll(client, strategy_id):
+    response = client.post(f"/backtest/jobs/{strategy_id}", json=BODY)
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] in (job_service.QUEUED, job_service.RUNNING, job_service.COMPLETED)
+    assert job["strategyId"] == strategy_id
+    assert not set(job_service._PRIVATE_FIELDS) & set(job)
+
+    status = _wait(client, job["backtestId"])
+    assert status["backtestId"] == job["backtestId"]
+    assert status["initialCapital"] == BODY["initialCapital"]
+    listed = {entry["backtestId"]: entry for entry in client.get("/backtest/jobs").json()}
+    assert listed[job["backtestId"]]["status"] == job_service.COMPLETED
+    assert listed[job["backtestId"]]["progress"] == 1.0
+
+    expected = client.post(f"/backtest/{strategy_id}", json=BODY).json()
+    assert status["finalCapital"] == expected["finalCapital"]
+    full = client.get(f"/backtest/results/{job['backtestId']}").json()
+    assert full["trades"] == expected["trades"]
+
+
+def test_submit_unknown_strategy(client):
+    assert client.post("/backtest/jobs/missing", json=BODY).status_code == 404
+
+
+def test_cancel_queued_job(client, strategy_id, held_executor):
+    job = client.post(f"/backtest/jobs/{strategy_id}", json=BODY).json()
+    assert job["status"] == job_service.QUEUED
+    assert client.get(f"/backtest/results/{job['backtestId']}").status_code == 202
+
+    response = client.delete(f"/backtest/jobs/{job['backtestId']}")
+    assert response.status_code == 200
+    assert response.json()["status"] == job_service.CANCELLED
+    status = client.get(f"/backtest/results/{job['backtestId']}")
+    assert status.status_code == 200
+    assert status.json()["status"] == job_service.CANCELLED
+    # Cancelling twice conflicts
+    assert client.delete(f"/backtest/jobs/{job['backtestId']}").status_code == 409
+
+
+def test_cancel_running_job(client, strategy_id, held_executor):
+    job = client.post(f"/backtest/jobs/{strategy_id}", json=BODY).json()
+    future = held_executor.futures[-1]
+    future.set_running_or_notify_cancel()
+    job_service._shared[job["backtestId"]] = 0.5
+    running = client.get(f"/backtest/results/{job['backtestId']}").json()
+    assert running["status"] == job_service.RUNNING and running["progress"] == 0.5
+
+    # A running job is asked to stop through the shared flag ...
+    response = client.delete(f"/backtest/jobs/{job['backtestId']}")
+    assert response.status_code == 200
+    assert job_service._shared[("cancel", job["backtestId"])] is True
+    # ... which the worker's progress callback turns into BacktestCancelled
+    with pytest.raises(job_service.BacktestCancelled):
+        job_service._run_job(job["backtestId"], {}, BODY["startDate"], BODY["endDate"], 10000, None, None,
+                             job_service._shared, time.time())
+    future.set_exception(job_service.BacktestCancelled(job["backtestId"]))
+
+    status = client.get(f"/backtest/results/{job['backtestId']}").json()
+    assert status["status"] == job_service.CANCELLED
+    assert ("cancel", job["backtestId"]) not in job_service._shared
+
+
+def test_cancel_unknown_or_finished_job(client, strategy_id):
+    assert client.delete("/backtest/jobs/missing").status_code == 404
+    job = client.post(f"/backtest/jobs/{strategy_id}", json=BODY).json()
+    _wait(client, job["backtestId"])
+    response = client.delete(f"/backtest/jobs/{job['backtestId']}")
+    assert response.status_code == 409
+    assert "already completed" in response.json()["detail"]
+
+
+def test_worker_errors_fail_the_job(client, strategy_id, held_executor):
+    job = client.post(f"/backtest/jobs/{strategy_id}", json=BODY).json()
+    held_executor.futures[-1].set_exception(job_service.BacktestJobError(404, "No data"))
+    status = client.get(f"/backtest/results/{job['backtestId']}").json()
+    assert status["status"] == job_service.FAILED
+    assert status["error"] == {"statusCode": 404, "detail": "No data"}
@@ -0,0 +1,80 @@
+"""JSON responses: serialization, compression and ETags."""
+import json
+
+import numpy as np
+import pytest
+
+from services import json_response
+
+CHAIN = "/market-data/options/SPY"
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_numpy_values_are_serialized(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(json_response, "orjson", None)
+    content = {"count": np.int64(3), "mean": np.float32(0.5), "flag": np.bool_(True), "values": np.arange(3)}
+    assert json.loads(json_response.dumps(content)) == {"count": 3, "mean": 0.5, "flag": True, "values": [0, 1, 2]}
+
+
+def test_unserializable_values_still_fail_without_orjson(monkeypatch):
+    monkeypatch.setattr(json_response, "orjson", None)
+    with pytest.raises(TypeError):
+        json_response.dumps({"value": object()})
+
+
+def test_large_bodies_are_gzipped(client):
+    plain = client.get(CHAIN, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert len(plain.content) >= json_response.MIN_COMPRESS_BYTES
+
+    compressed = client.get(CHAIN, headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert compressed.json() == plain.json()
+    # Refused codings are not used
+    refused = client.get(CHAIN, headers={"Accept-Encoding": "gzip;q=0, br;q=0"})
+    assert "content-encoding" not in refused.headers
+
+
+def test_small_bodies_are_not_compressed(client, strategy_id):
+    response = client.get(f"/strategies/{strategy_id}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+
+def test_matching_etag_gets_not_modified(client):
+    first = client.get(CHAIN)
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    # The tag names the content, whatever coding it was sent with
+    assert client.get(CHAIN, headers={"Accept-Encoding": "identity"}).headers["etag"] == etag
+
+    for if_none_match in (etag, etag[2:], f'W/"other", {etag}', "*"):
+        response = client.get(CHAIN, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    response = client.get(CHAIN, headers={"If-None-Match": 'W/"other"'})
+    assert response.status_code == 200
+    assert response.json() == first.json()
+
+
+def test_etag_follows_the_content(client):
+    etag = client.get(CHAIN).headers["etag"]
+    narrowed = client.get(CHAIN, params={"date": "2024-01-04"}, headers={"If-None-Match": etag})
+    assert narrowed.status_code == 200
+    assert narrowed.headers["etag"] != etag
+
+
+def test_writes_ignore_if_none_match(client, strategy_id):
+    strategy = client.get(f"/strategies/{strategy_id}")
+    response = client.put(
+        f"/strategies/{strategy_id}",
+        json={"name": strategy.json()["name"]},
+        headers={"If-None-Match": "*"}
+    )
+    assert response.status_code == 200
+    assert response.json()["id"] == strategy_id
+
@@ -0,0 +1,40 @@
+"""Prometheus exposition of stage timings and I/O counters."""
+import pytest
+
+from services import metrics
+
+
+@pytest.mark.parametrize("value,text", [
+    (3, "3"),
+    (2.0, "2"),
+    (0.25, "0.25"),
+    (float("inf"), "+Inf"),
+    (float("-inf"), "-Inf"),
+    (float("nan"), "NaN"),
+])
+def test_number(value, text):
+    assert metrics._number(value) == text
+
+
+def test_non_finite_values_are_exported(client, monkeypatch):
+    counter = metrics.Counter("optionbot_test_total", "Test counter.", ("kind",))
+    counter.inc(float("inf"), "inf")
+    counter.inc(float("nan"), "nan")
+    histogram = metrics.Histogram("optionbot_test_seconds", "Test histogram.", ())
+    histogram.observe(float("inf"))
+    monkeypatch.setattr(metrics, "_METRICS", metrics._METRICS + (counter, histogram))
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert 'optionbot_test_total{kind="inf"} +Inf' in lines
+    assert 'optionbot_test_total{kind="nan"} NaN' in lines
+    assert "optionbot_test_seconds_sum +Inf" in lines
+    assert "optionbot_test_seconds_count 1" in lines
+
+
+def test_operations_are_timed(client, strategy_id):
+    client.get(f"/strategies/{strategy_id}")
+    text = client.get("/metrics").text
+    assert 'optionbot_operation_seconds_count{operation="GET /strategies/{strategy_id}"}' in text
+    assert 'optionbot_stage_seconds_count{operation="GET /strategies/{strategy_id}",stage="serialize"}' in text
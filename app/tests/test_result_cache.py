@@ -0,0 +1,128 @@
+"""Memoized backtest results: keys, rescaling, the on-disk cache and cache hits."""
+import os
+import time
+
+import pytest
+
+from services import job_service, strategy_service
+from services.result_cache import ResultCache, cache_key, rescale
+from test_jobs import _wait
+
+BODY = {"startDate": "2024-01-02", "endDate": "2024-01-10", "initialCapital": 10000}
+STRATEGY = {
+    "id": "a", "name": "A", "createdAt": "2024-01-01", "symbol": "SPY", "strategy": "IronCondor",
+    "expiration": "0DTE", "legs": {"longPut": -0.05, "shortPut": -0.15, "shortCall": 0.15, "longCall": 0.05},
+    "quantity": 1
+}
+
+
+def _submit(client, strategy_id: str, **body) -> dict:
+    job = client.post(f"/backtest/jobs/{strategy_id}", json={**BODY, **body}).json()
+    _wait(client, job["backtestId"])
+    return job_service.get_job(job["backtestId"])
+
+
+def test_cache_key():
+    key = cache_key(STRATEGY, "2024-01-02", "2024-01-10", "v1")
+    # Identity fields do not change the results
+    assert cache_key({**STRATEGY, "id": "b", "name": "B", "createdAt": ""}, "2024-01-02", "2024-01-10", "v1") == key
+    assert cache_key({**STRATEGY, "quantity": 2}, "2024-01-02", "2024-01-10", "v1") != key
+    assert cache_key(STRATEGY, "2024-01-03", "2024-01-10", "v1") != key
+    assert cache_key(STRATEGY, "2024-01-02", "2024-01-10", "v2") != key
+    assert cache_key(STRATEGY, "2024-01-02", "2024-01-10", "v1", entry_time="10:00") != key
+
+
+def test_rescale_matches_a_backtest_at_that_capital(client, strategy_id):
+    result = client.post(f"/backtest/{strategy_id}", json=BODY).json()
+    expected = client.post(f"/backtest/{strategy_id}", json={**BODY, "initialCapital": 25000}).json()
+    rescaled = rescale(result, 25000)
+
+    assert rescaled["trades"] == expected["trades"]
+    assert rescaled["initialCapital"] == 25000
+    for field in ("finalCapital", "totalReturn", "maxDrawdown", "sharpeRatio"):
+        assert rescaled[field] == pytest.approx(expected[field]), field
+    assert [p["equity"] for p in rescaled["equityCurve"]] == \
+        pytest.approx([p["equity"] for p in expected["equityCurve"]])
+    # The cached result itself is left alone
+    assert result["initialCapital"] == BODY["initialCapital"]
+
+
+def _result(final_capital: float = 10500.0) -> dict:
+    return {
+        "strategyId": "a", "backtestId": "b", "startDate": "2024-01-02", "endDate": "2024-01-03",
+        "initialCapital": 10000.0, "finalCapital": final_capital, "trades": [],
+        "equityCurve": [{"date": "2024-01-02", "equity": 10000.0}, {"date": "2024-01-03", "equity": final_capital}]
+    }
+
+
+def test_cache_round_trip_and_reload(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    assert cache.get("k") is None
+    cache.put("k", _result())
+    assert cache.get("k")["finalCapital"] == 10500.0
+    # Another process (or a restart) finds the entry on disk
+    assert ResultCache(str(tmp_path)).get("k")["equityCurve"] == _result()["equityCurve"]
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    probe = ResultCache(str(tmp_path / "probe"))
+    probe.put("k", _result())
+    size = probe.nbytes
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=2 * size)
+    cache.put("a", _result())
+    cache.put("b", _result())
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    cache.put("c", _result())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.nbytes == 2 * size
+    assert sorted(os.listdir(tmp_path / "cache")) == ["a.json", "c.json"]
+
+    # Results larger than the whole budget are not stored
+    ResultCache(str(tmp_path / "small"), max_bytes=size - 1).put("big", _result())
+    assert not os.path.exists(tmp_path / "small" / "big.json")
+
+
+def test_cache_drops_expired_and_unreadable_entries(tmp_path):
+    cache = ResultCache(str(tmp_path), max_age=60)
+    cache.put("old", _result())
+    cache.put("torn", _result())
+    cache._entries["old"] = (cache._entries["old"][0], time.time() - 120)
+    assert cache.get("old") is None
+    assert not os.path.exists(tmp_path / "old.json")
+
+    (tmp_path / "torn.json").write_text('{"strategyId"')
+    assert cache.get("torn") is None
+    assert not os.path.exists(tmp_path / "torn.json")
+
+
+def test_repeated_job_is_answered_from_the_cache(client, strategy_id, tmp_path, monkeypatch):
+    monkeypatch.setattr(strategy_service, "result_cache", ResultCache(str(tmp_path)))
+    first = _submit(client, strategy_id)
+    assert not first.get("cached")
+
+    second = _submit(client, strategy_id)
+    assert second["cached"] is True
+    # The identical stored result is reused
+    assert second["backtestId"] == first["backtestId"]
+
+    other = _submit(client, strategy_id, initialCapital=25000)
+    assert other["cached"] is True
+    assert other["backtestId"] != first["backtestId"]
+    stored = client.get(f"/backtest/results/{other['backtestId']}").json()
+    expected = strategy_service.compute_backtest(
+        strategy_service.get_strategy_instance(strategy_id), BODY["startDate"], BODY["endDate"], 25000
+    )
+    assert stored["initialCapital"] == 25000
+    assert stored["strategyId"] == strategy_id
+    assert stored["finalCapital"] == pytest.approx(expected["finalCapital"])
+    assert stored["trades"] == client.get(f"/backtest/results/{first['backtestId']}").json()["trades"]
+
+
+def test_new_chain_data_misses_the_cache(client, strategy_id, tmp_path, monkeypatch):
+    monkeypatch.setattr(strategy_service, "result_cache", ResultCache(str(tmp_path)))
+    assert not _submit(client, strategy_id).get("cached")
+    monkeypatch.setattr(strategy_service, "data_version", lambda: "another-version")
+    assert not _submit(client, strategy_id).get("cached")
+    assert _submit(client, strategy_id)["cached"] is True
+
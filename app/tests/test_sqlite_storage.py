@@ -0,0 +1,184 @@
+"""The SQLite storage backend and the migration into it."""
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+from conftest import APP_DIR, SAMPLE_DIR
+from services import chain_store, sqlite_storage
+from services.backtest_log import BacktestLog
+
+BODY = {"startDate": "2024-01-02", "endDate": "2024-01-10", "initialCapital": 10000}
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = sqlite_storage.ConnectionPool(str(tmp_path / "optionbot.db"), size=2)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture(scope="module")
+def legacy_records() -> list:
+    with open(os.path.join(SAMPLE_DIR, "backtests.json")) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def sample_strategies() -> list:
+    with open(os.path.join(SAMPLE_DIR, "strategies.json")) as f:
+        return json.load(f)
+
+
+def test_strategies_round_trip(pool, sample_strategies):
+    repository = sqlite_storage.SqliteStrategyRepository(pool)
+    strategy = sample_strategies[0]
+    other = {**strategy, "id": "other", "name": "Other"}
+    repository.put(strategy)
+    repository.put(other)
+    assert repository.get(strategy["id"]) == strategy
+    assert repository.all() == [strategy, other]
+
+    repository.put({**strategy, "quantity": 5, "createdAt": "ignored"})
+    assert repository.get(strategy["id"]) == {**strategy, "quantity": 5}
+    assert [s["id"] for s in repository.all()] == [strategy["id"], "other"]
+
+    assert repository.delete("other")
+    assert not repository.delete("other")
+    assert repository.get("other") is None
+
+
+def test_backtests_round_trip(pool, legacy_records):
+    store = sqlite_storage.SqliteBacktestStore(pool)
+    for record in legacy_records:
+        store.append(record)
+    assert store.ids() == [record["backtestId"] for record in legacy_records]
+    assert len(store) == len(legacy_records)
+
+    for record in legacy_records:
+        stored = store.get(record["backtestId"])
+        assert stored.pop("trades").to_trades() == record["trades"]
+        assert stored == {k: v for k, v in record.items() if k != "trades"}
+        assert store.get_trades(record["backtestId"]).to_trades() == record["trades"]
+    assert store.get("missing") is None and store.get_trades("missing") is None
+
+    # Appending a result again replaces it, trades included
+    record = {**legacy_records[0], "finalCapital": 1.0, "trades": legacy_records[0]["trades"][:2]}
+    store.append(record)
+    assert len(store) == len(legacy_records)
+    assert store.get(record["backtestId"])["finalCapital"] == 1.0
+    assert store.get_trades(record["backtestId"]).to_trades() == record["trades"]
+
+
+def test_intraday_trade_times_round_trip(pool, legacy_records):
+    store = sqlite_storage.SqliteBacktestStore(pool)
+    trades = [{**trade, "time": "10:00"} for trade in legacy_records[0]["trades"]]
+    store.append({**legacy_records[0], "trades": trades})
+    assert store.get_trades(legacy_records[0]["backtestId"]).to_trades() == trades
+
+
+def test_trades_table_of_an_older_database_is_migrated(tmp_path, legacy_records):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    # The schema before intraday trade times
+    old_schema = sqlite_storage.SCHEMA.replace("    time TEXT,\n", "")
+    assert old_schema != sqlite_storage.SCHEMA
+    conn.executescript(old_schema)
+    conn.close()
+
+    pool = sqlite_storage.ConnectionPool(path, size=1)
+    try:
+        store = sqlite_storage.SqliteBacktestStore(pool)
+        store.append(legacy_records[0])
+        assert store.get_trades(legacy_records[0]["backtestId"]).to_trades() == legacy_records[0]["trades"]
+        with pool.connection() as conn:
+            assert "time" in {row["name"] for row in conn.execute("PRAGMA table_info(trades)")}
+    finally:
+        pool.close()
+
+
+def test_chain_source_feeds_the_chain_store(pool, tmp_path):
+    with open(os.path.join(SAMPLE_DIR, "historical_data.json")) as f:
+        records = json.load(f)
+    source = sqlite_storage.SqliteChainSource(pool)
+    assert source.source() is None
+    assert source.ensure_store(str(tmp_path / "chains")) is None
+
+    assert source.import_records(records) == sum(len(record["options"]) for record in records)
+    assert [(r["date"], r["symbol"], len(r["options"])) for r in source.records()] == \
+        [(r["date"][:10], r["symbol"], len(r["options"])) for r in records]
+
+    store_dir = str(tmp_path / "chains")
+    manifest = source.ensure_store(store_dir)
+    assert manifest["source"] == source.source()
+    assert source.ensure_store(store_dir)["build"] == manifest["build"]
+    frame = chain_store.load_range("SPY", BODY["startDate"], BODY["endDate"], store_dir=store_dir)
+    assert len(frame) == len(records)
+
+    # Re-importing bumps the version, which rebuilds the store
+    source.import_records(records[:1])
+    assert source.source()["version"] == 2
+    assert source.ensure_store(store_dir)["build"] != manifest["build"]
+
+
+def test_migrate(tmp_path, legacy_records, sample_strategies):
+    db_path = str(tmp_path / "optionbot.db")
+    legacy = tmp_path / "backtests.json"
+    legacy.write_text(json.dumps(legacy_records))
+    counts = sqlite_storage.migrate(
+        db_path,
+        strategies_file=os.path.join(SAMPLE_DIR, "strategies.json"),
+        backtests=BacktestLog(str(tmp_path / "backtests"), legacy_file=str(legacy)),
+        historical_file=os.path.join(SAMPLE_DIR, "historical_data.json")
+    )
+    assert counts["strategies"] == len(sample_strategies)
+    assert counts["backtests"] == len(legacy_records)
+    assert counts["quotes"] > 0
+
+    pool = sqlite_storage.ConnectionPool(db_path, size=1)
+    try:
+        assert sqlite_storage.SqliteStrategyRepository(pool).all() == sample_strategies
+        assert sqlite_storage.SqliteBacktestStore(pool).ids() == [r["backtestId"] for r in legacy_records]
+    finally:
+        pool.close()
+
+
+_API_SCRIPT = """
+import json, sys
+from fastapi.testclient import TestClient
+from main import app
+strategy_id, body = sys.argv[1], json.loads(sys.argv[2])
+with TestClient(app) as client:
+    result = client.post(f"/backtest/{strategy_id}", json=body).json()
+    stored = client.get(f"/backtest/results/{result['backtestId']}").json()
+    print(json.dumps({"result": result, "stored": stored, "strategies": client.get("/strategies").json()}))
+"""
+
+
+def test_api_on_the_sqlite_backend(client, strategy_id, tmp_path):
+    data_dir = tmp_path / "data"
+    shutil.copytree(SAMPLE_DIR, data_dir, ignore=shutil.ignore_patterns("chains*", "backtests", "*.db*", "*.lock"))
+    env = {**os.environ, "OPTIONBOT_DATA_DIR": str(data_dir), "OPTIONBOT_SQLITE_PATH": str(data_dir / "optionbot.db")}
+    subprocess.run(
+        [sys.executable, "-m", "services.sqlite_storage", "migrate"],
+        cwd=APP_DIR, env=env, capture_output=True, text=True, timeout=120, check=True
+    )
+    # Without the JSON files the API can only be answering from the database
+    os.remove(data_dir / "strategies.json")
+    os.remove(data_dir / "historical_data.json")
+
+    completed = subprocess.run(
+        [sys.executable, "-c", _API_SCRIPT, strategy_id, json.dumps(BODY)],
+        cwd=APP_DIR, env={**env, "OPTIONBOT_STORAGE": "sqlite"}, capture_output=True, text=True, timeout=120,
+        check=True
+    )
+    output = json.loads(completed.stdout)
+    expected = client.post(f"/backtest/{strategy_id}", json=BODY).json()
+    assert output["result"]["finalCapital"] == expected["finalCapital"]
+    assert output["result"]["trades"] == expected["trades"]
+    assert output["stored"]["trades"] == expected["trades"]
+    assert [strategy["id"] for strategy in output["strategies"]] == [strategy_id]
@@ -0,0 +1,98 @@
+"""Write-behind persistence of strategies."""
+import json
+import time
+
+import pytest
+
+from services import strategy_repository, strategy_service
+from services.strategy_repository import StrategyRepository
+
+STRATEGY = {
+    "symbol": "SPY",
+    "strategy": "IronCondor",
+    "expiration": "0DTE",
+    "legs": {"longPut": -0.05, "shortPut": -0.15, "shortCall": 0.15, "longCall": 0.05},
+    "quantity": 1
+}
+
+
+def _stored_ids(path: str) -> list:
+    with open(path) as f:
+        return [strategy["id"] for strategy in json.load(f)]
+
+
+def _wait_for(path: str, predicate) -> None:
+    deadline = time.time() + 5
+    while not predicate(_stored_ids(path)):
+        assert time.time() < deadline, "write was not flushed"
+        time.sleep(0.01)
+
+
+def _repository(tmp_path, flush_interval: float) -> StrategyRepository:
+    path = tmp_path / "strategies.json"
+    path.write_text(json.dumps([{"id": "a", "name": "A"}]))
+    return StrategyRepository(str(path), flush_interval=flush_interval)
+
+
+def test_writes_are_flushed_after_the_interval(tmp_path):
+    repository = _repository(tmp_path, flush_interval=0.05)
+    repository.put({"id": "b", "name": "B"})
+    repository.put({"id": "c", "name": "C"})
+    assert repository.delete("a")
+    assert not repository.delete("missing")
+    # Reads see the writes at once; the file only after the flush
+    assert [strategy["id"] for strategy in repository.all()] == ["b", "c"]
+    assert _stored_ids(repository.file_path) == ["a"]
+
+    _wait_for(repository.file_path, lambda ids: ids == ["b", "c"])
+    assert not repository._dirty
+
+
+def test_close_flushes_pending_writes(tmp_path):
+    repository = _repository(tmp_path, flush_interval=60)
+    repository.put({"id": "b", "name": "B"})
+    assert _stored_ids(repository.file_path) == ["a"]
+    repository.close()
+    assert _stored_ids(repository.file_path) == ["a", "b"]
+    assert repository._timer is None
+    assert StrategyRepository(repository.file_path).get("b") == {"id": "b", "name": "B"}
+
+
+def test_returned_strategies_are_copies(tmp_path):
+    repository = _repository(tmp_path, flush_interval=60)
+    strategy = {"id": "b", "legs": {"longPut": -0.05}}
+    repository.put(strategy)
+    strategy["legs"]["longPut"] = 0
+    repository.get("b")["legs"]["longPut"] = 1
+    repository.all()[-1]["legs"]["longPut"] = 2
+    assert repository.get("b")["legs"] == {"longPut": -0.05}
+
+
+def test_failed_flush_is_retried(tmp_path, monkeypatch):
+    repository = _repository(tmp_path, flush_interval=60)
+    repository.put({"id": "b", "name": "B"})
+
+    def failing_write(path, data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(strategy_repository, "write_json_file", failing_write)
+    with pytest.raises(OSError):
+        repository.flush()
+    assert repository._dirty
+    monkeypatch.undo()
+    repository.flush()
+    assert _stored_ids(repository.file_path) == ["a", "b"]
+
+
+def test_api_writes_reach_the_file(client):
+    # The test session flushes every OPTIONBOT_FLUSH_INTERVAL=0.05 seconds
+    path = strategy_service.strategies.file_path
+    created = client.post("/strategies", json=STRATEGY)
+    assert created.status_code == 201
+    strategy_id = created.json()["id"]
+    assert client.get(f"/strategies/{strategy_id}").json() == created.json()
+    _wait_for(path, lambda ids: strategy_id in ids)
+
+    assert client.delete(f"/strategies/{strategy_id}").status_code in (200, 204)
+    assert client.get(f"/strategies/{strategy_id}").status_code == 404
+    _wait_for(path, lambda ids: strategy_id not in ids)
@@ -0,0 +1,77 @@
+"""Streamed backtests: day events as Server-Sent Events."""
+import json
+
+import pytest
+
+from benchmarks.synthetic import generate_chains
+from models.iron_condor import STREAM_CHUNK_DAYS, IronCondor
+from models.option_chain import ChainFrame
+
+PARAMS = {"startDate": "2024-01-02", "endDate": "2024-01-10", "initialCapital": 10000}
+
+
+def _events(text: str) -> list:
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _assert_progress(days: list) -> None:
+    progress = [day["progress"] for day in days]
+    assert all(0 < a < b for a, b in zip(progress, progress[1:]))
+    assert progress[-1] == 1.0
+
+
+def test_stream_matches_backtest(client, strategy_id):
+    response = client.get(f"/backtest/{strategy_id}/stream", params=PARAMS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    days = [payload for event, payload in events if event == "day"]
+    assert [event for event, _ in events] == ["day"] * len(days) + ["summary"]
+    _assert_progress(days)
+
+    result = client.post(f"/backtest/{strategy_id}", json=PARAMS).json()
+    assert [day["date"] for day in days] == [point["date"] for point in result["equityCurve"]]
+    assert [day["capital"] for day in days] == [point["equity"] for point in result["equityCurve"]]
+    assert [trade for day in days for trade in day["trades"]] == result["trades"]
+    summary = events[-1][1]
+    assert summary["finalCapital"] == result["finalCapital"]
+    assert summary["tradeCount"] == len(result["trades"])
+
+
+def test_stream_progress_across_chunks():
+    records = generate_chains(symbols=1, days=3 * STREAM_CHUNK_DAYS + 5, strikes=20, expirations=2, seed=3, names=['SPY'])
+    frame = ChainFrame.from_records(records, symbol='SPY')
+    start_date, end_date = records[0]["date"], records[-1]["date"]
+    strategy = IronCondor(
+        id="test",
+        name="test",
+        symbol="SPY",
+        expiration="0DTE",
+        legs={"longPut": -0.10, "shortPut": -0.20, "shortCall": 0.20, "longCall": 0.10},
+        quantity=1,
+        created_at=""
+    )
+    days = list(strategy.stream_backtest(start_date, end_date, 10000, frame))
+    assert len(days) == len(records)
+    _assert_progress(days)
+    result = strategy.backtest(start_date, end_date, 10000, frame)
+    assert [day["capital"] for day in days] == [point["equity"] for point in result["equityCurve"]]
+
+
+def test_stream_unknown_strategy(client):
+    response = client.get("/backtest/missing/stream", params=PARAMS)
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("params", [
+    {**PARAMS, "startDate": "2030-01-02", "endDate": "2030-01-10"},
+    {**PARAMS, "startDate": "01/02/2024"},
+])
+def test_stream_errors_before_the_first_event(client, strategy_id, params):
+    response = client.get(f"/backtest/{strategy_id}/stream", params=params)
+    assert response.status_code in (400, 404)
+    assert "detail" in response.json()
@@ -0,0 +1,43 @@
+"""Parameter sweeps over Iron Condor leg deltas."""
+from concurrent.futures import ThreadPoolExecutor
+
+from schemas import SweepRequest
+from services import optimization_service
+
+
+def _request(start_date: str, end_date: str) -> SweepRequest:
+    return SweepRequest(
+        symbol="SPY",
+        legs={
+            "longPut": {"start": -0.15, "end": -0.05, "step": 0.05},
+            "shortPut": {"start": -0.30, "end": -0.20, "step": 0.05},
+            "shortCall": {"start": 0.20, "end": 0.30, "step": 0.05},
+            "longCall": {"start": 0.10, "end": 0.10, "step": 0},
+        },
+        startDate=start_date,
+        endDate=end_date,
+        initialCapital=10000,
+        limit=None
+    )
+
+
+def test_concurrent_in_process_sweeps_keep_their_own_data():
+    requests = [_request("2024-01-02", "2024-01-04"), _request("2024-01-08", "2024-01-10")]
+    expected = [optimization_service.run_sweep(request) for request in requests]
+    assert expected[0]["results"] != expected[1]["results"]
+    assert expected[0]["evaluated"] < optimization_service.MIN_PARALLEL_COMBINATIONS
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(optimization_service.run_sweep, requests * 8))
+    for i, result in enumerate(results):
+        assert result == expected[i % 2]
+    # Nothing of a finished in-process sweep is left behind
+    assert optimization_service._sweep_frame is None
+
+
+def test_pool_sweep_matches_in_process_sweep(monkeypatch):
+    request = _request("2024-01-02", "2024-01-10")
+    expected = optimization_service.run_sweep(request)
+    monkeypatch.setattr(optimization_service, "MIN_PARALLEL_COMBINATIONS", 1)
+    monkeypatch.setattr(optimization_service, "SWEEP_WORKERS", 2)
+    assert optimization_service.run_sweep(request) == expected
@@ -0,0 +1,160 @@
+"""Stored trades: the columnar TradeLog and the keyset-paginated trades endpoint."""
+import base64
+import json
+
+import pytest
+
+from models.trade_log import SORT_FIELDS, TradeLog
+
+BODY = {"startDate": "2024-01-02", "endDate": "2024-01-10", "initialCapital": 10000}
+
+# Trade field each sort order compares
+SORT_VALUES = {
+    "date": lambda trade: trade["date"],
+    "strike": lambda trade: trade["option"]["strike"],
+    "premium": lambda trade: trade["option"]["premium"],
+    "price": lambda trade: trade["price"],
+    "pnl": lambda trade: trade["pnl"],
+}
+
+
+@pytest.fixture(scope="module")
+def backtest(client, strategy_id) -> dict:
+    return client.post(f"/backtest/{strategy_id}", json=BODY).json()
+
+
+def _expected(trades: list, sort_by: str = "seq", order: str = "asc", start_date=None, end_date=None,
+              option_type=None, action=None) -> list:
+    """Positions of the matching trades in the endpoint's order: the sort key, then booking order."""
+    rows = [
+        seq for seq, trade in enumerate(trades)
+        if (start_date is None or trade["date"] >= start_date)
+        and (end_date is None or trade["date"] <= end_date)
+        and (option_type is None or trade["option"]["optionType"] == option_type)
+        and (action is None or trade["action"] == action)
+    ]
+    if sort_by != "seq":
+        # sorted() is stable, also in reverse, so ties stay in booking order
+        rows = sorted(rows, key=lambda seq: SORT_VALUES[sort_by](trades[seq]), reverse=order == "desc")
+    elif order == "desc":
+        rows = rows[::-1]
+    return rows
+
+
+def _pages(client, backtest_id: str, **params) -> list:
+    url = f"/backtest/results/{backtest_id}/trades"
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        pages.append(page)
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("sort_by", SORT_FIELDS)
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_cover_every_trade_in_order(client, backtest, sort_by, order):
+    pages = _pages(client, backtest["backtestId"], sortBy=sort_by, order=order, limit=7)
+    expected = _expected(backtest["trades"], sort_by, order)
+    assert all(len(page["trades"]) == 7 for page in pages[:-1])
+    assert all(page["tradeCount"] == len(expected) for page in pages)
+    trades = [trade for page in pages for trade in page["trades"]]
+    assert [trade["seq"] for trade in trades] == expected
+    assert [{k: v for k, v in trade.items() if k != "seq"} for trade in trades] == \
+        [backtest["trades"][seq] for seq in expected]
+
+
+@pytest.mark.parametrize("filters", [
+    {"startDate": "2024-01-04", "endDate": "2024-01-08"},
+    {"startDate": "2024-01-09"},
+    {"endDate": "2024-01-02"},
+    {"optionType": "call"},
+    {"action": "sell", "optionType": "put"},
+    {"startDate": "2024-02-01"},
+])
+def test_filters(client, backtest, filters):
+    names = {"startDate": "start_date", "endDate": "end_date", "optionType": "option_type", "action": "action"}
+    expected = _expected(backtest["trades"], "pnl", "desc", **{names[k]: v for k, v in filters.items()})
+    pages = _pages(client, backtest["backtestId"], sortBy="pnl", order="desc", limit=5, **filters)
+    assert [trade["seq"] for page in pages for trade in page["trades"]] == expected
+    assert pages[0]["tradeCount"] == len(expected)
+
+
+def test_cursor_survives_an_extension(client, strategy_id):
+    short = client.post(f"/backtest/{strategy_id}", json={**BODY, "endDate": "2024-01-05"}).json()
+    url = f"/backtest/results/{short['backtestId']}/trades"
+    first = client.get(url, params={"limit": 10}).json()
+    assert first["tradeCount"] == len(short["trades"])
+
+    extended = client.post(f"/backtest/results/{short['backtestId']}/extend", json={"endDate": BODY["endDate"]}).json()
+    second = client.get(url, params={"limit": 10, "cursor": first["nextCursor"]}).json()
+    assert second["tradeCount"] == len(extended["trades"])
+    assert [trade["seq"] for trade in second["trades"]] == list(range(10, 20))
+    assert [{k: v for k, v in trade.items() if k != "seq"} for trade in second["trades"]] == extended["trades"][10:20]
+
+
+def _cursor(data) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("params", [
+    {"cursor": "!!!"},
+    {"cursor": _cursor("not a list")},
+    {"cursor": _cursor(["seq:asc", 3])},
+    {"cursor": _cursor(["seq:asc", "3", 3])},
+    {"cursor": _cursor(["date:asc", 3, 3])},
+    {"cursor": _cursor(["pnl:asc", 1.5, True])},
+    {"cursor": _cursor(["pnl:desc", 1.5, 3])},
+    {"sortBy": "symbol"},
+    {"order": "up"},
+    {"optionType": "straddle"},
+    {"action": "hold"},
+    {"limit": 0},
+    {"limit": 100000},
+])
+def test_bad_parameters_are_rejected(client, backtest, params):
+    response = client.get(f"/backtest/results/{backtest['backtestId']}/trades", params=params)
+    assert response.status_code == 400
+    assert "detail" in response.json()
+
+
+def test_cursor_of_another_order_is_rejected(client, backtest):
+    url = f"/backtest/results/{backtest['backtestId']}/trades"
+    cursor = client.get(url, params={"sortBy": "pnl", "limit": 5}).json()["nextCursor"]
+    response = client.get(url, params={"sortBy": "strike", "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor belongs to a different sort order"
+
+
+def test_unknown_backtest(client):
+    assert client.get("/backtest/results/missing/trades").status_code == 404
+
+
+def test_trade_log_round_trip():
+    trades = [
+        {"date": "2024-01-02", "time": "10:00", "action": "buy", "price": 1.0, "pnl": None,
+         "option": {"symbol": "SPY", "strike": 470.0, "expiration": "0DTE", "optionType": "put",
+                    "premium": 1.0, "quantity": 2}},
+        {"date": "2024-01-02", "time": "15:30", "action": "sell", "price": 0.5, "pnl": 100.0,
+         "option": {"symbol": "SPY", "strike": 470.0, "expiration": "0DTE", "optionType": "put",
+                    "premium": 0.5, "quantity": 2}},
+        {"date": "2024-01-03", "time": "10:00", "action": "sell", "price": 2.0, "pnl": -50.0,
+         "option": {"symbol": "SPY", "strike": 480.0, "expiration": "0DTE", "optionType": "call",
+                    "premium": 2.0, "quantity": 2}},
+    ]
+    log = TradeLog.from_trades(trades)
+    assert len(log) == 3
+    assert log.to_trades() == trades
+    assert TradeLog.from_json(json.loads(json.dumps(log.to_json()))).to_trades() == trades
+    assert TradeLog.concat([log.head(1), log.take(slice(1, 3))]).to_trades() == trades
+    assert log.to_trades(1, 2) == trades[1:2]
+
+    # Intraday trades sort by date and time; missing values sort last
+    assert log.query(sort_by="date", descending=True).tolist() == [2, 1, 0]
+    assert log.query(sort_by="pnl").tolist() == [2, 1, 0]
+    assert log.query(start_date="2024-01-03").tolist() == [2]
+    assert log.query(option_type="put", action="sell").tolist() == [1]
@@ -42,6 +42,36 @@ const BacktestStatistics: React.FC<BacktestStatisticsProps> = ({ result }) => {
           precision={2}
         />
       </Col>
+      {result.sortinoRatio !== undefined && (
+        <Col xs={24} sm={12} lg={6}>
+          <Statistic
+            title="Sortino Ratio"
+            value={result.sortinoRatio}
+            precision={2}
+          />
+        </Col>
+      )}
+      {result.winRate !== undefined && (
+        <Col xs={24} sm={12} lg={6}>
+          <Statistic
+            title="Win Rate"
+            value={result.winRate}
+            precision={1}
+            suffix="%"
+          />
+        </Col>
+      )}
+      {result.avgDailyPnl !== undefined && (
+        <Col xs={24} sm={12} lg={6}>
+          <Statistic
+            title="Avg Daily P&L"
+            value={result.avgDailyPnl}
+            precision={2}
+            prefix="$"
+            valueStyle={{ color: result.avgDailyPnl >= 0 ? '#52c41a' : '#ff4d4f' }}
+          />
+        </Col>
+      )}
     </Row>
   );
 };
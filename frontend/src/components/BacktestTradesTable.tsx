@@ -1,47 +1,134 @@
-import React from 'react';
-import { Table } from 'antd';
-import { Trade } from '../types';
+import React, { useCallback, useEffect, useState } from 'react';
+import { Button, Space, Table, message } from 'antd';
+import type { TablePaginationConfig } from 'antd';
+import type { FilterValue, SorterResult } from 'antd/es/table/interface';
+import { PagedTrade, TradePage } from '../types';
+import { backtestService } from '../services/api';
+
+const PAGE_SIZE = 10;
+
+// Table column key -> server sortBy field
+const SORT_FIELDS: { [key: string]: string } = {
+  date: 'date',
+  strike: 'strike',
+  price: 'price',
+  pnl: 'pnl',
+};
 
 interface BacktestTradesTableProps {
-  trades: Trade[];
+  backtestId: string;
 }
 
-const BacktestTradesTable: React.FC<BacktestTradesTableProps> = ({ trades }) => {
+interface TradeQuery {
+  sortBy: string;
+  order: 'asc' | 'desc';
+  optionType?: string;
+  action?: string;
+}
+
+// Trades are paged, filtered and sorted on the server, one cursor page at a time
+const BacktestTradesTable: React.FC<BacktestTradesTableProps> = ({ backtestId }) => {
+  const [query, setQuery] = useState<TradeQuery>({ sortBy: 'seq', order: 'asc' });
+  // Cursor of every page visited so far (undefined for the first)
+  const [cursors, setCursors] = useState<(string | undefined)[]>([undefined]);
+  const [page, setPage] = useState<TradePage | null>(null);
+  const [loading, setLoading] = useState(false);
+
+  const loadPage = useCallback(async (cursor?: string) => {
+    try {
+      setLoading(true);
+      const response = await backtestService.getTrades(backtestId, { ...query, cursor, limit: PAGE_SIZE });
+      setPage(response.data);
+    } catch (error: any) {
+      message.error(error.response?.data?.detail || 'Failed to load trades');
+      console.error(error);
+    } finally {
+      setLoading(false);
+    }
+  }, [backtestId, query]);
+
+  // Start over from the first page when the backtest, filters or sort change
+  useEffect(() => {
+    setCursors([undefined]);
+    loadPage(undefined);
+  }, [loadPage]);
+
+  const handleNext = () => {
+    if (!page?.nextCursor) return;
+    setCursors([...cursors, page.nextCursor]);
+    loadPage(page.nextCursor);
+  };
+
+  const handlePrevious = () => {
+    const previous = cursors.slice(0, -1);
+    setCursors(previous);
+    loadPage(previous[previous.length - 1]);
+  };
+
+  const handleChange = (
+    _pagination: TablePaginationConfig,
+    filters: Record<string, FilterValue | null>,
+    sorter: SorterResult<PagedTrade> | SorterResult<PagedTrade>[]
+  ) => {
+    const sort = Array.isArray(sorter) ? sorter[0] : sorter;
+    const sortBy = sort?.order && sort.columnKey ? SORT_FIELDS[String(sort.columnKey)] : 'seq';
+    setQuery({
+      sortBy,
+      order: sort?.order === 'descend' ? 'desc' : 'asc',
+      optionType: filters.optionType?.[0] as string | undefined,
+      action: filters.action?.[0] as string | undefined,
+    });
+  };
+
   const columns = [
     {
       title: 'Date',
       dataIndex: 'date',
       key: 'date',
+      sorter: true,
       render: (date: string) => new Date(date).toLocaleDateString(),
     },
     {
       title: 'Action',
       dataIndex: 'action',
       key: 'action',
+      filters: [
+        { text: 'BUY', value: 'buy' },
+        { text: 'SELL', value: 'sell' },
+      ],
+      filterMultiple: false,
       render: (action: string) => action.toUpperCase(),
     },
     {
       title: 'Strike',
       dataIndex: ['option', 'strike'],
       key: 'strike',
+      sorter: true,
       render: (strike: number) => `$${strike.toFixed(2)}`,
     },
     {
       title: 'Type',
       dataIndex: ['option', 'optionType'],
       key: 'optionType',
+      filters: [
+        { text: 'PUT', value: 'put' },
+        { text: 'CALL', value: 'call' },
+      ],
+      filterMultiple: false,
       render: (type: string) => type.toUpperCase(),
     },
     {
       title: 'Price',
       dataIndex: 'price',
       key: 'price',
+      sorter: true,
       render: (price: number) => `$${price.toFixed(2)}`,
     },
     {
       title: 'P&L',
       dataIndex: 'pnl',
       key: 'pnl',
+      sorter: true,
       render: (pnl: number) => (
         <span style={{ color: pnl >= 0 ? '#52c41a' : '#ff4d4f' }}>
           ${pnl.toFixed(2)}
@@ -50,15 +137,35 @@ const BacktestTradesTable: React.FC<BacktestTradesTableProps> = ({ trades }) =>
     },
   ];
 
+  const first = (cursors.length - 1) * PAGE_SIZE;
+
   return (
     <Table
       columns={columns}
-      dataSource={trades}
-      rowKey={(record, index) => `${record.date}-${index}`}
-      pagination={{ pageSize: 10 }}
+      dataSource={page?.trades || []}
+      rowKey="seq"
+      loading={loading}
+      pagination={false}
+      onChange={handleChange}
+      footer={() => (
+        <Space style={{ width: '100%', justifyContent: 'space-between' }}>
+          <span>
+            {page && page.tradeCount > 0
+              ? `${first + 1}-${first + page.trades.length} of ${page.tradeCount} trades`
+              : 'No trades'}
+          </span>
+          <Space>
+            <Button onClick={handlePrevious} disabled={loading || cursors.length <= 1}>
+              Previous
+            </Button>
+            <Button onClick={handleNext} disabled={loading || !page?.nextCursor}>
+              Next
+            </Button>
+          </Space>
+        </Space>
+      )}
     />
   );
 };
 
 export default BacktestTradesTable;
-
@@ -128,7 +128,7 @@ const CreateStrategyModal: React.FC<CreateStrategyModalProps> = ({
                   name="shortPut"
                   label="Short Put Delta"
                   rules={[{ required: true, message: 'Please enter Short Put delta' }]}
-                  help="Negative delta, higher than Long Put (e.g., -0.20 to -0.30)"
+                  help="Negative delta, larger in magnitude than Long Put (e.g., -0.20 to -0.30)"
                 >
                   <InputNumber
                     style={{ width: '100%' }}
@@ -160,14 +160,14 @@ const CreateStrategyModal: React.FC<CreateStrategyModalProps> = ({
                   name="longCall"
                   label="Long Call Delta"
                   rules={[{ required: true, message: 'Please enter Long Call delta' }]}
-                  help="Positive delta, higher than Short Call (e.g., 0.30 to 0.40)"
+                  help="Positive delta, smaller than Short Call (e.g., 0.10 to 0.20)"
                 >
                   <InputNumber
                     style={{ width: '100%' }}
                     step={0.01}
                     min={0}
                     max={1}
-                    placeholder="e.g., 0.35"
+                    placeholder="e.g., 0.15"
                   />
                 </Form.Item>
               </Col>
@@ -1,9 +1,10 @@
 import React, { useMemo } from 'react';
 import { Line } from '@ant-design/charts';
-import { Trade } from '../types';
+import { EquityPoint, Trade } from '../types';
 
 interface DailyPnLChartProps {
   trades: Trade[];
+  equityCurve?: EquityPoint[];
 }
 
 interface DailyPnLData {
@@ -12,9 +13,17 @@ interface DailyPnLData {
   cumulativePnL: number;
 }
 
-const DailyPnLChart: React.FC<DailyPnLChartProps> = ({ trades }) => {
-  // Calculate daily P&L from trades
+const DailyPnLChart: React.FC<DailyPnLChartProps> = ({ trades, equityCurve }) => {
+  // Use the server's equity curve when available, else rebuild daily P&L from trades
   const dailyPnL = useMemo(() => {
+    if (equityCurve && equityCurve.length > 0) {
+      const initialCapital = equityCurve[0].equity - equityCurve[0].pnl;
+      return equityCurve.map((point) => ({
+        date: point.date,
+        dailyPnL: point.pnl,
+        cumulativePnL: point.equity - initialCapital,
+      }));
+    }
     if (!trades || trades.length === 0) return [];
 
     // Group trades by date and sum P&L
@@ -39,7 +48,7 @@ const DailyPnLChart: React.FC<DailyPnLChartProps> = ({ trades }) => {
           cumulativePnL,
         };
       });
-  }, [trades]);
+  }, [trades, equityCurve]);
 
   if (dailyPnL.length === 0) {
     return null;
@@ -50,7 +50,7 @@ const Backtester: React.FC = () => {
         startDate: startDate.format('YYYY-MM-DD'),
         endDate: endDate.format('YYYY-MM-DD'),
         initialCapital,
-      });
+      }, { summary: true });
       setBacktestResult(response.data);
       message.success('Backtest completed successfully!');
     } catch (error: any) {
@@ -88,10 +88,10 @@ const Backtester: React.FC = () => {
           <BacktestStatistics result={backtestResult} />
 
           <h3 style={{ marginTop: 24, marginBottom: 16 }}>Daily P&L</h3>
-          <DailyPnLChart trades={backtestResult.trades} />
+          <DailyPnLChart trades={backtestResult.trades || []} equityCurve={backtestResult.equityCurve} />
 
           <h3 style={{ marginTop: 24, marginBottom: 16 }}>Trades</h3>
-          <BacktestTradesTable trades={backtestResult.trades} />
+          <BacktestTradesTable backtestId={backtestResult.backtestId} />
         </Card>
       )}
     </div>
@@ -20,10 +20,24 @@ export const strategyService = {
 
 // Backtest API
 export const backtestService = {
-  run: (strategyId: string, params: any) => 
-    apiClient.post(`/backtest/${strategyId}`, params),
+  // query: { summary: true } leaves the trades out; page them with getTrades
+  run: (strategyId: string, params: any, query?: any) =>
+    apiClient.post(`/backtest/${strategyId}`, params, { params: query }),
   getResults: (backtestId: string) => 
     apiClient.get(`/backtest/results/${backtestId}`),
+  // params: cursor, limit, startDate, endDate, optionType, action, sortBy, order
+  getTrades: (backtestId: string, params: any) =>
+    apiClient.get(`/backtest/results/${backtestId}/trades`, { params }),
+  submit: (strategyId: string, params: any) =>
+    apiClient.post(`/backtest/jobs/${strategyId}`, params),
+  getJobs: () => apiClient.get('/backtest/jobs'),
+  cancel: (backtestId: string) =>
+    apiClient.delete(`/backtest/jobs/${backtestId}`),
+  // Server-Sent Events: 'day' events, then a 'summary' (or 'error') event
+  stream: (strategyId: string, params: any) =>
+    new EventSource(
+      `${API_BASE_URL}/backtest/${strategyId}/stream?${new URLSearchParams(params).toString()}`
+    ),
 };
 
 // Market Data API
@@ -29,18 +29,47 @@ export interface BacktestResult {
   totalReturn: number;
   maxDrawdown: number;
   sharpeRatio: number;
-  trades: Trade[];
+  sortinoRatio?: number;
+  winRate?: number;
+  avgDailyPnl?: number;
+  equityCurve?: EquityPoint[];
+  // Times of day positions were opened and closed (intraday data only)
+  entryTime?: string;
+  exitTime?: string;
+  // Total number of trades (trades may hold a page of them, or be left out)
+  tradeCount?: number;
+  trades?: Trade[];
   createdAt: string;
 }
 
+// Capital at the end of each trading day, and that day's P&L
+export interface EquityPoint {
+  date: string;
+  equity: number;
+  pnl: number;
+}
+
 export interface Trade {
   date: string;
+  time?: string;
   action: 'buy' | 'sell';
   option: Option;
   price: number;
   pnl: number;
 }
 
+// A page of a stored backtest's trades (GET /backtest/results/{id}/trades)
+export interface PagedTrade extends Trade {
+  seq: number; // position in booking order
+}
+
+export interface TradePage {
+  backtestId: string;
+  tradeCount: number; // trades matching the filters
+  trades: PagedTrade[];
+  nextCursor?: string | null;
+}
+
 export type IronCondorLeg = 'longPut' | 'shortPut' | 'shortCall' | 'longCall';
 
 export interface IronCondorLegs {